@@ -0,0 +1,297 @@
+"""
+Two-tier cache backend: a bounded in-process LRU (L1) in front of Redis (L2).
+
+Reads are served from L1 when possible and fall through to Redis, which is
+shared by every web and Celery process. L1 entries live at most
+``L1_TIMEOUT`` seconds, so values changed by another process are picked up
+quickly. Bumping the generation key in Redis (``bump_generation()``, also
+done by ``clear()``) empties L1 in every process within
+``GENERATION_CHECK_INTERVAL`` seconds.
+
+Atomic operations (``add``, ``incr``) always go to Redis. Misses are never
+cached in L1, nor are keys starting with one of ``L1_SKIP_PREFIXES``: use it
+for keys whose deletion must take effect in every process at once.
+
+The cache degrades rather than fails when Redis is unavailable: reads are
+misses, writes are skipped (``add`` returns False, ``incr`` raises
+ValueError as for a missing key), and each failure is logged and counted.
+"""
+
+import logging
+import pickle
+import threading
+import time
+from collections import Counter, OrderedDict
+
+import redis
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.redis import RedisCache
+
+from .timing import timed
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = "tiered_cache_generation"
+
+_MISSING = object()
+# Returned by _l2() when Redis failed.
+_FAILED = object()
+
+
+class TieredCache(BaseCache):
+    """
+    Cache backend configured like ``RedisCache``, with extra OPTIONS:
+
+    ``L1_MAX_ENTRIES``: entries kept in process, least recently used are
+    evicted first (default 10000).
+    ``L1_TIMEOUT``: seconds an entry stays in process (default 5).
+    ``GENERATION_CHECK_INTERVAL``: seconds between checks of the
+    generation key (default 1).
+    ``L1_SKIP_PREFIXES``: keys starting with one of these are only kept in
+    Redis (default none).
+
+    Other OPTIONS are passed to ``RedisCache``.
+    """
+
+    def __init__(self, server, params):
+        super().__init__(params)
+        options = dict(params.get("OPTIONS", {}))
+        self.l1_max_entries = int(options.pop("L1_MAX_ENTRIES", 10000))
+        self.l1_timeout = float(options.pop("L1_TIMEOUT", 5))
+        self.generation_check_interval = float(
+            options.pop("GENERATION_CHECK_INTERVAL", 1)
+        )
+        self.l1_skip_prefixes = tuple(options.pop("L1_SKIP_PREFIXES", ()))
+        self.l2 = RedisCache(server, {**params, "OPTIONS": options})
+
+        self._l1 = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = None
+        self._generation_checked_at = 0.0
+        self._stats = Counter()
+
+    # L1
+
+    def _l1_key(self, key, version):
+        return self.make_and_validate_key(key, version=version)
+
+    def _in_l1(self, key):
+        return not key.startswith(self.l1_skip_prefixes)
+
+    def _l1_get(self, l1_key):
+        with self._lock:
+            item = self._l1.get(l1_key)
+            if item is None:
+                return _MISSING
+            expires_at, pickled = item
+            if expires_at <= time.monotonic():
+                del self._l1[l1_key]
+                return _MISSING
+            self._l1.move_to_end(l1_key)
+        return pickle.loads(pickled)
+
+    def _l1_set(self, l1_key, value, timeout):
+        timeout = self.get_backend_timeout(timeout)
+        if timeout is not None and timeout <= 0:
+            self._l1_delete(l1_key)
+            return
+        l1_timeout = self.l1_timeout
+        if timeout is not None:
+            l1_timeout = min(l1_timeout, timeout - time.time())
+
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._l1[l1_key] = (time.monotonic() + l1_timeout, pickled)
+            self._l1.move_to_end(l1_key)
+            while len(self._l1) > self.l1_max_entries:
+                self._l1.popitem(last=False)
+
+    def _l1_delete(self, l1_key):
+        with self._lock:
+            self._l1.pop(l1_key, None)
+
+    def clear_l1(self):
+        with self._lock:
+            self._l1.clear()
+
+    def _check_generation(self):
+        now = time.monotonic()
+        if now - self._generation_checked_at < self.generation_check_interval:
+            return
+        self._generation_checked_at = now
+        generation = self._l2("get", GENERATION_KEY, 0, version=0)
+        if generation is _FAILED:
+            return
+        if generation != self._generation:
+            if self._generation is not None:
+                self.clear_l1()
+            self._generation = generation
+
+    def bump_generation(self):
+        """Invalidate L1 in every process."""
+        self._l2("add", GENERATION_KEY, 0, timeout=None, version=0)
+        generation = self._l2("incr", GENERATION_KEY, version=0)
+        if generation is not _FAILED:
+            self._generation = generation
+            self._generation_checked_at = time.monotonic()
+        self.clear_l1()
+
+    def stats(self):
+        """Returns: hit and miss counts per tier for this process."""
+        with self._lock:
+            return {
+                stat: self._stats[stat]
+                for stat in (
+                    "l1_hits",
+                    "l1_misses",
+                    "l2_hits",
+                    "l2_misses",
+                    "l2_errors",
+                )
+            }
+
+    def _count(self, **counts):
+        with self._lock:
+            self._stats.update(counts)
+
+    # L2
+
+    def _l2(self, method, *args, **kwargs):
+        """Returns: the result of ``self.l2.method()``, _FAILED on error."""
+        try:
+            return getattr(self.l2, method)(*args, **kwargs)
+        except redis.RedisError as e:
+            self._count(l2_errors=1)
+            logger.warning(f"Cache {method}() failed, degrading: {e}")
+            return _FAILED
+
+    # Cache API
+
+    @timed("cache")
+    def get(self, key, default=None, version=None):
+        self._check_generation()
+        l1_key = self._l1_key(key, version)
+        in_l1 = self._in_l1(key)
+        value = self._l1_get(l1_key) if in_l1 else _MISSING
+        if value is not _MISSING:
+            self._count(l1_hits=1)
+            return value
+
+        value = self._l2("get", key, _MISSING, version=version)
+        if value is _FAILED:
+            self._count(l1_misses=1)
+            return default
+        if value is _MISSING:
+            self._count(l1_misses=1, l2_misses=1)
+            return default
+        self._count(l1_misses=1, l2_hits=1)
+        if in_l1:
+            self._l1_set(l1_key, value, self.l1_timeout)
+        return value
+
+    @timed("cache")
+    def get_many(self, keys, version=None):
+        self._check_generation()
+        found = {}
+        l1_keys = {}
+        for key in keys:
+            l1_key = self._l1_key(key, version)
+            value = self._l1_get(l1_key) if self._in_l1(key) else _MISSING
+            if value is _MISSING:
+                l1_keys[key] = l1_key
+            else:
+                found[key] = value
+
+        from_l2 = {}
+        if l1_keys:
+            from_l2 = self._l2("get_many", l1_keys, version=version)
+        if from_l2 is _FAILED:
+            self._count(l1_hits=len(found), l1_misses=len(l1_keys))
+            return found
+        for key, value in from_l2.items():
+            if self._in_l1(key):
+                self._l1_set(l1_keys[key], value, self.l1_timeout)
+        found.update(from_l2)
+
+        self._count(
+            l1_hits=len(found) - len(from_l2),
+            l1_misses=len(l1_keys),
+            l2_hits=len(from_l2),
+            l2_misses=len(l1_keys) - len(from_l2),
+        )
+        return found
+
+    @timed("cache")
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        l1_key = self._l1_key(key, version)
+        result = self._l2("set", key, value, timeout=timeout, version=version)
+        if result is _FAILED:
+            # Don't keep in L1 what other processes can't see.
+            self._l1_delete(l1_key)
+        elif self._in_l1(key):
+            self._l1_set(l1_key, value, timeout)
+
+    @timed("cache")
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self._l2("set_many", data, timeout=timeout, version=version)
+        if failed is _FAILED:
+            for key in data:
+                self._l1_delete(self._l1_key(key, version))
+            return list(data)
+        for key, value in data.items():
+            if self._in_l1(key):
+                self._l1_set(self._l1_key(key, version), value, timeout)
+        return failed
+
+    @timed("cache")
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        l1_key = self._l1_key(key, version)
+        if (
+            self._l2("add", key, value, timeout=timeout, version=version)
+            is True
+        ):
+            if self._in_l1(key):
+                self._l1_set(l1_key, value, timeout)
+            return True
+        self._l1_delete(l1_key)
+        return False
+
+    @timed("cache")
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._l2("touch", key, timeout=timeout, version=version) is True
+
+    @timed("cache")
+    def delete(self, key, version=None):
+        self._l1_delete(self._l1_key(key, version))
+        return self._l2("delete", key, version=version) is True
+
+    @timed("cache")
+    def delete_many(self, keys, version=None):
+        for key in keys:
+            self._l1_delete(self._l1_key(key, version))
+        self._l2("delete_many", keys, version=version)
+
+    @timed("cache")
+    def has_key(self, key, version=None):
+        self._check_generation()
+        if self._in_l1(key) and (
+            self._l1_get(self._l1_key(key, version)) is not _MISSING
+        ):
+            return True
+        return self._l2("has_key", key, version=version) is True
+
+    @timed("cache")
+    def incr(self, key, delta=1, version=None):
+        self._l1_delete(self._l1_key(key, version))
+        value = self._l2("incr", key, delta, version=version)
+        if value is _FAILED:
+            # As for a missing key: callers already handle that.
+            raise ValueError(f"Key '{key}' not found.")
+        return value
+
+    def clear(self):
+        self._l2("clear")
+        self.bump_generation()
+
+    def close(self, **kwargs):
+        self._l2("close", **kwargs)
@@ -1,9 +1,18 @@
 import logging
 import os
+import shutil
 
 from celery import Celery
-from celery.signals import after_setup_logger
+from celery.signals import (
+    after_setup_logger,
+    task_postrun,
+    task_prerun,
+    worker_init,
+    worker_process_init,
+    worker_process_shutdown,
+)
 from django.conf import settings
+from django.db import connections
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "Parcels.settings")
 
@@ -12,6 +21,22 @@ app = Celery("Parcels")
 app.config_from_object("django.conf:settings", namespace="CELERY")
 app.autodiscover_tasks(lambda: settings.INSTALLED_APPS)
 
+# Queues, each consumed by its own workers (see docker-compose.yml):
+# multi-hour CSV ingests can't hold up short interactive and maintenance
+# tasks, and ingest workers can be tuned for long tasks.
+DEFAULT_QUEUE = "celery"
+INGEST_QUEUE = "ingest"
+PRIORITY_QUEUE = "priority"
+QUEUES = [PRIORITY_QUEUE, DEFAULT_QUEUE, INGEST_QUEUE]
+
+app.conf.task_default_queue = DEFAULT_QUEUE
+app.conf.task_routes = {
+    "shipments.tasks.load_seed_data_task": {"queue": INGEST_QUEUE},
+    "shipments.tasks.prewarm_weather_task": {"queue": PRIORITY_QUEUE},
+    "shipments.tasks.maintenance_task": {"queue": PRIORITY_QUEUE},
+    "shipments.tasks.reconcile_rollup_task": {"queue": PRIORITY_QUEUE},
+}
+
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +46,97 @@ def setup_loggers(logger, *args, **kwargs):
     logger.info("Celery logger set up")
 
 
+@task_prerun.connect
+def start_task_profile(task_id=None, task=None, **kwargs):
+    from Parcels.profiling import start_task_profile
+
+    start_task_profile(task_id, task.name)
+
+
+@task_postrun.connect
+def finish_task_profile(task_id=None, state=None, **kwargs):
+    from Parcels.profiling import finish_task_profile
+
+    result = finish_task_profile(task_id, state)
+    if result:
+        logger.info(
+            f"Task {result['task']}[{task_id}] {state}: "
+            f"{result['wall_seconds']:.3f}s wall, "
+            f"{result['cpu_seconds']:.3f}s CPU, "
+            f"{result['db_queries']} queries in {result['db_seconds']:.3f}s"
+        )
+
+
+@task_postrun.connect
+def export_process_metrics(*args, **kwargs):
+    from Parcels.metrics import export_process_stats
+
+    export_process_stats()
+
+
+@worker_process_init.connect
+def discard_inherited_db_pools(*args, **kwargs):
+    """
+    Forget connection pools inherited from the parent worker process.
+
+    Their sockets and maintenance threads belong to the parent; each child
+    opens its own pool on its first query.
+    """
+    for conn in connections.all():
+        pools = getattr(conn, "_connection_pools", None)
+        if pools:
+            pools.pop(conn.alias, None)
+
+
+@worker_init.connect
+def start_metrics_server(*args, **kwargs):
+    """
+    Serve the worker's metrics on CELERY_METRICS_PORT, aggregated across
+    the prefork children through PROMETHEUS_MULTIPROC_DIR.
+    """
+    port = os.environ.get("CELERY_METRICS_PORT")
+    if not port:
+        return
+
+    from prometheus_client import start_http_server
+
+    from Parcels.metrics import metrics_registry
+
+    multiproc_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if multiproc_dir:
+        # Files from a previous run would be added to this one's.
+        shutil.rmtree(multiproc_dir, ignore_errors=True)
+        os.makedirs(multiproc_dir, exist_ok=True)
+
+    start_http_server(int(port), registry=metrics_registry())
+    logger.info(f"Serving worker metrics on port {port}")
+
+
+@worker_process_shutdown.connect
+def mark_metrics_process_dead(pid=None, *args, **kwargs):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(pid or os.getpid())
+
+
+def queue_lengths(queues=None):
+    """Returns: {queue: messages waiting in the broker}."""
+    lengths = {}
+    with app.connection_for_read() as conn:
+        channel = conn.default_channel
+        for queue in queues or QUEUES:
+            # Redis counts all priority lists of the queue.
+            try:
+                lengths[queue] = channel.queue_declare(
+                    queue, passive=True
+                ).message_count
+            except conn.channel_errors:
+                # Not declared yet: no worker or task has used it.
+                lengths[queue] = 0
+    return lengths
+
+
 @app.on_after_configure.connect
 def setup_periodic_tasks(sender, **kwargs):
     logger.info("Setting up periodic tasks")
@@ -0,0 +1,340 @@
+"""
+Prometheus metrics for the Parcels project.
+
+Metrics are registered on the default ``prometheus_client`` registry and
+served by ``Parcels.views.metrics_view``. App metrics live in each app's
+``metrics`` module.
+
+Under gunicorn or Celery prefork, set ``PROMETHEUS_MULTIPROC_DIR`` to a
+directory shared by the worker processes (emptied at startup); counters and
+histograms are then aggregated across workers. The database pool and cache
+tier collectors only see the process serving the scrape, so in that mode
+each process instead copies its statistics into multiprocess metrics after
+requests and tasks, at most every ``PROMETHEUS_PROCESS_STATS_INTERVAL``
+seconds (``export_process_stats``). The Celery queue backlog is read from
+the broker in either mode.
+
+Labels only take values from bounded sets (route patterns, status codes,
+configured provider names), never raw paths or user input.
+"""
+
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.multiprocess import MultiProcessCollector
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+HTTP_METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "parcels_http_request_duration_seconds",
+    "Time to answer HTTP requests, by route pattern and status.",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+
+
+class DatabasePoolCollector:
+    """Expose psycopg connection pool statistics for each pooled alias."""
+
+    # pool stat -> (metric name, help, is_counter, scale)
+    STATS = {
+        "pool_size": (
+            "parcels_db_pool_size",
+            "Connections currently managed by the pool.",
+            False,
+            1,
+        ),
+        "pool_available": (
+            "parcels_db_pool_available",
+            "Idle connections available for checkout.",
+            False,
+            1,
+        ),
+        "pool_max": (
+            "parcels_db_pool_max_size",
+            "Configured maximum pool size.",
+            False,
+            1,
+        ),
+        "requests_waiting": (
+            "parcels_db_pool_checkouts_waiting",
+            "Checkouts currently waiting for a connection.",
+            False,
+            1,
+        ),
+        "requests_num": (
+            "parcels_db_pool_checkouts",
+            "Connection checkouts served by the pool.",
+            True,
+            1,
+        ),
+        "requests_wait_ms": (
+            "parcels_db_pool_checkout_wait_seconds",
+            "Time spent waiting for a connection at checkout.",
+            True,
+            0.001,
+        ),
+        "requests_errors": (
+            "parcels_db_pool_checkout_errors",
+            "Checkouts that failed or timed out.",
+            True,
+            1,
+        ),
+        "connections_errors": (
+            "parcels_db_pool_connection_errors",
+            "Failed attempts to open a new connection.",
+            True,
+            1,
+        ),
+        "connections_lost": (
+            "parcels_db_pool_connections_lost",
+            "Connections found broken by the health check.",
+            True,
+            1,
+        ),
+    }
+
+    def families(self):
+        families = {}
+        for stat, (name, documentation, is_counter, _) in self.STATS.items():
+            family_class = (
+                CounterMetricFamily if is_counter else GaugeMetricFamily
+            )
+            families[stat] = family_class(name, documentation, labels=["alias"])
+        return families
+
+    def describe(self):
+        # Registering a collector without describe() calls collect(), which
+        # would open the pools at import time, before the test settings (or
+        # a fork) apply.
+        return list(self.families().values())
+
+    def collect(self):
+        families = self.families()
+        for alias, stats in pool_stats().items():
+            for stat, (_, _, _, scale) in self.STATS.items():
+                families[stat].add_metric([alias], stats.get(stat, 0) * scale)
+
+        yield from families.values()
+
+
+def pool_stats():
+    """Return ``{alias: stats}`` for every database alias using a pool."""
+    stats = {}
+    for alias in connections:
+        pool = getattr(connections[alias], "pool", None)
+        if pool is not None:
+            stats[alias] = pool.get_stats()
+    return stats
+
+
+class CacheTierCollector:
+    """Expose per-tier hit and miss counts of two-tier caches."""
+
+    # stat -> (tier, result)
+    STATS = {
+        "l1_hits": ("l1", "hit"),
+        "l1_misses": ("l1", "miss"),
+        "l2_hits": ("l2", "hit"),
+        "l2_misses": ("l2", "miss"),
+        "l2_errors": ("l2", "error"),
+    }
+
+    NAME = "parcels_cache_lookups"
+    DOCUMENTATION = "Cache lookups by tier and result."
+    LABELS = ["cache", "tier", "result"]
+
+    @classmethod
+    def family(cls):
+        return CounterMetricFamily(
+            cls.NAME, cls.DOCUMENTATION, labels=cls.LABELS
+        )
+
+    def describe(self):
+        # As above: don't connect to the caches at import time.
+        return [self.family()]
+
+    def collect(self):
+        family = self.family()
+        for alias in settings.CACHES:
+            cache = caches[alias]
+            if not hasattr(cache, "stats"):
+                continue
+            for stat, count in cache.stats().items():
+                family.add_metric([alias, *self.STATS[stat]], count)
+        yield family
+
+
+class CeleryQueueCollector:
+    """Expose the number of messages waiting in each Celery queue."""
+
+    @staticmethod
+    def family():
+        return GaugeMetricFamily(
+            "parcels_celery_queue_length",
+            "Tasks waiting in the broker, by Celery queue.",
+            labels=["queue"],
+        )
+
+    def describe(self):
+        return [self.family()]
+
+    def collect(self):
+        from Parcels.celery import queue_lengths
+
+        family = self.family()
+        try:
+            lengths = queue_lengths()
+        except Exception as e:
+            logger.warning(f"Could not read Celery queue lengths: {e}")
+            lengths = {}
+        for queue, length in lengths.items():
+            family.add_metric([queue], length)
+        yield family
+
+
+class ProcessStatsExporter:
+    """
+    Copy this process's database pool and cache tier statistics into
+    multiprocess metrics. Pool gauges are summed over live processes;
+    counters advance by the change since the previous export, so they keep
+    counting after a process exits.
+    """
+
+    def __init__(self):
+        self.pool_metrics = {}
+        for stat, (
+            name,
+            documentation,
+            is_counter,
+            _,
+        ) in DatabasePoolCollector.STATS.items():
+            if is_counter:
+                metric = Counter(name, documentation, ["alias"], registry=None)
+            else:
+                metric = Gauge(
+                    name,
+                    documentation,
+                    ["alias"],
+                    registry=None,
+                    multiprocess_mode="livesum",
+                )
+            self.pool_metrics[stat] = metric
+        self.cache_lookups = Counter(
+            CacheTierCollector.NAME,
+            CacheTierCollector.DOCUMENTATION,
+            CacheTierCollector.LABELS,
+            registry=None,
+        )
+        self._exported = {}
+        self._lock = threading.Lock()
+
+    def _advance(self, counter, key, labels, value):
+        with self._lock:
+            delta = value - self._exported.get(key, 0)
+            self._exported[key] = value
+        if delta > 0:
+            counter.labels(*labels).inc(delta)
+
+    def export(self):
+        for alias, stats in pool_stats().items():
+            for stat, (
+                _,
+                _,
+                is_counter,
+                scale,
+            ) in DatabasePoolCollector.STATS.items():
+                metric = self.pool_metrics[stat]
+                value = stats.get(stat, 0) * scale
+                if is_counter:
+                    self._advance(metric, (alias, stat), [alias], value)
+                else:
+                    metric.labels(alias).set(value)
+
+        for alias in settings.CACHES:
+            # Caches are per thread: keep each instance's counts apart.
+            cache = caches[alias]
+            if not hasattr(cache, "stats"):
+                continue
+            for stat, count in cache.stats().items():
+                self._advance(
+                    self.cache_lookups,
+                    (id(cache), stat),
+                    [alias, *CacheTierCollector.STATS[stat]],
+                    count,
+                )
+
+
+_exporter = None
+_exporter_lock = threading.Lock()
+_next_export = 0.0
+
+
+def export_process_stats(force=False):
+    """
+    In multiprocess mode, export this process's pool and cache statistics
+    unless done less than PROMETHEUS_PROCESS_STATS_INTERVAL seconds ago.
+    """
+    global _exporter, _next_export
+    if not multiprocess_mode():
+        return
+    now = time.monotonic()
+    with _exporter_lock:
+        if not force and now < _next_export:
+            return
+        _next_export = now + settings.PROMETHEUS_PROCESS_STATS_INTERVAL
+        if _exporter is None:
+            _exporter = ProcessStatsExporter()
+    try:
+        _exporter.export()
+    except Exception as e:
+        logger.warning(f"Could not export process metrics: {e}")
+
+
+def multiprocess_mode():
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+
+def metrics_registry():
+    """Registry to expose: every process's metrics in multiprocess mode."""
+    if not multiprocess_mode():
+        return REGISTRY
+    registry = CollectorRegistry()
+    MultiProcessCollector(registry)
+    registry.register(CeleryQueueCollector())
+    return registry
+
+
+if not multiprocess_mode():
+    REGISTRY.register(DatabasePoolCollector())
+    REGISTRY.register(CacheTierCollector())
+    REGISTRY.register(CeleryQueueCollector())
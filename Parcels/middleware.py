@@ -0,0 +1,138 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from . import timing
+from .metrics import HTTP_METHODS, HTTP_REQUEST_SECONDS, export_process_stats
+from .routers import (
+    primary_pinned_until,
+    reset_primary_pin,
+    set_primary_pinned_until,
+)
+
+PRIMARY_PIN_COOKIE = "primary_pin"
+
+logger = logging.getLogger(__name__)
+
+
+class PrimaryPinningMiddleware:
+    """
+    Keep a client's reads on the primary for a short window after it wrote.
+
+    The router pins the current request to the primary on every write; the
+    pin is carried to the client's following requests in a cookie holding
+    the expiry timestamp.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        until = 0.0
+        try:
+            until = float(request.COOKIES.get(PRIMARY_PIN_COOKIE, 0))
+        except ValueError:
+            pass
+
+        token = set_primary_pinned_until(until)
+        try:
+            response = self.get_response(request)
+            pinned_until = primary_pinned_until()
+        finally:
+            reset_primary_pin(token)
+
+        if pinned_until > until:
+            response.set_cookie(
+                PRIMARY_PIN_COOKIE,
+                f"{pinned_until:.3f}",
+                max_age=settings.DATABASE_REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        elif until and until <= time.time():
+            response.delete_cookie(PRIMARY_PIN_COOKIE)
+
+        return response
+
+
+class RequestMetricsMiddleware:
+    """
+    Record request latency per route pattern, method and status.
+
+    The route is the URL pattern that matched (``api/v1/shipments/...``),
+    not the path, so label values stay bounded.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        match = getattr(request, "resolver_match", None)
+        route = match.route if match is not None else "unmatched"
+        method = request.method if request.method in HTTP_METHODS else "other"
+        HTTP_REQUEST_SECONDS.labels(
+            method=method, route=route, status=str(response.status_code)
+        ).observe(elapsed)
+        export_process_stats()
+        return response
+
+
+class ServerTimingMiddleware:
+    """
+    Count database queries, cache calls and outbound HTTP time per request,
+    report them in a ``Server-Timing`` header, and log requests over the
+    query or latency budget.
+
+    Removed from the stack unless REQUEST_TIMING_ENABLED is set.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_TIMING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        timings, token = timing.start()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(
+                        connections[alias].execute_wrapper(timing.query_timer)
+                    )
+                response = self.get_response(request)
+        finally:
+            timing.stop(token)
+        total = time.perf_counter() - start
+
+        metrics = [
+            f"{kind};dur={timings.seconds[kind] * 1000:.1f};"
+            f'desc="{timings.counts[kind]} calls"'
+            for kind in timing.KINDS
+        ]
+        metrics.append(f"total;dur={total * 1000:.1f}")
+        response["Server-Timing"] = ", ".join(metrics)
+
+        queries = timings.counts["db"]
+        if (
+            queries > settings.REQUEST_QUERY_BUDGET
+            or total * 1000 > settings.REQUEST_LATENCY_BUDGET_MS
+        ):
+            logger.warning(
+                f"Request over budget: {request.method} {request.path} "
+                f"took {total * 1000:.0f}ms with {queries} queries "
+                f"({timings.seconds['db'] * 1000:.0f}ms), "
+                f"{timings.counts['cache']} cache calls "
+                f"({timings.seconds['cache'] * 1000:.0f}ms), "
+                f"{timings.counts['http']} HTTP calls "
+                f"({timings.seconds['http'] * 1000:.0f}ms)"
+            )
+        return response
@@ -0,0 +1,181 @@
+"""
+Celery task profiling, driven by the task_prerun/task_postrun signal
+handlers in ``Parcels.celery``.
+
+Every task run records its wall time, CPU time and database queries as
+metrics. A sample of runs also traces peak Python memory with tracemalloc,
+and a (smaller) sample is run under cProfile; those runs are written to
+``TASK_PROFILE_DIR`` as ``.prof`` files with a ``.json`` summary, keeping
+the newest ``TASK_PROFILE_MAX_FILES`` runs.
+"""
+
+import cProfile
+import json
+import logging
+import random
+import time
+import tracemalloc
+from contextlib import ExitStack
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from prometheus_client import Histogram
+
+from . import timing
+from .metrics import LATENCY_BUCKETS
+
+logger = logging.getLogger(__name__)
+
+TASK_BUCKETS = LATENCY_BUCKETS + (30.0, 60.0, 300.0, 900.0)
+
+TASK_WALL_SECONDS = Histogram(
+    "parcels_task_duration_seconds",
+    "Wall time of Celery task runs.",
+    ["task"],
+    buckets=TASK_BUCKETS,
+)
+TASK_CPU_SECONDS = Histogram(
+    "parcels_task_cpu_seconds",
+    "CPU time of the thread running a Celery task.",
+    ["task"],
+    buckets=TASK_BUCKETS,
+)
+TASK_DB_QUERIES = Histogram(
+    "parcels_task_db_queries",
+    "Database queries per Celery task run.",
+    ["task"],
+    buckets=(1, 10, 100, 1000, 10000, 100000, 1000000),
+)
+TASK_DB_SECONDS = Histogram(
+    "parcels_task_db_duration_seconds",
+    "Time spent in database queries per Celery task run.",
+    ["task"],
+    buckets=TASK_BUCKETS,
+)
+TASK_PEAK_MEMORY_BYTES = Histogram(
+    "parcels_task_peak_memory_bytes",
+    "Peak memory allocated by Python during sampled Celery task runs.",
+    ["task"],
+    buckets=tuple(2**n for n in range(20, 33)),
+)
+
+
+class TaskProfile:
+    """Measurements of one task run, from prerun to postrun."""
+
+    def __init__(self, task_name, trace_memory, run_profiler):
+        self.task_name = task_name
+        self.started_at = datetime.now(timezone.utc)
+        self._stack = ExitStack()
+        self._tracing_started = False
+        self.profiler = cProfile.Profile() if run_profiler else None
+
+        self.timings, token = timing.start()
+        self._stack.callback(timing.stop, token)
+        for alias in connections:
+            self._stack.enter_context(
+                connections[alias].execute_wrapper(timing.query_timer)
+            )
+
+        self.trace_memory = trace_memory
+        if trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._tracing_started = True
+            tracemalloc.reset_peak()
+
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.thread_time()
+        if self.profiler:
+            try:
+                self.profiler.enable()
+            except ValueError:
+                # Another profiler (e.g. a coverage tool) is active.
+                self.profiler = None
+
+    def finish(self):
+        """Stop measuring. Returns: dict of the measurements."""
+        if self.profiler:
+            self.profiler.disable()
+        wall = time.perf_counter() - self._wall_start
+        cpu = time.thread_time() - self._cpu_start
+
+        peak_memory = None
+        if self.trace_memory:
+            peak_memory = tracemalloc.get_traced_memory()[1]
+            if self._tracing_started:
+                tracemalloc.stop()
+        self._stack.close()
+
+        return {
+            "task": self.task_name,
+            "started_at": self.started_at.isoformat(),
+            "wall_seconds": wall,
+            "cpu_seconds": cpu,
+            "db_queries": self.timings.counts["db"],
+            "db_seconds": self.timings.seconds["db"],
+            "peak_memory_bytes": peak_memory,
+        }
+
+
+_active = {}
+
+
+def start_task_profile(task_id, task_name):
+    if not settings.TASK_PROFILING_ENABLED:
+        return
+    _active[task_id] = TaskProfile(
+        task_name,
+        trace_memory=random.random() < settings.TASK_PROFILE_MEMORY_SAMPLE_RATE,
+        run_profiler=random.random()
+        < settings.TASK_PROFILE_CPROFILE_SAMPLE_RATE,
+    )
+
+
+def finish_task_profile(task_id, state=None):
+    """Record the run's metrics. Returns: the measurements, if profiled."""
+    profile = _active.pop(task_id, None)
+    if profile is None:
+        return None
+
+    result = profile.finish()
+    result["task_id"] = task_id
+    result["state"] = state
+    task = result["task"]
+    TASK_WALL_SECONDS.labels(task=task).observe(result["wall_seconds"])
+    TASK_CPU_SECONDS.labels(task=task).observe(result["cpu_seconds"])
+    TASK_DB_QUERIES.labels(task=task).observe(result["db_queries"])
+    TASK_DB_SECONDS.labels(task=task).observe(result["db_seconds"])
+    if result["peak_memory_bytes"] is not None:
+        TASK_PEAK_MEMORY_BYTES.labels(task=task).observe(
+            result["peak_memory_bytes"]
+        )
+
+    if profile.profiler or profile.trace_memory:
+        try:
+            write_profile(profile, result)
+        except OSError as e:
+            logger.warning(f"Could not write profile of task {task_id}: {e}")
+    return result
+
+
+def write_profile(profile, result):
+    """Write a sampled run to TASK_PROFILE_DIR and drop the oldest runs."""
+    directory = Path(settings.TASK_PROFILE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    stem = (
+        f"{profile.started_at:%Y%m%dT%H%M%S%f}-{result['task']}-"
+        f"{result['task_id']}"
+    )
+
+    if profile.profiler:
+        profile.profiler.dump_stats(directory / f"{stem}.prof")
+    (directory / f"{stem}.json").write_text(json.dumps(result, indent=2))
+
+    # File names start with the start time, so they sort oldest first.
+    summaries = sorted(directory.glob("*.json"))
+    for old in summaries[: -settings.TASK_PROFILE_MAX_FILES]:
+        old.unlink(missing_ok=True)
+        old.with_suffix(".prof").unlink(missing_ok=True)
@@ -0,0 +1,181 @@
+"""
+Database routing for the Parcels project.
+
+Reads for the shipments app are sent to one of the configured replica
+aliases (``DATABASE_REPLICAS``). The primary is used instead when:
+
+- no replica is configured or every replica failed its health check,
+- the primary is inside a transaction (the replica cannot see its writes),
+- the current request or client wrote to the primary recently
+  (``DATABASE_REPLICA_STICKY_SECONDS``), so it reads its own writes.
+
+A replica that fails after connecting is caught per query: a query that
+raises ``OperationalError`` on a replica marks it down and runs again on
+the primary (see ``replica_fallback``).
+"""
+
+import logging
+import random
+import time
+from contextlib import suppress
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+REPLICA_ROUTED_APPS = {"shipments"}
+
+# Wall-clock timestamp until which reads must stay on the primary.
+_primary_pinned_until = ContextVar("primary_pinned_until", default=0.0)
+
+# Replica alias -> wall-clock timestamp until which it is considered down.
+_replica_down_until = {}
+
+
+def get_replicas():
+    return list(getattr(settings, "DATABASE_REPLICAS", []))
+
+
+def pin_to_primary(seconds=None):
+    """
+    Keep reads on the primary for the next ``seconds``.
+
+    :param seconds: Length of the window, defaults to
+        ``DATABASE_REPLICA_STICKY_SECONDS``.
+    """
+    if seconds is None:
+        seconds = settings.DATABASE_REPLICA_STICKY_SECONDS
+    until = time.time() + seconds
+    if until > _primary_pinned_until.get():
+        _primary_pinned_until.set(until)
+
+
+def primary_pinned_until():
+    return _primary_pinned_until.get()
+
+
+def set_primary_pinned_until(until):
+    """Restore the pin window, e.g. from a client cookie. Returns a token."""
+    return _primary_pinned_until.set(until)
+
+
+def reset_primary_pin(token):
+    _primary_pinned_until.reset(token)
+
+
+def is_pinned_to_primary():
+    return time.time() < _primary_pinned_until.get()
+
+
+def mark_replica_down(alias):
+    retry_after = settings.DATABASE_REPLICA_RETRY_SECONDS
+    _replica_down_until[alias] = time.time() + retry_after
+    logger.warning(
+        f"Database replica {alias} unavailable, using primary for "
+        f"{retry_after}s"
+    )
+
+
+def is_replica_healthy(alias):
+    """
+    Check a replica is reachable, remembering failures for a retry window
+    so an unhealthy replica costs one failed connect per window, not one
+    per query.
+    """
+    if time.time() < _replica_down_until.get(alias, 0.0):
+        return False
+
+    try:
+        connections[alias].ensure_connection()
+    except Exception as e:
+        logger.debug(f"Health check for replica {alias} failed: {e}")
+        mark_replica_down(alias)
+        return False
+
+    _replica_down_until.pop(alias, None)
+    return True
+
+
+def replica_fallback(execute, sql, params, many, context):
+    """
+    Execute wrapper on replica connections. A query failing with
+    ``OperationalError`` (the replica went down, or cancelled the query
+    during recovery) marks the replica down and runs on the primary; the
+    caller's cursor then reads the primary's results. Queries inside a
+    transaction on the replica are not retried.
+    """
+    try:
+        return execute(sql, params, many, context)
+    except OperationalError as e:
+        replica = context["connection"]
+        if replica.in_atomic_block:
+            raise
+        logger.debug(f"Query on replica {replica.alias} failed: {e}")
+        mark_replica_down(replica.alias)
+
+    primary = connections[DEFAULT_DB_ALIAS]
+    primary.ensure_connection()
+    cursor = primary.create_cursor()
+    with primary.wrap_database_errors:
+        if many:
+            result = cursor.executemany(sql, params)
+        elif params is None:
+            result = cursor.execute(sql)
+        else:
+            result = cursor.execute(sql, params)
+    # The replica's cursor is on a broken connection.
+    with suppress(Exception):
+        context["cursor"].cursor.close()
+    context["cursor"].cursor = cursor
+    return result
+
+
+@receiver(connection_created)
+def install_replica_fallback(sender, connection, **kwargs):
+    if (
+        connection.alias in get_replicas()
+        and replica_fallback not in connection.execute_wrappers
+    ):
+        connection.execute_wrappers.append(replica_fallback)
+
+
+class ReplicaRouter:
+    """Send shipments reads to a healthy replica, everything else to primary."""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label not in REPLICA_ROUTED_APPS:
+            return None
+
+        replicas = get_replicas()
+        if not replicas or is_pinned_to_primary():
+            return DEFAULT_DB_ALIAS
+
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+
+        random.shuffle(replicas)
+        for alias in replicas:
+            if is_replica_healthy(alias):
+                return alias
+
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label in REPLICA_ROUTED_APPS:
+            pin_to_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in get_replicas():
+            return False
+        return None
@@ -0,0 +1,102 @@
+"""
+OpenAPI schema served from memory.
+
+``SpectacularAPIView`` introspects every view and serializer on each request.
+``PrebuiltSchemaView`` renders the document once per process (or loads it
+from ``OPENAPI_SCHEMA_FILE``, e.g. the checked-in ``schema.yml``) and then
+serves the stored bytes with an ETag, answering 304 to revalidations and
+gzip to clients that accept it.
+"""
+
+import gzip
+import hashlib
+import re
+import threading
+
+import yaml
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+from drf_spectacular.utils import extend_schema
+from drf_spectacular.views import SCHEMA_KWARGS, SpectacularAPIView
+
+GZIP_RE = re.compile(r"\bgzip\b")
+
+_documents = None
+_documents_lock = threading.Lock()
+
+
+class SchemaDocument:
+    """One rendering of the schema, with its ETag and gzipped body."""
+
+    def __init__(self, content):
+        self.content = content
+        self.gzipped = gzip.compress(content, mtime=0)
+        self.etag = f'"{hashlib.sha256(content).hexdigest()[:32]}"'
+
+
+def build_schema():
+    """Returns: the schema as a dict, from OPENAPI_SCHEMA_FILE if set."""
+    if settings.OPENAPI_SCHEMA_FILE:
+        with open(settings.OPENAPI_SCHEMA_FILE, encoding="utf-8") as f:
+            return yaml.safe_load(f)
+
+    generator = SpectacularAPIView.generator_class(
+        urlconf=SpectacularAPIView.urlconf
+    )
+    return generator.get_schema(request=None, public=True)
+
+
+def get_documents():
+    """Returns: {format: SchemaDocument}, built on first use."""
+    global _documents
+    if _documents is None:
+        with _documents_lock:
+            if _documents is None:
+                schema = build_schema()
+                _documents = {
+                    renderer.format: SchemaDocument(renderer().render(schema))
+                    for renderer in (OpenApiYamlRenderer, OpenApiJsonRenderer)
+                }
+    return _documents
+
+
+def reset_documents():
+    global _documents
+    with _documents_lock:
+        _documents = None
+
+
+class PrebuiltSchemaView(SpectacularAPIView):
+    __doc__ = SpectacularAPIView.__doc__
+
+    @extend_schema(**SCHEMA_KWARGS)
+    def get(self, request, *args, **kwargs):
+        # Translated or versioned schemas are rare; generate those.
+        if request.GET.get("lang") or request.GET.get("version"):
+            return super().get(request, *args, **kwargs)
+
+        renderer, media_type = self.perform_content_negotiation(request)
+        document = get_documents()[renderer.format]
+        content_type = media_type
+        if renderer.charset:
+            content_type += f"; charset={renderer.charset}"
+
+        etags = parse_etags(request.headers.get("If-None-Match", ""))
+        if "*" in etags or document.etag in etags:
+            response = HttpResponseNotModified()
+        elif GZIP_RE.search(request.headers.get("Accept-Encoding", "")):
+            response = HttpResponse(document.gzipped, content_type=content_type)
+            response["Content-Encoding"] = "gzip"
+        else:
+            response = HttpResponse(document.content, content_type=content_type)
+
+        response["ETag"] = document.etag
+        response["Cache-Control"] = "no-cache"
+        response["Content-Disposition"] = (
+            f'inline; filename="{self._get_filename(request, None)}"'
+        )
+        patch_vary_headers(response, ("Accept", "Accept-Encoding"))
+        return response
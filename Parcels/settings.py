@@ -51,7 +51,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "Parcels.middleware.RequestMetricsMiddleware",
+    "Parcels.middleware.ServerTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "Parcels.middleware.PrimaryPinningMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -91,9 +94,53 @@ DATABASES = {
         "PASSWORD": os.getenv("POSTGRES_PASSWORD", "securepassword"),
         "HOST": os.getenv("DB_HOST", "db"),
         "PORT": os.getenv("DB_PORT", "5432"),
+        # Validate connections before handing them out (pool checkout or
+        # persistent connection reuse).
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
+# Connection pooling (psycopg 3). Each web or Celery process keeps its own
+# pool, so size it per process, not per deployment.
+if os.getenv("DB_POOL_ENABLED", "True").lower() == "true":
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+            "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+            # Seconds a checkout may wait for a free connection.
+            "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+            "max_lifetime": float(os.getenv("DB_POOL_MAX_LIFETIME", "1800")),
+            "max_idle": float(os.getenv("DB_POOL_MAX_IDLE", "300")),
+        }
+    }
+else:
+    DATABASES["default"]["CONN_MAX_AGE"] = int(
+        os.getenv("DB_CONN_MAX_AGE", "0")
+    )
+
+# Read replicas, e.g. DB_REPLICA_HOSTS="replica-1,replica-2". Pointing one at
+# the primary host (DB_REPLICA_HOSTS=localhost) exercises the routing locally
+# with two aliases on a single Postgres.
+for index, host in enumerate(
+    filter(None, os.getenv("DB_REPLICA_HOSTS", "").split(",")), start=1
+):
+    DATABASES[f"replica_{index}"] = {
+        **DATABASES["default"],
+        "HOST": host.strip(),
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["Parcels.routers.ReplicaRouter"]
+# Reads stay on the primary this long after a write by the same client.
+DATABASE_REPLICA_STICKY_SECONDS = int(
+    os.getenv("DB_REPLICA_STICKY_SECONDS", "5")
+)
+# An unreachable replica is skipped this long before being retried.
+DATABASE_REPLICA_RETRY_SECONDS = int(
+    os.getenv("DB_REPLICA_RETRY_SECONDS", "30")
+)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -137,6 +184,24 @@ SPECTACULAR_SETTINGS = {
     "VERSION": "1.0.0",
 }
 
+# Per-request DB/cache/HTTP accounting in a Server-Timing header, with a
+# warning logged for requests over the query count or latency budget.
+REQUEST_TIMING_ENABLED = (
+    os.getenv("REQUEST_TIMING_ENABLED", "False").lower() == "true"
+)
+REQUEST_QUERY_BUDGET = int(os.getenv("REQUEST_QUERY_BUDGET", "10"))
+REQUEST_LATENCY_BUDGET_MS = int(os.getenv("REQUEST_LATENCY_BUDGET_MS", "500"))
+
+# Multiprocess metrics (PROMETHEUS_MULTIPROC_DIR): seconds between exports
+# of each process's database pool and cache tier statistics.
+PROMETHEUS_PROCESS_STATS_INTERVAL = float(
+    os.getenv("PROMETHEUS_PROCESS_STATS_INTERVAL", "5")
+)
+
+# Serve the OpenAPI schema from this file (e.g. schema.yml written at build
+# time) instead of generating it on the first request.
+OPENAPI_SCHEMA_FILE = os.getenv("OPENAPI_SCHEMA_FILE", "")
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -175,8 +240,216 @@ print(f"Using Redis URL: {REDIS_FULL_URL}")
 CELERY_BROKER_URL = REDIS_FULL_URL
 CELERY_RESULT_BACKEND = REDIS_FULL_URL
 
+# Shared cache in Redis (database 1, apart from the Celery broker), fronted
+# by a short-lived in-process LRU. See Parcels/cache.py.
+REDIS_CACHE_URL = os.getenv(
+    "REDIS_CACHE_URL", REDIS_FULL_URL.rsplit("/", 1)[0] + "/1"
+)
+CACHES = {
+    "default": {
+        "BACKEND": "Parcels.cache.TieredCache",
+        "LOCATION": REDIS_CACHE_URL,
+        "OPTIONS": {
+            "L1_MAX_ENTRIES": int(os.getenv("CACHE_L1_MAX_ENTRIES", "10000")),
+            "L1_TIMEOUT": float(os.getenv("CACHE_L1_TIMEOUT", "5")),
+            "GENERATION_CHECK_INTERVAL": float(
+                os.getenv("CACHE_GENERATION_CHECK_INTERVAL", "1")
+            ),
+            # Forgotten shipment misses must be forgotten by every process.
+            "L1_SKIP_PREFIXES": ["shipment_miss_"],
+            # Fail fast when Redis is down: the cache then degrades to misses.
+            "socket_connect_timeout": float(
+                os.getenv("CACHE_REDIS_TIMEOUT", "1")
+            ),
+            "socket_timeout": float(os.getenv("CACHE_REDIS_TIMEOUT", "1")),
+        },
+    }
+}
+
 CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = "UTC"
 CELERY_BEAT_SCHEDULE = {}
+# Seconds before Redis redelivers an unacknowledged task. Ingest tasks are
+# acknowledged when they finish (acks_late), so this must exceed the longest
+# ingest run, or a second worker would start it again.
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    "visibility_timeout": int(os.getenv("CELERY_VISIBILITY_TIMEOUT", "43200"))
+}
+
+# Celery task profiling (Parcels/profiling.py): metrics for every run, peak
+# memory for a sample of runs, cProfile dumps for a smaller sample, written
+# to TASK_PROFILE_DIR which keeps the newest TASK_PROFILE_MAX_FILES runs.
+TASK_PROFILING_ENABLED = (
+    os.getenv("TASK_PROFILING_ENABLED", "True").lower() == "true"
+)
+TASK_PROFILE_MEMORY_SAMPLE_RATE = float(
+    os.getenv("TASK_PROFILE_MEMORY_SAMPLE_RATE", "0.1")
+)
+TASK_PROFILE_CPROFILE_SAMPLE_RATE = float(
+    os.getenv("TASK_PROFILE_CPROFILE_SAMPLE_RATE", "0")
+)
+TASK_PROFILE_DIR = os.getenv("TASK_PROFILE_DIR", str(BASE_DIR / "profiles"))
+TASK_PROFILE_MAX_FILES = int(os.getenv("TASK_PROFILE_MAX_FILES", "50"))
+
+# OpenWeatherMap client. The URLs can point at a local stand-in server.
+OPENWEATHERMAP_API_KEY = os.getenv("OPENWEATHERMAP_API_KEY")
+OPENWEATHERMAP_GEOCODE_URL = os.getenv(
+    "OPENWEATHERMAP_GEOCODE_URL",
+    "https://api.openweathermap.org/geo/1.0/direct",
+)
+OPENWEATHERMAP_WEATHER_URL = os.getenv(
+    "OPENWEATHERMAP_WEATHER_URL",
+    "https://api.openweathermap.org/data/2.5/weather",
+)
+WEATHER_HTTP_CONNECT_TIMEOUT = float(
+    os.getenv("WEATHER_HTTP_CONNECT_TIMEOUT", "2")
+)
+WEATHER_HTTP_READ_TIMEOUT = float(os.getenv("WEATHER_HTTP_READ_TIMEOUT", "5"))
+WEATHER_HTTP_RETRIES = int(os.getenv("WEATHER_HTTP_RETRIES", "2"))
+WEATHER_HTTP_BACKOFF_FACTOR = float(
+    os.getenv("WEATHER_HTTP_BACKOFF_FACTOR", "0.2")
+)
+WEATHER_HTTP_BACKOFF_JITTER = float(
+    os.getenv("WEATHER_HTTP_BACKOFF_JITTER", "0.1")
+)
+WEATHER_HTTP_POOL_SIZE = int(os.getenv("WEATHER_HTTP_POOL_SIZE", "10"))
+# Current weather providers, in order of preference (openweathermap,
+# open-meteo). With more than one, the next is also called when the previous
+# has not answered within its recent p95 latency; until enough calls have
+# been timed the default delay is used. The minimum delay bounds the extra
+# upstream load.
+WEATHER_PROVIDERS = [
+    name.strip()
+    for name in os.getenv("WEATHER_PROVIDERS", "openweathermap").split(",")
+    if name.strip()
+]
+OPEN_METEO_URL = os.getenv(
+    "OPEN_METEO_URL", "https://api.open-meteo.com/v1/forecast"
+)
+WEATHER_HEDGE_DEFAULT_DELAY = float(
+    os.getenv("WEATHER_HEDGE_DEFAULT_DELAY", "0.5")
+)
+WEATHER_HEDGE_MIN_DELAY = float(os.getenv("WEATHER_HEDGE_MIN_DELAY", "0.05"))
+WEATHER_HEDGE_MAX_WORKERS = int(os.getenv("WEATHER_HEDGE_MAX_WORKERS", "20"))
+# Seconds weather stays fresh in cache, then stays usable as a stale
+# fallback while one worker refreshes it.
+WEATHER_CACHE_TIMEOUT = int(os.getenv("WEATHER_CACHE_TIMEOUT", "7200"))
+WEATHER_STALE_TIMEOUT = int(os.getenv("WEATHER_STALE_TIMEOUT", "1800"))
+# Single-flight fetches: lock lifetime, and how long callers without a stale
+# value wait for the fetching worker.
+WEATHER_FETCH_LOCK_TIMEOUT = int(os.getenv("WEATHER_FETCH_LOCK_TIMEOUT", "30"))
+WEATHER_COALESCE_WAIT = float(os.getenv("WEATHER_COALESCE_WAIT", "2"))
+# Consecutive upstream failures that open the weather circuit, and seconds
+# before a half-open probe is let through.
+WEATHER_CIRCUIT_FAILURE_THRESHOLD = int(
+    os.getenv("WEATHER_CIRCUIT_FAILURE_THRESHOLD", "5")
+)
+WEATHER_CIRCUIT_RESET_TIMEOUT = int(
+    os.getenv("WEATHER_CIRCUIT_RESET_TIMEOUT", "30")
+)
+# Seconds a failed weather lookup for a city is remembered.
+WEATHER_NEGATIVE_CACHE_TIMEOUT = int(
+    os.getenv("WEATHER_NEGATIVE_CACHE_TIMEOUT", "60")
+)
+
+# Weather prewarming: seconds between runs, extra seconds of lookahead for
+# entries about to expire, the OpenWeatherMap plan's calls per minute and
+# the share of it prewarming may use.
+WEATHER_PREWARM_INTERVAL = int(os.getenv("WEATHER_PREWARM_INTERVAL", "600"))
+WEATHER_PREWARM_MARGIN = int(os.getenv("WEATHER_PREWARM_MARGIN", "300"))
+WEATHER_API_CALLS_PER_MINUTE = int(
+    os.getenv("WEATHER_API_CALLS_PER_MINUTE", "60")
+)
+WEATHER_PREWARM_RATE_SHARE = float(
+    os.getenv("WEATHER_PREWARM_RATE_SHARE", "0.5")
+)
+# Seconds of lookups per city counted to prioritize prewarming.
+WEATHER_LOOKUP_WINDOW = int(os.getenv("WEATHER_LOOKUP_WINDOW", "3600"))
+CELERY_BEAT_SCHEDULE["prewarm-weather"] = {
+    "task": "shipments.tasks.prewarm_weather_task",
+    "schedule": WEATHER_PREWARM_INTERVAL,
+}
+
+# Server-sent shipment events (shipments/events.py): the Redis used for
+# pub/sub, seconds between keep-alive comments, and seconds after which a
+# stream ends and the browser reconnects.
+SHIPMENT_EVENTS_REDIS_URL = os.getenv(
+    "SHIPMENT_EVENTS_REDIS_URL", REDIS_CACHE_URL
+)
+SHIPMENT_EVENTS_HEARTBEAT = float(os.getenv("SHIPMENT_EVENTS_HEARTBEAT", "15"))
+SHIPMENT_EVENTS_MAX_DURATION = float(
+    os.getenv("SHIPMENT_EVENTS_MAX_DURATION", "300")
+)
+
+# Shipment maintenance (shipments/maintenance.py): days before soft-deleted
+# rows are purged and delivered shipments are archived, rows per chunk
+# (one short transaction each), seconds to pause between chunks and to
+# spend per run, and milliseconds a chunk may wait for a lock.
+SOFT_DELETE_RETENTION_DAYS = int(os.getenv("SOFT_DELETE_RETENTION_DAYS", "30"))
+SHIPMENT_ARCHIVE_AFTER_DAYS = int(
+    os.getenv("SHIPMENT_ARCHIVE_AFTER_DAYS", "90")
+)
+SHIPMENT_MAINTENANCE_CHUNK_SIZE = int(
+    os.getenv("SHIPMENT_MAINTENANCE_CHUNK_SIZE", "500")
+)
+SHIPMENT_MAINTENANCE_CHUNK_PAUSE = float(
+    os.getenv("SHIPMENT_MAINTENANCE_CHUNK_PAUSE", "0.1")
+)
+SHIPMENT_MAINTENANCE_TIME_BUDGET = int(
+    os.getenv("SHIPMENT_MAINTENANCE_TIME_BUDGET", "900")
+)
+SHIPMENT_MAINTENANCE_LOCK_TIMEOUT_MS = int(
+    os.getenv("SHIPMENT_MAINTENANCE_LOCK_TIMEOUT_MS", "2000")
+)
+SHIPMENT_MAINTENANCE_INTERVAL = int(
+    os.getenv("SHIPMENT_MAINTENANCE_INTERVAL", "3600")
+)
+CELERY_BEAT_SCHEDULE["shipment-maintenance"] = {
+    "task": "shipments.tasks.maintenance_task",
+    "schedule": SHIPMENT_MAINTENANCE_INTERVAL,
+}
+
+# Shipment stats (shipments/rollup.py): days returned when no range is
+# given, the longest range accepted, and seconds between reconciliations
+# of the rollup with the shipments (a full scan of the shipment table).
+SHIPMENT_STATS_DEFAULT_DAYS = int(
+    os.getenv("SHIPMENT_STATS_DEFAULT_DAYS", "30")
+)
+SHIPMENT_STATS_MAX_DAYS = int(os.getenv("SHIPMENT_STATS_MAX_DAYS", "366"))
+SHIPMENT_ROLLUP_RECONCILE_INTERVAL = int(
+    os.getenv("SHIPMENT_ROLLUP_RECONCILE_INTERVAL", "86400")
+)
+CELERY_BEAT_SCHEDULE["shipment-rollup-reconcile"] = {
+    "task": "shipments.tasks.reconcile_rollup_task",
+    "schedule": SHIPMENT_ROLLUP_RECONCILE_INTERVAL,
+}
+
+# Shipment search (shipments/search.py): results per page by default, the
+# most a client may ask for, and the most matches ranked per source
+# (addresses, articles).
+SHIPMENT_SEARCH_PAGE_SIZE = int(os.getenv("SHIPMENT_SEARCH_PAGE_SIZE", "20"))
+SHIPMENT_SEARCH_MAX_PAGE_SIZE = int(
+    os.getenv("SHIPMENT_SEARCH_MAX_PAGE_SIZE", "100")
+)
+SHIPMENT_SEARCH_MAX_CANDIDATES = int(
+    os.getenv("SHIPMENT_SEARCH_MAX_CANDIDATES", "1000")
+)
+
+# Most scans accepted by one bulk status update request.
+SHIPMENT_STATUS_UPDATE_MAX_BATCH = int(
+    os.getenv("SHIPMENT_STATUS_UPDATE_MAX_BATCH", "5000")
+)
+# API tokens carriers post status updates with, e.g.
+# CARRIER_API_TOKENS="DHL:token-1,UPS:token-2". A carrier without a token
+# can't post any.
+CARRIER_API_TOKENS = dict(
+    entry.strip().split(":", 1)
+    for entry in filter(None, os.getenv("CARRIER_API_TOKENS", "").split(","))
+)
+
+# Seconds a "shipment not found" lookup result is cached.
+SHIPMENT_NEGATIVE_CACHE_TIMEOUT = int(
+    os.getenv("SHIPMENT_NEGATIVE_CACHE_TIMEOUT", "60")
+)
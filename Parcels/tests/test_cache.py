@@ -0,0 +1,188 @@
+import time
+from unittest.mock import patch
+
+import pytest
+from django.core.cache.backends.redis import RedisCache
+from django.urls import reverse
+
+from Parcels.cache import TieredCache
+from shipments.models import Shipment
+
+# Nothing listens there.
+UNREACHABLE = "redis://127.0.0.1:1/0"
+
+
+def make_cache(location, **options):
+    return TieredCache(
+        location,
+        {"KEY_PREFIX": "tiered_test", "OPTIONS": options},
+    )
+
+
+class TestTieredCache:
+
+    @pytest.fixture(autouse=True)
+    def caches(self, redis_location):
+        self.location = redis_location
+        self.cache = make_cache(redis_location, GENERATION_CHECK_INTERVAL=0)
+        self.other = make_cache(redis_location, GENERATION_CHECK_INTERVAL=0)
+        self.redis = RedisCache(redis_location, {"KEY_PREFIX": "tiered_test"})
+        self.cache.clear()
+        yield
+        self.cache.clear()
+
+    def test_read_through_fills_l1(self):
+        self.redis.set("key", {"temp": 20})
+
+        assert self.cache.get("key") == {"temp": 20}
+        assert self.cache.get("key") == {"temp": 20}
+        assert self.cache.stats() == {
+            "l1_hits": 1,
+            "l1_misses": 1,
+            "l2_hits": 1,
+            "l2_misses": 0,
+            "l2_errors": 0,
+        }
+
+    def test_misses_are_not_cached_in_l1(self):
+        assert self.cache.get("key", "default") == "default"
+
+        self.other.set("key", "value")
+
+        assert self.cache.get("key") == "value"
+
+    def test_l1_returns_copies(self):
+        self.cache.set("key", {"temp": 20})
+
+        self.cache.get("key")["temp"] = 30
+
+        assert self.cache.get("key") == {"temp": 20}
+
+    def test_l1_entries_expire(self):
+        cache = make_cache(self.location, L1_TIMEOUT=0.05)
+        cache.set("key", "old")
+        self.other.set("key", "new")
+
+        assert cache.get("key") == "old"
+        time.sleep(0.06)
+        assert cache.get("key") == "new"
+
+    def test_l1_is_bounded(self):
+        cache = make_cache(self.location, L1_MAX_ENTRIES=2)
+        cache.set_many({"a": 1, "b": 2, "c": 3})
+
+        assert len(cache._l1) == 2
+        assert cache.get_many(["a", "b", "c"]) == {"a": 1, "b": 2, "c": 3}
+
+    def test_get_many_combines_tiers(self):
+        self.cache.set("a", 1)
+        self.redis.set("b", 2)
+
+        assert self.cache.get_many(["a", "b", "c"]) == {"a": 1, "b": 2}
+        assert self.cache.stats() == {
+            "l1_hits": 1,
+            "l1_misses": 2,
+            "l2_hits": 1,
+            "l2_misses": 1,
+            "l2_errors": 0,
+        }
+
+    def test_generation_bump_invalidates_other_processes(self):
+        self.cache.set("key", "old")
+        self.cache.get("key")
+        self.redis.set("key", "new")
+
+        assert self.cache.get("key") == "old"
+        self.other.bump_generation()
+        assert self.cache.get("key") == "new"
+
+    def test_atomic_operations_go_to_redis(self):
+        self.cache.set("count", 1)
+        self.other.incr("count")
+
+        assert self.cache.incr("count") == 3
+        assert self.cache.get("count") == 3
+        assert self.cache.add("lock", "a")
+        assert not self.other.add("lock", "b")
+
+    def test_delete_removes_both_tiers(self):
+        self.cache.set("key", "value")
+        self.cache.delete("key")
+
+        assert self.cache.get("key") is None
+        assert self.redis.get("key") is None
+
+    def test_skipped_prefixes_stay_out_of_l1(self):
+        cache = make_cache(self.location, L1_SKIP_PREFIXES=["miss_"])
+        cache.set("miss_key", True)
+        cache.set("key", True)
+        cache.get("miss_key")
+
+        self.other.delete("miss_key")
+        self.other.delete("key")
+
+        assert cache.get("miss_key") is None
+        assert cache.get("key") is True
+
+
+class TestRedisUnavailable:
+
+    @pytest.fixture(autouse=True)
+    def cache(self):
+        self.cache = make_cache(UNREACHABLE)
+
+    def test_reads_are_misses(self):
+        assert self.cache.get("key", "default") == "default"
+        assert self.cache.get_many(["a", "b"]) == {}
+        assert not self.cache.has_key("key")
+        # And the generation check.
+        assert self.cache.stats()["l2_errors"] == 4
+
+    def test_writes_are_skipped(self):
+        self.cache.set("key", "value")
+
+        assert self.cache.get("key") is None
+        assert self.cache.set_many({"a": 1}) == ["a"]
+        assert not self.cache.add("lock", True)
+        assert not self.cache.delete("key")
+        self.cache.delete_many(["a"])
+        self.cache.clear()
+        with pytest.raises(ValueError):
+            self.cache.incr("count")
+
+    @pytest.mark.django_db
+    @patch("shipments.views.get_weather", return_value={"temp": 1})
+    def test_requests_still_succeed(self, _, client, settings):
+        Shipment.objects.create(
+            tracking_number="TN12345678",
+            carrier="DHL",
+            sender_address="Street 1, 10115 Berlin, Germany",
+            receiver_address="Street 10, 75001 Paris, France",
+            status="in-transit",
+        )
+        settings.CACHES = {
+            "default": {
+                "BACKEND": "Parcels.cache.TieredCache",
+                "LOCATION": UNREACHABLE,
+            }
+        }
+
+        response = client.get("/api/v1/shipments/TN12345678/DHL/")
+
+        assert response.status_code == 200
+
+
+@pytest.mark.django_db
+class TestCacheMetrics:
+
+    def test_tier_counters_are_exposed(self, client, tiered_cache):
+        cache = tiered_cache
+        cache.set("metrics_key", 1)
+        cache.get("metrics_key")
+
+        body = client.get(reverse("metrics")).content.decode()
+
+        assert (
+            'parcels_cache_lookups_total{cache="default",result="hit",'
+            'tier="l1"}' in body
+        )
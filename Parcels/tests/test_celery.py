@@ -0,0 +1,90 @@
+import uuid
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from kombu import Exchange, Queue
+
+from Parcels.celery import (
+    DEFAULT_QUEUE,
+    INGEST_QUEUE,
+    PRIORITY_QUEUE,
+    app,
+    queue_lengths,
+)
+from Parcels.metrics import CeleryQueueCollector
+from shipments.tasks import load_seed_data_task
+
+
+def routed_queue(task_name):
+    return app.amqp.router.route({}, task_name)["queue"].name
+
+
+class TestQueueRouting:
+
+    def test_tasks_are_routed_by_kind(self):
+        assert routed_queue("shipments.tasks.load_seed_data_task") == (
+            INGEST_QUEUE
+        )
+        assert routed_queue("shipments.tasks.prewarm_weather_task") == (
+            PRIORITY_QUEUE
+        )
+        assert routed_queue("shipments.tasks.maintenance_task") == (
+            PRIORITY_QUEUE
+        )
+        assert routed_queue("shipments.tasks.reconcile_rollup_task") == (
+            PRIORITY_QUEUE
+        )
+        assert routed_queue("some.other.task") == DEFAULT_QUEUE
+
+    def test_ingest_is_acknowledged_after_the_run(self):
+        assert load_seed_data_task.acks_late
+
+
+class TestQueueBacklog:
+
+    def setup_method(self):
+        self.queue = f"test-backlog-{uuid.uuid4().hex}"
+
+    def teardown_method(self):
+        with app.connection_for_write() as conn:
+            Queue(self.queue, Exchange(self.queue), self.queue)(
+                conn.default_channel
+            ).delete()
+
+    def test_counts_waiting_messages(self):
+        queue = Queue(self.queue, Exchange(self.queue), self.queue)
+        with app.producer_or_acquire() as producer:
+            for _ in range(3):
+                producer.publish(
+                    {"n": 1},
+                    exchange=queue.exchange,
+                    routing_key=self.queue,
+                    declare=[queue],
+                )
+
+        assert queue_lengths([self.queue]) == {self.queue: 3}
+
+    def test_command_prints_each_queue(self):
+        out = StringIO()
+
+        call_command("celery_backlog", self.queue, stdout=out)
+
+        assert out.getvalue().split() == [self.queue, "0"]
+
+    @patch("Parcels.celery.queue_lengths")
+    def test_collector_exports_lengths(self, mock_queue_lengths):
+        mock_queue_lengths.return_value = {INGEST_QUEUE: 7, PRIORITY_QUEUE: 0}
+
+        (family,) = CeleryQueueCollector().collect()
+
+        assert {s.labels["queue"]: s.value for s in family.samples} == {
+            INGEST_QUEUE: 7,
+            PRIORITY_QUEUE: 0,
+        }
+
+    @patch("Parcels.celery.queue_lengths", side_effect=OSError("down"))
+    def test_collector_survives_broker_errors(self, mock_queue_lengths):
+        (family,) = CeleryQueueCollector().collect()
+
+        assert family.samples == []
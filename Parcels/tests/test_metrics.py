@@ -0,0 +1,166 @@
+from unittest.mock import patch
+
+import pytest
+import requests
+from django.urls import reverse
+from prometheus_client import REGISTRY, Counter, generate_latest
+
+from Parcels.metrics import (
+    CacheTierCollector,
+    DatabasePoolCollector,
+    ProcessStatsExporter,
+    metrics_registry,
+    pool_stats,
+)
+
+
+@pytest.mark.django_db
+class TestMetricsEndpoint:
+    def test_pool_metrics_are_exposed(self, client, settings):
+        if not settings.DATABASES["default"].get("OPTIONS", {}).get("pool"):
+            pytest.skip("Connection pooling is disabled")
+
+        response = client.get(reverse("metrics"))
+        body = response.content.decode()
+
+        assert response.status_code == 200
+        assert 'parcels_db_pool_size{alias="default"}' in body
+        assert "parcels_db_pool_checkout_wait_seconds_total" in body
+        assert "parcels_db_pool_checkout_errors_total" in body
+        assert pool_stats()["default"]["requests_num"] >= 1
+
+    @patch("Parcels.metrics.pool_stats")
+    def test_describing_collectors_does_not_connect(self, mock_pool_stats):
+        # The registry describes collectors on import; opening the pool
+        # then would bind it to the settings of that moment.
+        names = {
+            family.name
+            for collector in (DatabasePoolCollector(), CacheTierCollector())
+            for family in collector.describe()
+        }
+
+        assert "parcels_db_pool_size" in names
+        assert "parcels_cache_lookups" in names
+        mock_pool_stats.assert_not_called()
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.mark.django_db
+class TestHotPathMetrics:
+
+    def setup_method(self):
+        from django.core.cache import cache
+
+        cache.clear()
+
+    def test_request_latency_is_labelled_by_route(self, client):
+        route = "api/v1/shipments/<str:tracking_number>/<str:carrier>/"
+        labels = {"method": "GET", "route": route, "status": "404"}
+        before = sample("parcels_http_request_duration_seconds_count", **labels)
+
+        client.get("/api/v1/shipments/TN99999999/DHL/")
+        client.get("/api/v1/shipments/TN99999998/DHL/")
+
+        after = sample("parcels_http_request_duration_seconds_count", **labels)
+        assert after - before == 2
+
+    def test_unmatched_paths_share_one_label(self, client):
+        labels = {"method": "GET", "route": "unmatched", "status": "404"}
+        before = sample("parcels_http_request_duration_seconds_count", **labels)
+
+        client.get("/no/such/page/1/")
+        client.get("/no/such/page/2/")
+
+        after = sample("parcels_http_request_duration_seconds_count", **labels)
+        assert after - before == 2
+
+    def test_weather_cache_and_upstream_metrics(self):
+        from weather.providers import current_weather, reset_providers
+        from weather.services import get_weather
+        from weather.testing import FakeWeatherProvider
+
+        reset_providers()
+        failing = FakeWeatherProvider("failing", error=requests.Timeout())
+        before = {
+            result: sample("parcels_weather_cache_lookups_total", result=result)
+            for result in ("hit", "miss")
+        }
+
+        with patch("weather.services.get_coordinates", return_value=(1, 2)):
+            with patch(
+                "weather.services.current_weather",
+                return_value={"temp": 1.0, "description": "clear sky"},
+            ):
+                get_weather("Metricsville")
+                get_weather("Metricsville")
+        with pytest.raises(requests.Timeout):
+            current_weather(1, 2, [failing])
+
+        assert (
+            sample("parcels_weather_cache_lookups_total", result="miss")
+            == before["miss"] + 1
+        )
+        assert (
+            sample("parcels_weather_cache_lookups_total", result="hit")
+            == before["hit"] + 1
+        )
+        assert sample(
+            "parcels_weather_upstream_errors_total",
+            provider="failing",
+            reason="timeout",
+        )
+        assert sample(
+            "parcels_weather_upstream_duration_seconds_count",
+            provider="failing",
+        )
+
+
+class TestMultiprocessRegistry:
+
+    def test_aggregates_worker_files(self, tmp_path, monkeypatch):
+        from prometheus_client import values
+
+        monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+        values.ValueClass = values.get_value_class()
+        try:
+            counter = Counter(
+                "parcels_test_events", "Test events.", registry=None
+            )
+            counter.inc(3)
+            body = generate_latest(metrics_registry()).decode()
+        finally:
+            monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR")
+            values.ValueClass = values.get_value_class()
+
+        assert "parcels_test_events_total 3.0" in body
+
+    @pytest.mark.django_db
+    def test_exports_pool_and_cache_stats(
+        self, tmp_path, monkeypatch, settings, tiered_cache
+    ):
+        from prometheus_client import values
+
+        pooled = settings.DATABASES["default"].get("OPTIONS", {}).get("pool")
+        monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+        values.ValueClass = values.get_value_class()
+        try:
+            exporter = ProcessStatsExporter()
+            tiered_cache.get("missing")
+            exporter.export()
+            tiered_cache.get("missing")
+            exporter.export()
+            body = generate_latest(metrics_registry()).decode()
+        finally:
+            monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR")
+            values.ValueClass = values.get_value_class()
+
+        assert (
+            'parcels_cache_lookups_total{cache="default",result="miss",'
+            'tier="l2"} 2.0' in body
+        )
+        if pooled:
+            assert 'parcels_db_pool_size{alias="default"}' in body
+            assert "parcels_db_pool_checkouts_total" in body
@@ -0,0 +1,73 @@
+import json
+import pstats
+
+import pytest
+from prometheus_client import REGISTRY
+
+from shipments.tasks import prewarm_weather_task
+
+TASK = "shipments.tasks.prewarm_weather_task"
+
+
+def sample(name):
+    return REGISTRY.get_sample_value(name, {"task": TASK}) or 0
+
+
+@pytest.mark.django_db
+class TestTaskProfiling:
+
+    @pytest.fixture(autouse=True)
+    def profile_settings(self, settings, tmp_path):
+        settings.TASK_PROFILING_ENABLED = True
+        settings.TASK_PROFILE_MEMORY_SAMPLE_RATE = 0
+        settings.TASK_PROFILE_CPROFILE_SAMPLE_RATE = 0
+        settings.TASK_PROFILE_DIR = str(tmp_path)
+        settings.TASK_PROFILE_MAX_FILES = 2
+        self.directory = tmp_path
+
+    def test_every_run_is_measured(self):
+        runs = sample("parcels_task_duration_seconds_count")
+        queries = sample("parcels_task_db_queries_sum")
+
+        prewarm_weather_task.apply()
+
+        assert sample("parcels_task_duration_seconds_count") == runs + 1
+        assert sample("parcels_task_cpu_seconds_count") >= 1
+        # The distinct receiver cities query.
+        assert sample("parcels_task_db_queries_sum") == queries + 1
+        assert list(self.directory.iterdir()) == []
+
+    def test_sampled_runs_are_written_to_profile_dir(self, settings):
+        settings.TASK_PROFILE_MEMORY_SAMPLE_RATE = 1
+        settings.TASK_PROFILE_CPROFILE_SAMPLE_RATE = 1
+
+        prewarm_weather_task.apply()
+
+        (summary,) = self.directory.glob("*.json")
+        result = json.loads(summary.read_text())
+        assert result["task"] == TASK
+        assert result["state"] == "SUCCESS"
+        assert result["db_queries"] == 1
+        assert result["peak_memory_bytes"] > 0
+        stats = pstats.Stats(str(summary.with_suffix(".prof")))
+        assert stats.total_calls > 0
+
+    def test_profile_dir_keeps_newest_runs(self, settings):
+        settings.TASK_PROFILE_CPROFILE_SAMPLE_RATE = 1
+
+        task_ids = [prewarm_weather_task.apply().id for _ in range(3)]
+
+        kept = sorted(path.name for path in self.directory.iterdir())
+        assert len(kept) == 4
+        assert not any(task_ids[0] in name for name in kept)
+        assert all(
+            any(task_id in name for name in kept) for task_id in task_ids[1:]
+        )
+
+    def test_disabled(self, settings):
+        settings.TASK_PROFILING_ENABLED = False
+        runs = sample("parcels_task_duration_seconds_count")
+
+        prewarm_weather_task.apply()
+
+        assert sample("parcels_task_duration_seconds_count") == runs
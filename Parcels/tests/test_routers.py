@@ -0,0 +1,147 @@
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.db import OperationalError
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from Parcels import routers
+from Parcels.middleware import PRIMARY_PIN_COOKIE, PrimaryPinningMiddleware
+from shipments.models import Shipment
+
+
+@pytest.fixture(autouse=True)
+def clean_router_state(settings):
+    settings.DATABASE_REPLICAS = ["replica_1", "replica_2"]
+    token = routers.set_primary_pinned_until(0.0)
+    routers._replica_down_until.clear()
+    yield
+    routers.reset_primary_pin(token)
+    routers._replica_down_until.clear()
+
+
+class TestReplicaRouter:
+    def setup_method(self):
+        self.router = routers.ReplicaRouter()
+
+    @patch("Parcels.routers.is_replica_healthy", return_value=True)
+    def test_shipment_reads_go_to_replica(self, _):
+        assert self.router.db_for_read(Shipment) in ("replica_1", "replica_2")
+
+    def test_no_replicas_configured(self, settings):
+        settings.DATABASE_REPLICAS = []
+        assert self.router.db_for_read(Shipment) == "default"
+
+    def test_other_apps_are_not_routed(self):
+        from django.contrib.auth.models import User
+
+        assert self.router.db_for_read(User) is None
+
+    @patch("Parcels.routers.is_replica_healthy", return_value=True)
+    def test_reads_stick_to_primary_after_write(self, _):
+        assert self.router.db_for_write(Shipment) == "default"
+        assert self.router.db_for_read(Shipment) == "default"
+
+    @patch("Parcels.routers.is_replica_healthy", return_value=True)
+    def test_pin_expires(self, _):
+        routers.pin_to_primary(seconds=-1)
+        assert self.router.db_for_read(Shipment) != "default"
+
+    def test_fallback_to_primary_when_replicas_unreachable(self):
+        # Neither alias is defined in DATABASES, so connecting fails.
+        assert self.router.db_for_read(Shipment) == "default"
+        assert set(routers._replica_down_until) == {"replica_1", "replica_2"}
+
+    def test_down_replica_is_skipped_until_retry(self):
+        routers._replica_down_until["replica_1"] = time.time() + 60
+        with patch("Parcels.routers.connections") as connections:
+            assert routers.is_replica_healthy("replica_1") is False
+            connections.__getitem__.assert_not_called()
+
+            assert routers.is_replica_healthy("replica_2") is True
+            connections.__getitem__.assert_called_once_with("replica_2")
+
+    def test_replicas_are_not_migrated(self):
+        assert self.router.allow_migrate("replica_1", "shipments") is False
+        assert self.router.allow_migrate("default", "shipments") is None
+
+
+@pytest.mark.django_db
+class TestReplicaFallback:
+    def context(self, in_atomic_block=False):
+        replica = MagicMock(alias="replica_1", in_atomic_block=in_atomic_block)
+        return {"connection": replica, "cursor": SimpleNamespace(cursor=None)}
+
+    @staticmethod
+    def failing_execute(sql, params, many, context):
+        raise OperationalError("server closed the connection unexpectedly")
+
+    def test_failed_query_runs_on_primary(self):
+        context = self.context()
+
+        routers.replica_fallback(
+            self.failing_execute, "SELECT %s", [42], False, context
+        )
+
+        assert context["cursor"].cursor.fetchone() == (42,)
+        assert set(routers._replica_down_until) == {"replica_1"}
+        assert routers.ReplicaRouter().db_for_read(Shipment) == "default"
+
+    def test_query_in_replica_transaction_is_not_retried(self):
+        with pytest.raises(OperationalError):
+            routers.replica_fallback(
+                self.failing_execute,
+                "SELECT 1",
+                None,
+                False,
+                self.context(in_atomic_block=True),
+            )
+
+        assert not routers._replica_down_until
+
+    def test_installed_on_replica_connections_only(self):
+        replica = SimpleNamespace(alias="replica_1", execute_wrappers=[])
+        primary = SimpleNamespace(alias="default", execute_wrappers=[])
+
+        for connection in (replica, replica, primary):
+            routers.install_replica_fallback(None, connection)
+
+        assert replica.execute_wrappers == [routers.replica_fallback]
+        assert primary.execute_wrappers == []
+
+
+class TestPrimaryPinningMiddleware:
+    def setup_method(self):
+        self.factory = RequestFactory()
+
+    def test_write_sets_pin_cookie(self):
+        def view(request):
+            routers.pin_to_primary()
+            return HttpResponse()
+
+        response = PrimaryPinningMiddleware(view)(self.factory.get("/"))
+
+        assert float(response.cookies[PRIMARY_PIN_COOKIE].value) > time.time()
+        assert not routers.is_pinned_to_primary()
+
+    def test_read_only_request_sets_no_cookie(self):
+        response = PrimaryPinningMiddleware(lambda request: HttpResponse())(
+            self.factory.get("/")
+        )
+
+        assert PRIMARY_PIN_COOKIE not in response.cookies
+
+    def test_cookie_pins_following_request(self):
+        seen = {}
+
+        def view(request):
+            seen["pinned"] = routers.is_pinned_to_primary()
+            return HttpResponse()
+
+        request = self.factory.get("/")
+        request.COOKIES[PRIMARY_PIN_COOKIE] = str(time.time() + 5)
+        PrimaryPinningMiddleware(view)(request)
+
+        assert seen["pinned"] is True
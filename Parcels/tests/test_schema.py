@@ -0,0 +1,83 @@
+import gzip
+from pathlib import Path
+
+import pytest
+import yaml
+from django.conf import settings
+from django.urls import reverse
+from drf_spectacular.renderers import OpenApiYamlRenderer
+
+from Parcels.schema import build_schema, reset_documents
+
+SCHEMA_FILE = Path(settings.BASE_DIR) / "schema.yml"
+
+
+class TestSchemaDrift:
+
+    def test_committed_schema_matches_code(self, settings):
+        """Regenerate with: python manage.py spectacular --file schema.yml"""
+        settings.OPENAPI_SCHEMA_FILE = ""
+        generated = OpenApiYamlRenderer().render(build_schema()).decode()
+
+        assert generated == SCHEMA_FILE.read_text(encoding="utf-8")
+
+
+@pytest.mark.django_db
+class TestPrebuiltSchemaView:
+
+    def setup_method(self):
+        reset_documents()
+
+    def teardown_method(self):
+        reset_documents()
+
+    def test_schema_is_built_once(self, client):
+        with pytest.MonkeyPatch.context() as mp:
+            calls = []
+
+            def counting_build():
+                calls.append(1)
+                return build_schema()
+
+            mp.setattr("Parcels.schema.build_schema", counting_build)
+            client.get(reverse("schema"))
+            client.get(reverse("schema"))
+
+        assert len(calls) == 1
+
+    def test_etag_revalidation(self, client):
+        response = client.get(reverse("schema"))
+        etag = response["ETag"]
+
+        revalidated = client.get(reverse("schema"), HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 200
+        assert revalidated.status_code == 304
+        assert revalidated["ETag"] == etag
+
+    def test_gzip(self, client):
+        plain = client.get(reverse("schema"))
+        compressed = client.get(
+            reverse("schema"), HTTP_ACCEPT_ENCODING="gzip, deflate"
+        )
+
+        assert compressed["Content-Encoding"] == "gzip"
+        assert gzip.decompress(compressed.content) == plain.content
+        assert "Accept-Encoding" in compressed["Vary"]
+
+    def test_json_format(self, client):
+        response = client.get(reverse("schema"), {"format": "json"})
+
+        assert response["Content-Type"].startswith(
+            "application/vnd.oai.openapi+json"
+        )
+        assert response.json()["info"]["title"] == "Parcel Track & Trace API"
+
+    def test_loads_from_schema_file(self, client, settings):
+        settings.OPENAPI_SCHEMA_FILE = str(SCHEMA_FILE)
+
+        response = client.get(reverse("schema"))
+
+        assert yaml.safe_load(response.content) == yaml.safe_load(
+            SCHEMA_FILE.read_text(encoding="utf-8")
+        )
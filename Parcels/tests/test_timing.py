@@ -0,0 +1,118 @@
+import logging
+from unittest.mock import patch
+
+import pytest
+from django.core.exceptions import MiddlewareNotUsed
+
+from Parcels import timing
+from Parcels.middleware import ServerTimingMiddleware
+from shipments.models import Article, Shipment
+
+
+def server_timing(response):
+    """Returns: {name: {"dur": ms, "desc": text}} from the header."""
+    metrics = {}
+    for metric in response["Server-Timing"].split(", "):
+        name, *params = metric.split(";")
+        metrics[name] = dict(param.split("=", 1) for param in params)
+    return metrics
+
+
+class TestTimedDecorator:
+
+    def test_records_only_while_timing(self):
+        calls = []
+        func = timing.timed("http")(lambda: calls.append(1))
+
+        func()
+        timings, token = timing.start()
+        try:
+            func()
+            func()
+        finally:
+            timing.stop(token)
+
+        assert len(calls) == 3
+        assert timings.counts["http"] == 2
+
+
+@pytest.mark.django_db
+class TestServerTimingMiddleware:
+
+    @pytest.fixture(autouse=True)
+    def enabled(self, settings, tiered_cache):
+        settings.REQUEST_TIMING_ENABLED = True
+        settings.REQUEST_QUERY_BUDGET = 10
+        settings.REQUEST_LATENCY_BUDGET_MS = 10000
+
+    @pytest.fixture
+    def shipment(self):
+        shipment = Shipment.objects.create(
+            tracking_number="TN12345678",
+            carrier="DHL",
+            sender_address="Street 1, 10115 Berlin, Germany",
+            receiver_address="Street 10, 75001 Paris, France",
+            status="in-transit",
+        )
+        for sku in ("LP123", "MO456", "KB789"):
+            Article.objects.create(
+                shipment=shipment,
+                name=sku,
+                quantity=1,
+                price="10.00",
+                sku=sku,
+            )
+        return shipment
+
+    def test_disabled_middleware_is_removed(self, settings):
+        settings.REQUEST_TIMING_ENABLED = False
+
+        with pytest.raises(MiddlewareNotUsed):
+            ServerTimingMiddleware(lambda request: None)
+
+    @patch("shipments.views.get_weather", return_value={"temp": 1})
+    def test_header_reports_queries_and_cache_calls(self, _, client, shipment):
+        response = client.get("/api/v1/shipments/TN12345678/DHL/")
+        metrics = server_timing(response)
+
+        assert set(metrics) == {"db", "cache", "http", "total"}
+        # Shipment plus one prefetch for all its articles.
+        assert metrics["db"]["desc"] == '"2 calls"'
+        assert int(metrics["cache"]["desc"].strip('"').split()[0]) >= 1
+
+    @patch("shipments.views.get_weather", return_value={"temp": 1})
+    def test_detail_view_queries_do_not_grow_with_articles(
+        self, _, client, shipment
+    ):
+        before = server_timing(client.get("/api/v1/shipments/TN12345678/DHL/"))[
+            "db"
+        ]["desc"]
+        for sku in ("A1", "A2", "A3", "A4"):
+            Article.objects.create(
+                shipment=shipment, name=sku, quantity=1, price="1", sku=sku
+            )
+
+        after = server_timing(client.get("/api/v1/shipments/TN12345678/DHL/"))[
+            "db"
+        ]["desc"]
+
+        assert before == after
+
+    @patch("shipments.views.get_weather", return_value={"temp": 1})
+    def test_logs_requests_over_query_budget(
+        self, _, client, shipment, settings, caplog
+    ):
+        settings.REQUEST_QUERY_BUDGET = 1
+
+        with caplog.at_level(logging.WARNING, logger="Parcels.middleware"):
+            client.get("/api/v1/shipments/TN12345678/DHL/")
+
+        assert "Request over budget" in caplog.text
+        assert "with 2 queries" in caplog.text
+
+    @patch("shipments.views.get_weather", return_value={"temp": 1})
+    def test_within_budget_is_not_logged(self, _, client, shipment, caplog):
+        with caplog.at_level(logging.WARNING, logger="Parcels.middleware"):
+            client.get("/api/v1/shipments/TN12345678/DHL/")
+
+        assert "Request over budget" not in caplog.text
@@ -0,0 +1,75 @@
+"""
+Per-request accounting of time spent in the database, cache and outbound
+HTTP calls, reported by ``Parcels.middleware.ServerTimingMiddleware``.
+
+Instrumented code calls ``record()`` or uses ``timed()``; both return after
+a single context variable lookup when no request is being timed.
+"""
+
+import functools
+import threading
+import time
+from contextvars import ContextVar
+
+_current = ContextVar("request_timings", default=None)
+
+KINDS = ("db", "cache", "http")
+
+
+class RequestTimings:
+    """Call counts and cumulative seconds per kind for one request."""
+
+    def __init__(self):
+        self.counts = dict.fromkeys(KINDS, 0)
+        self.seconds = dict.fromkeys(KINDS, 0.0)
+        self._lock = threading.Lock()
+
+    def add(self, kind, seconds):
+        with self._lock:
+            self.counts[kind] += 1
+            self.seconds[kind] += seconds
+
+
+def start():
+    """Begin timing the current request. Returns: (timings, reset token)."""
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def stop(token):
+    _current.reset(token)
+
+
+def record(kind, seconds):
+    timings = _current.get()
+    if timings is not None:
+        timings.add(kind, seconds)
+
+
+def timed(kind):
+    """Decorator recording each call's duration under ``kind``."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            timings = _current.get()
+            if timings is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timings.add(kind, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+def query_timer(execute, sql, params, many, context):
+    """``connection.execute_wrapper`` hook counting queries."""
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        record("db", time.perf_counter() - start)
@@ -0,0 +1,11 @@
+from django.http import HttpResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+from .metrics import metrics_registry
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint."""
+    return HttpResponse(
+        generate_latest(metrics_registry()), content_type=CONTENT_TYPE_LATEST
+    )
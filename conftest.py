@@ -0,0 +1,48 @@
+import os
+
+import pytest
+from django.conf import settings as django_settings
+from django.core.cache import caches
+
+DEPLOYED_CACHE = django_settings.CACHES["default"]
+# Tests of TieredCache itself use their own Redis database.
+TEST_REDIS_CACHE_URL = os.getenv(
+    "TEST_REDIS_CACHE_URL",
+    django_settings.REDIS_FULL_URL.rsplit("/", 1)[0] + "/15",
+)
+
+
+@pytest.fixture(autouse=True)
+def local_cache(settings):
+    """An in-process default cache: tests never touch a running stack's."""
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    }
+    yield
+    caches["default"].clear()
+
+
+@pytest.fixture(autouse=True)
+def no_task_profiling(settings, tmp_path):
+    """
+    Task runs are neither profiled at random nor written to the
+    repository's profiles/. test_profiling.py turns profiling back on.
+    """
+    settings.TASK_PROFILING_ENABLED = False
+    settings.TASK_PROFILE_DIR = str(tmp_path)
+
+
+@pytest.fixture
+def redis_location():
+    return TEST_REDIS_CACHE_URL
+
+
+@pytest.fixture
+def tiered_cache(settings, redis_location):
+    """The default cache as deployed, in the test Redis database."""
+    settings.CACHES = {
+        "default": {**DEPLOYED_CACHE, "LOCATION": redis_location}
+    }
+    caches["default"].clear()
+    yield caches["default"]
+    caches["default"].clear()
@@ -0,0 +1,44 @@
+"""
+Gunicorn settings for the web service:
+
+    gunicorn -c gunicorn.conf.py Parcels.wsgi
+
+and for the shipment events service, whose streams are held by an event
+loop rather than a thread each:
+
+    GUNICORN_BIND=0.0.0.0:9001 \
+    GUNICORN_WORKER_CLASS=uvicorn_worker.UvicornWorker \
+        gunicorn -c gunicorn.conf.py Parcels.asgi
+
+Route only /api/v1/shipments/<tracking_number>/<carrier>/events/ to the
+latter: under ASGI, Django runs sync views and middleware on a single
+thread per process, so the rest of the API would serve one request at a
+time.
+
+Worker metrics are aggregated through PROMETHEUS_MULTIPROC_DIR, which must
+be set in the environment before gunicorn starts.
+"""
+
+import os
+import shutil
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:9000")
+workers = int(os.getenv("GUNICORN_WORKERS", "4"))
+threads = int(os.getenv("GUNICORN_THREADS", "1"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "sync")
+
+
+def on_starting(server):
+    # Metric files left by a previous run would be added to this one's.
+    multiproc_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if multiproc_dir:
+        shutil.rmtree(multiproc_dir, ignore_errors=True)
+        os.makedirs(multiproc_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
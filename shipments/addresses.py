@@ -0,0 +1,66 @@
+"""Parsing of free-form shipment addresses."""
+
+
+def parse_address(address):
+    """
+    Extract (city, country) from a comma-separated address.
+
+    Expects the "street, [postcode] city, country" layout of our carrier
+    feeds. Tokens containing digits (postcodes such as "75001" or "D-10115")
+    are dropped from the city. When the last part is "<postcode> <city>" it
+    is taken as the city and the country is left empty. Before a US-style
+    "<state> <zip>" part, the city is the part preceding it.
+
+    :param address: Address like "Street 10, 75001 Paris, France" or
+        "1 Main St, New York, NY 10001".
+
+    Returns: (city, country), empty strings when they cannot be found.
+    """
+    parts = [part.strip() for part in (address or "").split(",")]
+    parts = [part for part in parts if part]
+
+    if len(parts) < 2:
+        return "", ""
+
+    if _is_postcode_city(parts[-1]):
+        city_part, country = parts[-1], ""
+    elif _has_digit(parts[-1]):
+        # "NY 10001": the city is the part before it.
+        city_part, country = parts[-2], ""
+    else:
+        city_part, country = parts[-2], parts[-1]
+        if _is_state_zip(city_part) and len(parts) >= 3:
+            city_part = parts[-3]
+
+    city = " ".join(word for word in city_part.split() if not _has_digit(word))
+    return city, country
+
+
+def normalize_place(name):
+    """Canonical form of a city or country name, used for storage and keys."""
+    return " ".join(name.split()).lower()
+
+
+def _has_digit(value):
+    return any(char.isdigit() for char in value)
+
+
+def _is_postcode_city(part):
+    """E.g. "75001 Paris" or "D-10115 Berlin"; not "NY 10001" or "10001 NY"."""
+    words = part.split()
+    return len(words) >= 2 and _has_digit(words[0]) and not _is_state(words[1])
+
+
+def _is_state_zip(part):
+    """E.g. "NY 10001" or "CA 94105-1234"."""
+    words = part.split()
+    return (
+        len(words) >= 2
+        and _is_state(words[0])
+        and all(_has_digit(word) for word in words[1:])
+    )
+
+
+def _is_state(word):
+    # US / Canadian style state or province codes, e.g. "NY", "CA", "ON".
+    return len(word) == 2 and word.isalpha() and word.isupper()
@@ -0,0 +1,207 @@
+"""
+Article aggregates denormalized on Shipment: ``article_count`` and
+``total_value`` (sum of quantity x price) over the shipment's live articles.
+
+Article saves and deletes (see ``shipments.signals``) apply their change as
+a delta, ``count = count + d``, in the article's transaction. Deltas commute,
+so concurrent writers to the same shipment never lose each other's update,
+which recomputing from the articles under READ COMMITTED would. Inside
+``batched_aggregates()`` the deltas of a whole ingest batch are summed and
+applied with one UPDATE when the block exits.
+
+Changes of ``total_value`` are passed on to the daily rollup
+(``shipments.rollup``). Writes bypassing the model (``bulk_create``,
+``QuerySet.update``, raw SQL) must call ``refresh_aggregates``; the
+``repair_article_aggregates`` command recomputes every shipment.
+"""
+
+import threading
+from contextlib import contextmanager
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import connections, router, transaction
+
+from .models import Article, Shipment
+from .rollup import add_rollup, merge, rollup_key
+
+SHIPMENTS = Shipment._meta.db_table
+ARTICLES = Article._meta.db_table
+
+CENTS = Decimal("0.01")
+
+_local = threading.local()
+
+
+def article_value(quantity, price):
+    """Returns: quantity x price, as the database stores the price."""
+    price = Article._meta.get_field("price").to_python(price)
+    # numeric rounds half away from zero.
+    return int(quantity) * price.quantize(CENTS, ROUND_HALF_UP)
+
+
+def contribution(values):
+    """
+    Returns: (shipment_id, value) an article adds to its shipment's
+    aggregates, or None for a soft-deleted one, from its
+    ``ARTICLE_AGGREGATE_FIELDS`` values.
+    """
+    if values["deleted_at"] is not None:
+        return None
+    return values["shipment_id"], article_value(
+        values["quantity"], values["price"]
+    )
+
+
+def article_deltas(old, new):
+    """
+    Returns: {shipment_id: (count, value)} turning contribution ``old`` into
+    ``new`` (either may be None).
+    """
+    deltas = {}
+    if old is not None:
+        deltas[old[0]] = (-1, -old[1])
+    if new is not None:
+        count, value = deltas.get(new[0], (0, 0))
+        deltas[new[0]] = (count + 1, value + new[1])
+    return {
+        shipment_id: delta
+        for shipment_id, delta in deltas.items()
+        if delta != (0, 0)
+    }
+
+
+def apply_deltas(deltas, using=None):
+    """Add ``{shipment_id: (count, value)}`` to the stored aggregates."""
+    if not deltas:
+        return
+    # In id order, so concurrent writers lock shared rows in the same order.
+    rows = sorted(
+        (shipment_id, count, value)
+        for shipment_id, (count, value) in deltas.items()
+    )
+    columns = [list(column) for column in zip(*rows)]
+    using = using or router.db_for_write(Shipment)
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {SHIPMENTS} AS shipment
+            SET article_count = shipment.article_count + delta.count,
+                total_value = shipment.total_value + delta.value
+            FROM unnest(%s::bigint[], %s::integer[], %s::numeric[])
+                AS delta (id, count, value)
+            WHERE shipment.id = delta.id
+            RETURNING shipment.carrier, shipment.status, shipment.created,
+                shipment.deleted_at, delta.value
+            """,
+            columns,
+        )
+        updated = cursor.fetchall()
+    add_value_changes(updated, using)
+
+
+def add_value_changes(rows, using=None):
+    """
+    Add total_value changes to the daily rollup, from rows of (carrier,
+    status, created, deleted_at, value change).
+    """
+    deltas = {}
+    for carrier, status, created, deleted_at, value in rows:
+        key = rollup_key(
+            {
+                "carrier": carrier,
+                "status": status,
+                "created": created,
+                "deleted_at": deleted_at,
+            }
+        )
+        if key is not None:
+            merge(deltas, {key: (0, value)})
+    add_rollup(deltas, using)
+
+
+def add_deltas(deltas, using=None):
+    """Apply deltas now, or at the end of the enclosing batch."""
+    pending = getattr(_local, "pending", None)
+    if pending is None:
+        apply_deltas(deltas, using)
+        return
+    for shipment_id, (count, value) in deltas.items():
+        pending_count, pending_value = pending.get(shipment_id, (0, 0))
+        pending[shipment_id] = (pending_count + count, pending_value + value)
+
+
+@contextmanager
+def batched_aggregates(using=None):
+    """
+    Sum the aggregate deltas of the article writes inside, and apply them
+    with one UPDATE on exit. Use inside the writes' transaction. Nested
+    blocks join the outermost one.
+    """
+    if getattr(_local, "pending", None) is not None:
+        yield
+        return
+
+    _local.pending = {}
+    try:
+        yield
+        pending = _local.pending
+    finally:
+        _local.pending = None
+    apply_deltas(
+        {key: delta for key, delta in pending.items() if delta != (0, 0)},
+        using,
+    )
+
+
+def refresh_aggregates(shipment_ids, using=None):
+    """
+    Recompute the aggregates of the given shipments from their articles.
+
+    Returns: ids of the shipments whose stored aggregates were wrong.
+    """
+    if not shipment_ids:
+        return []
+    pending = getattr(_local, "pending", None)
+    if pending:
+        # Counted from the rows now, so not again at the end of the batch.
+        for shipment_id in shipment_ids:
+            pending.pop(shipment_id, None)
+    using = using or router.db_for_write(Shipment)
+    with transaction.atomic(using=using), connections[using].cursor() as cursor:
+        # Lock first: the UPDATE then reads the articles of every writer
+        # that got there before, and later writers add their deltas on top.
+        cursor.execute(
+            f"SELECT id, total_value FROM {SHIPMENTS} WHERE id = ANY(%s) "
+            "ORDER BY id FOR UPDATE",
+            [list(shipment_ids)],
+        )
+        previous = dict(cursor.fetchall())
+        cursor.execute(
+            f"""
+            UPDATE {SHIPMENTS} AS shipment
+            SET article_count = actual.count, total_value = actual.value
+            FROM (
+                SELECT s.id, count(a.id) AS count,
+                    COALESCE(sum(a.quantity * a.price), 0) AS value
+                FROM {SHIPMENTS} AS s
+                LEFT JOIN {ARTICLES} AS a
+                    ON a.shipment_id = s.id AND a.deleted_at IS NULL
+                WHERE s.id = ANY(%s)
+                GROUP BY s.id
+            ) AS actual
+            WHERE shipment.id = actual.id
+                AND (
+                    shipment.article_count <> actual.count
+                    OR shipment.total_value <> actual.value
+                )
+            RETURNING shipment.id, shipment.carrier, shipment.status,
+                shipment.created, shipment.deleted_at, shipment.total_value
+            """,
+            [list(shipment_ids)],
+        )
+        repaired = cursor.fetchall()
+        add_value_changes(
+            [(*row[1:5], row[5] - previous[row[0]]) for row in repaired],
+            using,
+        )
+    return sorted(row[0] for row in repaired)
@@ -0,0 +1,73 @@
+"""
+Carrier authentication for the status update endpoint.
+
+Each carrier has its own API token (``CARRIER_API_TOKENS``), sent as
+``Authorization: Token <token>``. The authenticated carrier is
+``request.auth``; ``CarrierOwnsUpdates`` only lets it post scans for its
+own shipments.
+"""
+
+import hmac
+
+from django.conf import settings
+from drf_spectacular.extensions import OpenApiAuthenticationExtension
+from rest_framework import exceptions
+from rest_framework.authentication import (
+    BaseAuthentication,
+    get_authorization_header,
+)
+
+KEYWORD = "Token"
+
+
+class CarrierUser:
+    """``request.user`` of a request authenticated as a carrier."""
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, carrier):
+        self.carrier = carrier
+
+    def __str__(self):
+        return self.carrier
+
+
+def carrier_for_token(token):
+    """Returns: the carrier ``token`` belongs to, None if none does."""
+    for carrier, carrier_token in settings.CARRIER_API_TOKENS.items():
+        if hmac.compare_digest(token.encode(), carrier_token.encode()):
+            return carrier
+    return None
+
+
+class CarrierTokenAuthentication(BaseAuthentication):
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != KEYWORD.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed("Invalid token header.")
+
+        carrier = carrier_for_token(auth[1].decode(errors="replace"))
+        if carrier is None:
+            raise exceptions.AuthenticationFailed("Invalid token.")
+        return CarrierUser(carrier), carrier
+
+    def authenticate_header(self, request):
+        # Makes unauthenticated requests a 401 rather than a 403.
+        return KEYWORD
+
+
+class CarrierTokenScheme(OpenApiAuthenticationExtension):
+    target_class = CarrierTokenAuthentication
+    name = "carrierToken"
+
+    def get_security_definition(self, auto_schema):
+        return {
+            "type": "apiKey",
+            "in": "header",
+            "name": "Authorization",
+            "description": 'Carrier API token, as "Token <token>".',
+        }
@@ -0,0 +1,195 @@
+"""
+Shipment change events over Redis pub/sub.
+
+Saves of shipments and articles (see ``shipments.signals``) and the ingest
+path publish a message on the shipment's channel once their transaction
+commits. Inside ``batched_events()`` the messages of a whole ingest batch
+are collected and each shipment is published once.
+
+On the ASGI side, every event loop keeps a single pub/sub connection
+(``EventHub``) shared by all of its streams, so an idle stream costs a
+queue, not a Redis connection.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+
+import redis
+import redis.asyncio as aioredis
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "shipment-events"
+
+# Put on every queue of a hub that lost its Redis connection.
+CLOSED = object()
+
+_local = threading.local()
+_publisher = None
+_publisher_lock = threading.Lock()
+
+
+def channel_name(carrier, tracking_number):
+    return f"{CHANNEL_PREFIX}:{carrier}:{tracking_number}"
+
+
+def get_publisher():
+    global _publisher
+    if _publisher is None:
+        with _publisher_lock:
+            if _publisher is None:
+                _publisher = redis.Redis.from_url(
+                    settings.SHIPMENT_EVENTS_REDIS_URL,
+                    socket_timeout=1,
+                    socket_connect_timeout=1,
+                )
+    return _publisher
+
+
+def reset_publisher():
+    global _publisher
+    _publisher = None
+
+
+def publish(changes):
+    """
+    Publish ``{(carrier, tracking_number): {change, ...}}`` in one round
+    trip. A failure is logged, never raised: streams are a convenience,
+    the data is already committed.
+    """
+    try:
+        pipeline = get_publisher().pipeline(transaction=False)
+        for (carrier, tracking_number), changed in changes.items():
+            pipeline.publish(
+                channel_name(carrier, tracking_number),
+                json.dumps({"changed": sorted(changed)}),
+            )
+        pipeline.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Could not publish {len(changes)} shipment events: {e}")
+
+
+def shipment_changed(carrier, tracking_number, change):
+    """Publish a change of a shipment once the transaction commits."""
+    key = (carrier, tracking_number)
+    pending = getattr(_local, "pending", None)
+    if pending is not None:
+        pending.setdefault(key, set()).add(change)
+        return
+    transaction.on_commit(lambda: publish({key: {change}}))
+
+
+@contextmanager
+def batched_events():
+    """
+    Collect the events raised inside, and publish each shipment once after
+    the transaction commits. Nested blocks join the outermost one.
+    """
+    if getattr(_local, "pending", None) is not None:
+        yield
+        return
+
+    _local.pending = {}
+    try:
+        yield
+        pending = _local.pending
+    finally:
+        _local.pending = None
+    if pending:
+        transaction.on_commit(lambda: publish(pending))
+
+
+class EventHub:
+    """One pub/sub connection, fanned out to a queue per stream."""
+
+    def __init__(self, url):
+        self.client = aioredis.Redis.from_url(url)
+        self.pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        self.queues = {}
+        self.reader = None
+        self.closed = False
+
+    async def subscribe(self, channel):
+        # Only the latest "something changed" matters: a full queue means
+        # the stream will re-read the shipment anyway.
+        queue = asyncio.Queue(maxsize=1)
+        new_channel = channel not in self.queues
+        self.queues.setdefault(channel, set()).add(queue)
+        if new_channel:
+            await self.pubsub.subscribe(channel)
+        if self.reader is None:
+            self.reader = asyncio.create_task(self.read())
+        return queue
+
+    async def unsubscribe(self, channel, queue):
+        queues = self.queues.get(channel, set())
+        queues.discard(queue)
+        if not queues and channel in self.queues:
+            del self.queues[channel]
+            if not self.closed:
+                await self.pubsub.unsubscribe(channel)
+
+    async def read(self):
+        try:
+            while True:
+                message = await self.pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=None
+                )
+                if message is None:
+                    continue
+                channel = message["channel"].decode()
+                for queue in self.queues.get(channel, ()):
+                    if queue.empty():
+                        queue.put_nowait(message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Shipment event subscription lost: {e}")
+            await self.close()
+
+    async def close(self):
+        """End every stream of this hub; their clients reconnect."""
+        self.closed = True
+        for queues in self.queues.values():
+            for queue in queues:
+                if not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(CLOSED)
+        if self.reader is not None and self.reader is not (
+            asyncio.current_task()
+        ):
+            self.reader.cancel()
+        try:
+            await self.pubsub.close()
+            await self.client.close()
+        except Exception:
+            pass
+
+
+_hubs = weakref.WeakKeyDictionary()
+
+
+def get_hub():
+    loop = asyncio.get_running_loop()
+    hub = _hubs.get(loop)
+    if hub is None or hub.closed:
+        hub = _hubs[loop] = EventHub(settings.SHIPMENT_EVENTS_REDIS_URL)
+    return hub
+
+
+@asynccontextmanager
+async def subscription(carrier, tracking_number):
+    """Yields: a queue receiving the shipment's events (or ``CLOSED``)."""
+    hub = get_hub()
+    channel = channel_name(carrier, tracking_number)
+    queue = await hub.subscribe(channel)
+    try:
+        yield queue
+    finally:
+        await hub.unsubscribe(channel, queue)
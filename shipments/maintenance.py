@@ -0,0 +1,200 @@
+"""
+Batched purging and archiving of shipments, run by ``maintenance_task``.
+
+- Soft-deleted shipments and articles older than the retention window are
+  hard-deleted (a soft-deleted shipment takes all of its articles along).
+- Shipments delivered longer ago than the archive window, with their live
+  articles, are moved to ``ArchivedShipment``/``ArchivedArticle``.
+
+Rows are processed in small chunks in id order (keyset pagination), each in
+its own short transaction with a lock timeout. Shipments locked by other
+transactions are skipped until the next run; a chunk that times out on
+another lock (of one of their articles) is rolled back and ends the run.
+Chunks are separated by a pause and a run stops at its time budget, so
+maintenance never holds locks for long nor saturates the database.
+"""
+
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+from django.utils import timezone
+
+from .metrics import MAINTENANCE_ROWS
+from .models import ArchivedArticle, ArchivedShipment, Article, Shipment
+
+logger = logging.getLogger(__name__)
+
+SHIPMENTS = Shipment._meta.db_table
+ARTICLES = Article._meta.db_table
+
+
+def archive_columns(model):
+    return [
+        field.column
+        for field in model._meta.concrete_fields
+        if field.name != "archived_at"
+    ]
+
+
+class MaintenanceRun:
+    """Counts, throttling and the time budget of one maintenance run."""
+
+    def __init__(self, chunk_size, pause, time_budget, lock_timeout_ms):
+        self.chunk_size = chunk_size
+        self.pause = pause
+        self.deadline = time.monotonic() + time_budget
+        self.lock_timeout_ms = lock_timeout_ms
+        self.counts = {
+            "purged_shipments": 0,
+            "purged_articles": 0,
+            "archived_shipments": 0,
+            "archived_articles": 0,
+        }
+        self.chunks = 0
+        self.complete = True
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            chunk_size=settings.SHIPMENT_MAINTENANCE_CHUNK_SIZE,
+            pause=settings.SHIPMENT_MAINTENANCE_CHUNK_PAUSE,
+            time_budget=settings.SHIPMENT_MAINTENANCE_TIME_BUDGET,
+            lock_timeout_ms=settings.SHIPMENT_MAINTENANCE_LOCK_TIMEOUT_MS,
+        )
+
+    def for_each_chunk(self, select_sql, params, process):
+        """
+        Call ``process(cursor, ids)`` for successive chunks of the ids
+        selected by ``select_sql``, inside each chunk's transaction. The
+        query's last two parameters are the id to start after and the chunk
+        size.
+        """
+        last_id = 0
+        while True:
+            if time.monotonic() >= self.deadline:
+                self.complete = False
+                return
+            before = dict(self.counts)
+            try:
+                with transaction.atomic(), connection.cursor() as cursor:
+                    cursor.execute(
+                        f"SET LOCAL lock_timeout = {int(self.lock_timeout_ms)}"
+                    )
+                    cursor.execute(
+                        select_sql, [*params, last_id, self.chunk_size]
+                    )
+                    ids = [row[0] for row in cursor.fetchall()]
+                    if not ids:
+                        return
+                    process(cursor, ids)
+            except OperationalError as e:
+                # Most likely the lock timeout; leave the rest for next run.
+                logger.warning(f"Shipment maintenance chunk failed: {e}")
+                self.counts = before
+                self.complete = False
+                return
+            self.record(before)
+            self.chunks += 1
+            last_id = ids[-1]
+            if len(ids) < self.chunk_size:
+                return
+            time.sleep(self.pause)
+
+    def add(self, name, count):
+        self.counts[name] += count
+
+    def record(self, before):
+        """Export the rows of a committed chunk."""
+        for name, count in self.counts.items():
+            action, table = name.split("_")
+            MAINTENANCE_ROWS.labels(table=table, action=action).inc(
+                count - before[name]
+            )
+
+    def summary(self):
+        return {**self.counts, "chunks": self.chunks, "complete": self.complete}
+
+
+def purge_deleted(run, cutoff):
+    """Hard-delete shipments and articles soft-deleted before cutoff."""
+    select = (
+        "SELECT id FROM {table} WHERE deleted_at < %s AND id > %s "
+        "ORDER BY id LIMIT %s FOR UPDATE SKIP LOCKED"
+    )
+
+    def purge_shipments(cursor, ids):
+        cursor.execute(
+            f"DELETE FROM {ARTICLES} WHERE shipment_id = ANY(%s)", [ids]
+        )
+        run.add("purged_articles", cursor.rowcount)
+        cursor.execute(f"DELETE FROM {SHIPMENTS} WHERE id = ANY(%s)", [ids])
+        run.add("purged_shipments", cursor.rowcount)
+
+    def purge_articles(cursor, ids):
+        cursor.execute(f"DELETE FROM {ARTICLES} WHERE id = ANY(%s)", [ids])
+        run.add("purged_articles", cursor.rowcount)
+
+    run.for_each_chunk(
+        select.format(table=SHIPMENTS), [cutoff], purge_shipments
+    )
+    run.for_each_chunk(select.format(table=ARTICLES), [cutoff], purge_articles)
+
+
+def archive_delivered(run, cutoff):
+    """
+    Move shipments delivered before cutoff, and their live articles, to
+    the archive tables. Soft-deleted articles of them are dropped.
+    """
+    shipment_columns = ", ".join(archive_columns(ArchivedShipment))
+    article_columns = ", ".join(archive_columns(ArchivedArticle))
+    select = (
+        f"SELECT id FROM {SHIPMENTS} WHERE status = %s "
+        "AND deleted_at IS NULL "
+        "AND COALESCE(status_updated_at, modified) < %s AND id > %s "
+        "ORDER BY id LIMIT %s FOR UPDATE SKIP LOCKED"
+    )
+    params = [Shipment.Status.DELIVERY, cutoff]
+
+    def archive(cursor, ids):
+        now = timezone.now()
+        cursor.execute(
+            f"INSERT INTO {ArchivedShipment._meta.db_table} "
+            f"({shipment_columns}, archived_at) "
+            f"SELECT {shipment_columns}, %s FROM {SHIPMENTS} "
+            f"WHERE id = ANY(%s)",
+            [now, ids],
+        )
+        run.add("archived_shipments", cursor.rowcount)
+        cursor.execute(
+            f"INSERT INTO {ArchivedArticle._meta.db_table} "
+            f"({article_columns}, archived_at) "
+            f"SELECT {article_columns}, %s FROM {ARTICLES} "
+            f"WHERE shipment_id = ANY(%s) AND deleted_at IS NULL",
+            [now, ids],
+        )
+        run.add("archived_articles", cursor.rowcount)
+        cursor.execute(
+            f"DELETE FROM {ARTICLES} WHERE shipment_id = ANY(%s)", [ids]
+        )
+        cursor.execute(f"DELETE FROM {SHIPMENTS} WHERE id = ANY(%s)", [ids])
+
+    run.for_each_chunk(select, params, archive)
+
+
+def run_maintenance(run=None):
+    """Purge, then archive. Returns: summary of the rows moved."""
+    run = run or MaintenanceRun.from_settings()
+    started = time.monotonic()
+    now = timezone.now()
+
+    purge_deleted(
+        run, now - timedelta(days=settings.SOFT_DELETE_RETENTION_DAYS)
+    )
+    archive_delivered(
+        run, now - timedelta(days=settings.SHIPMENT_ARCHIVE_AFTER_DAYS)
+    )
+
+    return {**run.summary(), "seconds": round(time.monotonic() - started, 3)}
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from shipments.models import Shipment
+
+
+class Command(BaseCommand):
+    help = "Populate receiver_city/receiver_country from receiver_address"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of shipments updated per transaction",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Recompute every shipment, not only those missing a city",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+
+        shipments = Shipment.global_objects.only("id", "receiver_address")
+        if not options["all"]:
+            shipments = shipments.filter(receiver_city="").exclude(
+                receiver_address=""
+            )
+
+        updated = 0
+        last_id = 0
+        while True:
+            # Keyset pagination keeps every batch an index range scan.
+            batch = list(
+                shipments.filter(id__gt=last_id).order_by("id")[:batch_size]
+            )
+            if not batch:
+                break
+
+            for shipment in batch:
+                shipment.set_receiver_location()
+
+            with transaction.atomic():
+                Shipment.global_objects.bulk_update(
+                    batch, ["receiver_city", "receiver_country"]
+                )
+
+            updated += len(batch)
+            last_id = batch[-1].id
+            self.stdout.write(f"Updated {updated} shipments")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Backfill complete: {updated} shipments")
+        )
@@ -0,0 +1,126 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from shipments.models import Article, Shipment
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure shipment lookup latency, including connection setup, "
+        "with and without connection pooling"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=200,
+            help="Number of lookups per mode",
+        )
+        parser.add_argument(
+            "--tracking-number",
+            type=str,
+            help="Tracking number to look up (defaults to any shipment)",
+        )
+        parser.add_argument(
+            "--carrier",
+            type=str,
+            help="Carrier of the shipment to look up",
+        )
+
+    def handle(self, *args, **options):
+        shipments = Shipment.objects.all()
+        if options["tracking_number"]:
+            shipments = shipments.filter(
+                tracking_number=options["tracking_number"]
+            )
+        if options["carrier"]:
+            shipments = shipments.filter(carrier=options["carrier"])
+
+        shipment = shipments.using(DEFAULT_DB_ALIAS).first()
+        if not shipment:
+            raise CommandError("No shipment found to benchmark against")
+
+        # The same two queries ShipmentDetailView runs.
+        queries = [
+            Shipment.objects.filter(
+                tracking_number=shipment.tracking_number,
+                carrier=shipment.carrier,
+            )[:1].query.sql_with_params(),
+            Article.objects.filter(
+                shipment_id=shipment.pk
+            ).query.sql_with_params(),
+        ]
+
+        settings_dict = connections[DEFAULT_DB_ALIAS].settings_dict
+        pool_options = settings_dict["OPTIONS"].get("pool") or {}
+        options_without_pool = {
+            key: value
+            for key, value in settings_dict["OPTIONS"].items()
+            if key != "pool"
+        }
+
+        modes = {
+            "unpooled": {
+                **settings_dict,
+                "OPTIONS": options_without_pool,
+                "CONN_MAX_AGE": 0,
+            },
+            "pooled": {
+                **settings_dict,
+                "OPTIONS": {
+                    **options_without_pool,
+                    "pool": {**pool_options, "min_size": 1},
+                },
+                "CONN_MAX_AGE": 0,
+            },
+        }
+
+        for mode, mode_settings in modes.items():
+            timings = self.run_mode(
+                mode, mode_settings, queries, options["iterations"]
+            )
+            self.stdout.write(self.format_result(mode, timings))
+
+    def run_mode(self, mode, mode_settings, queries, iterations):
+        """
+        Run each lookup on a connection opened for it and closed after it,
+        the way a web request handles its connection.
+        """
+        backend = connections[DEFAULT_DB_ALIAS].__class__
+        wrapper = backend(mode_settings, alias=f"benchmark_{mode}")
+
+        timings = []
+        try:
+            for _ in range(iterations):
+                start = time.perf_counter()
+                with wrapper.cursor() as cursor:
+                    for sql, params in queries:
+                        cursor.execute(sql, params)
+                        cursor.fetchall()
+                wrapper.close()
+                timings.append((time.perf_counter() - start) * 1000)
+        finally:
+            wrapper.close()
+            if mode_settings["OPTIONS"].get("pool"):
+                wrapper.close_pool()
+
+        return timings
+
+    @staticmethod
+    def format_result(mode, timings):
+        ordered = sorted(timings)
+
+        def percentile(p):
+            return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+        return (
+            f"{mode:>9}: n={len(ordered)} "
+            f"mean={statistics.fmean(ordered):.2f}ms "
+            f"p50={percentile(0.50):.2f}ms "
+            f"p95={percentile(0.95):.2f}ms "
+            f"p99={percentile(0.99):.2f}ms"
+        )
@@ -0,0 +1,109 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from shipments.uuids import uuid7
+
+GENERATORS = {"uuid4": uuid.uuid4, "uuid7": uuid7}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare insert throughput, index size and WAL volume of random "
+        "(uuid4) and time-ordered (uuid7) keys under a unique index, in "
+        "scratch tables that are dropped afterwards"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=10_000_000,
+            help="Rows inserted per key type",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10000,
+            help="Rows per INSERT, each in its own transaction",
+        )
+
+    def handle(self, *args, **options):
+        if options["rows"] < 1 or options["batch_size"] < 1:
+            raise CommandError("--rows and --batch-size must be positive")
+
+        connection = connections[DEFAULT_DB_ALIAS]
+        for name, generate in GENERATORS.items():
+            table = f"benchmark_keys_{name}"
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP TABLE IF EXISTS {table}")
+                # Shaped like the shipment table's keys.
+                cursor.execute(
+                    f"CREATE TABLE {table} ("
+                    "id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY, "
+                    "uuid uuid NOT NULL UNIQUE, "
+                    "created timestamptz NOT NULL DEFAULT now())"
+                )
+            try:
+                result = self.run(connection, table, generate, options)
+            finally:
+                with connection.cursor() as cursor:
+                    cursor.execute(f"DROP TABLE IF EXISTS {table}")
+            self.stdout.write(self.format_result(name, result))
+
+    def run(self, connection, table, generate, options):
+        rows, batch_size = options["rows"], options["batch_size"]
+        # Throughput of the last tenth, once the index outgrew the first.
+        tail_start = rows - max(rows // 10, 1)
+        insert_seconds = 0.0
+        tail_seconds = 0.0
+        tail_rows = 0
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_current_wal_lsn()")
+            wal_start = cursor.fetchone()[0]
+
+            for start in range(0, rows, batch_size):
+                count = min(batch_size, rows - start)
+                # Generated outside the timing: only the database is measured.
+                keys = [generate() for _ in range(count)]
+                began = time.perf_counter()
+                cursor.execute(
+                    f"INSERT INTO {table} (uuid) SELECT unnest(%s::uuid[])",
+                    [keys],
+                )
+                elapsed = time.perf_counter() - began
+                insert_seconds += elapsed
+                if start + count > tail_start:
+                    tail_seconds += elapsed
+                    tail_rows += count
+
+            cursor.execute(
+                "SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), %s), "
+                "pg_relation_size(%s), pg_relation_size(%s)",
+                [wal_start, f"{table}_uuid_key", f"{table}_pkey"],
+            )
+            wal_bytes, uuid_index_bytes, pkey_bytes = cursor.fetchone()
+
+        return {
+            "rows": rows,
+            "rows_per_second": rows / insert_seconds,
+            "tail_rows_per_second": tail_rows / tail_seconds,
+            "uuid_index_bytes": uuid_index_bytes,
+            "pkey_bytes": pkey_bytes,
+            "wal_bytes": int(wal_bytes),
+        }
+
+    @staticmethod
+    def format_result(name, result):
+        mib = 1024 * 1024
+        return (
+            f"{name}: rows={result['rows']} "
+            f"insert={result['rows_per_second']:.0f} rows/s "
+            f"last 10%={result['tail_rows_per_second']:.0f} rows/s "
+            f"uuid index={result['uuid_index_bytes'] / mib:.1f}MiB "
+            f"pkey={result['pkey_bytes'] / mib:.1f}MiB "
+            f"WAL={result['wal_bytes'] / mib:.1f}MiB"
+        )
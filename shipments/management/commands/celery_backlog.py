@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from Parcels.celery import QUEUES, queue_lengths
+
+
+class Command(BaseCommand):
+    help = "Show the number of tasks waiting in each Celery queue"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "queues",
+            nargs="*",
+            help=f"Queues to show (default: {', '.join(QUEUES)})",
+        )
+        parser.add_argument(
+            "--watch",
+            type=float,
+            default=0,
+            help="Repeat every this many seconds, until interrupted",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                lengths = queue_lengths(options["queues"] or None)
+                width = max(len(queue) for queue in lengths)
+                for queue, length in lengths.items():
+                    self.stdout.write(f"{queue:<{width}}  {length}")
+                if not options["watch"]:
+                    break
+                time.sleep(options["watch"])
+                self.stdout.write("")
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,269 @@
+import json
+import random
+import socket
+import statistics
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+import requests
+import uvicorn
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+from django.test.utils import override_settings
+
+from shipments.synthetic import shipment_key
+from weather.client import reset_client
+from weather.providers import reset_providers
+from weather.testing import FakeOpenWeatherMapServer
+
+
+class QuietWSGIRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def start_wsgi_server(stack):
+    """Serve the WSGI application in a thread. Returns: (host, port)."""
+    server = ThreadedWSGIServer(
+        ("127.0.0.1", 0), QuietWSGIRequestHandler, allow_reuse_address=True
+    )
+    server.daemon_threads = True
+    server.set_app(get_wsgi_application())
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.05}
+    )
+    thread.daemon = True
+    thread.start()
+    stack.callback(server.server_close)
+    stack.callback(server.shutdown)
+    return server.server_address[:2]
+
+
+def start_asgi_server(stack):
+    """
+    Serve the ASGI application with uvicorn in a thread, like one worker of the
+    events service. Returns: (host, port).
+    """
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    stack.callback(sock.close)
+    server = uvicorn.Server(
+        uvicorn.Config(
+            get_asgi_application(), log_level="warning", lifespan="off"
+        )
+    )
+    thread = threading.Thread(
+        target=server.run, kwargs={"sockets": [sock]}, daemon=True
+    )
+    thread.start()
+    stack.callback(thread.join)
+    stack.callback(setattr, server, "should_exit", True)
+    while not server.started:
+        if not thread.is_alive():
+            raise CommandError("uvicorn failed to start")
+        time.sleep(0.01)
+    return sock.getsockname()[:2]
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the shipment detail endpoint with concurrent requests over "
+        "synthetic shipments (see seed_synthetic) and report throughput and "
+        "latency percentiles as JSON. Without --base-url, the API and a fake "
+        "weather upstream are started in this process, the API on WSGI or, "
+        "with --server asgi, on uvicorn."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--base-url",
+            type=str,
+            help="URL of a running API, e.g. http://localhost:9000",
+        )
+        parser.add_argument(
+            "--server",
+            choices=["wsgi", "asgi"],
+            default="wsgi",
+            help=(
+                "How the in-process API is served: a threaded WSGI server, "
+                "as in the web service, or uvicorn with Parcels.asgi, as in "
+                "the events service"
+            ),
+        )
+        parser.add_argument(
+            "--shipments",
+            type=int,
+            default=10000,
+            help="Number of seeded synthetic shipments to address",
+        )
+        parser.add_argument("--requests", type=int, default=10000)
+        parser.add_argument("--concurrency", type=int, default=32)
+        parser.add_argument(
+            "--hot-keys",
+            type=float,
+            default=0.01,
+            help="Fraction of shipments that are hot",
+        )
+        parser.add_argument(
+            "--hot-traffic",
+            type=float,
+            default=0.9,
+            help="Fraction of requests going to hot shipments",
+        )
+        parser.add_argument(
+            "--missing-rate",
+            type=float,
+            default=0.0,
+            help="Fraction of requests for tracking numbers that do not exist",
+        )
+        parser.add_argument(
+            "--weather-latency",
+            type=float,
+            default=0.05,
+            help="Latency of the in-process fake weather upstream",
+        )
+        parser.add_argument(
+            "--weather-error-rate",
+            type=float,
+            default=0.0,
+            help="Error rate of the in-process fake weather upstream",
+        )
+        parser.add_argument("--timeout", type=float, default=10.0)
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument(
+            "--output", type=str, help="Also write the JSON report here"
+        )
+
+    def handle(self, *args, **options):
+        if options["shipments"] < 1 or options["requests"] < 1:
+            raise CommandError("--shipments and --requests must be positive")
+
+        keys = self.request_keys(options)
+        with ExitStack() as stack:
+            base_url = options["base_url"] or self.start_servers(stack, options)
+            result = self.run(base_url.rstrip("/"), keys, options)
+
+        result["config"] = {
+            name: options[name]
+            for name in (
+                "base_url",
+                "server",
+                "shipments",
+                "requests",
+                "concurrency",
+                "hot_keys",
+                "hot_traffic",
+                "missing_rate",
+                "weather_latency",
+                "weather_error_rate",
+                "seed",
+            )
+        }
+        report = json.dumps(result, indent=2)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as f:
+                f.write(report + "\n")
+        self.stdout.write(report)
+
+    @staticmethod
+    def request_keys(options):
+        """Returns: the (tracking_number, carrier) of every request, in order."""
+        rng = random.Random(options["seed"])
+        shipments = options["shipments"]
+        hot = rng.sample(
+            range(shipments), max(1, int(shipments * options["hot_keys"]))
+        )
+
+        keys = []
+        for _ in range(options["requests"]):
+            if rng.random() < options["missing_rate"]:
+                # Well-formed, but past the seeded range.
+                index = shipments + rng.randrange(shipments)
+            elif rng.random() < options["hot_traffic"]:
+                index = rng.choice(hot)
+            else:
+                index = rng.randrange(shipments)
+            keys.append(shipment_key(index))
+        return keys
+
+    @staticmethod
+    def start_servers(stack, options):
+        """Start the fake weather upstream and the API. Returns: API URL."""
+        upstream = stack.enter_context(
+            FakeOpenWeatherMapServer(
+                latency=options["weather_latency"],
+                error_rate=options["weather_error_rate"],
+            )
+        )
+        stack.enter_context(
+            override_settings(
+                OPENWEATHERMAP_GEOCODE_URL=upstream.geocode_url,
+                OPENWEATHERMAP_WEATHER_URL=upstream.weather_url,
+                OPEN_METEO_URL=upstream.open_meteo_url,
+            )
+        )
+        reset_client()
+        reset_providers()
+        stack.callback(reset_providers)
+        stack.callback(reset_client)
+
+        if options["server"] == "asgi":
+            host, port = start_asgi_server(stack)
+        else:
+            host, port = start_wsgi_server(stack)
+        return f"http://{host}:{port}"
+
+    def run(self, base_url, keys, options):
+        # One keep-alive connection per client thread.
+        local = threading.local()
+
+        def session():
+            if not hasattr(local, "session"):
+                local.session = requests.Session()
+            return local.session
+
+        def fetch(key):
+            tracking_number, carrier = key
+            url = f"{base_url}/api/v1/shipments/{tracking_number}/{carrier}/"
+            start = time.perf_counter()
+            try:
+                response = session().get(url, timeout=options["timeout"])
+                status = str(response.status_code)
+            except requests.RequestException as e:
+                status = type(e).__name__
+            return status, (time.perf_counter() - start) * 1000
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            results = list(pool.map(fetch, keys))
+        duration = time.perf_counter() - started
+
+        latencies = sorted(latency for _, latency in results)
+        statuses = Counter(status for status, _ in results)
+
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+
+        return {
+            "requests": len(results),
+            "duration_seconds": round(duration, 3),
+            "throughput_rps": round(len(results) / duration, 1),
+            "statuses": dict(sorted(statuses.items())),
+            "errors": sum(
+                count
+                for status, count in statuses.items()
+                if not status.isdigit() or int(status) >= 500
+            ),
+            "latency_ms": {
+                "mean": round(statistics.fmean(latencies), 2),
+                "p50": round(percentile(0.50), 2),
+                "p95": round(percentile(0.95), 2),
+                "p99": round(percentile(0.99), 2),
+                "max": round(latencies[-1], 2),
+            },
+        }
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from shipments.aggregates import refresh_aggregates
+from shipments.models import Shipment
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute article_count/total_value of shipments from their live "
+        "articles, fixing those that drifted (e.g. after bulk writes)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of shipments recomputed per transaction",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        shipments = Shipment.global_objects.values_list("id", flat=True)
+
+        checked = 0
+        repaired = 0
+        last_id = 0
+        while True:
+            # Keyset pagination keeps every batch an index range scan.
+            ids = list(
+                shipments.filter(id__gt=last_id).order_by("id")[:batch_size]
+            )
+            if not ids:
+                break
+
+            repaired += len(refresh_aggregates(ids))
+            checked += len(ids)
+            last_id = ids[-1]
+            self.stdout.write(f"Checked {checked} shipments")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Repair complete: {repaired} of {checked} shipments fixed"
+            )
+        )
@@ -0,0 +1,146 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from shipments.addresses import normalize_place
+from shipments.aggregates import refresh_aggregates
+from shipments.models import Article, Shipment
+from shipments.rollup import count_shipments, reconcile_rollup
+from shipments.synthetic import TRACKING_PREFIX, gazetteer_cities, shipment_key
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed synthetic shipments with articles for load and scale tests "
+        "(tracking numbers TN9000000000, TN9000000001, ...)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--shipments",
+            type=int,
+            default=10000,
+            help="Number of shipments to create",
+        )
+        parser.add_argument(
+            "--articles",
+            type=int,
+            default=2,
+            help="Articles per shipment",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Shipments inserted per transaction",
+        )
+        parser.add_argument(
+            "--start",
+            type=int,
+            default=0,
+            help="Index of the first shipment, to extend an earlier seed",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=1,
+            help="Random seed for addresses, statuses and articles",
+        )
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Delete all synthetic shipments first",
+        )
+
+    def handle(self, *args, **options):
+        if options["clear"]:
+            self.clear()
+
+        rng = random.Random(options["seed"])
+        cities = gazetteer_cities()
+        statuses = list(Shipment.Status.values)
+        start, end = options["start"], options["start"] + options["shipments"]
+        batch_size = options["batch_size"]
+
+        started = time.perf_counter()
+        for batch_start in range(start, end, batch_size):
+            batch_end = min(batch_start + batch_size, end)
+            with transaction.atomic():
+                shipments = Shipment.objects.bulk_create(
+                    [
+                        self.build_shipment(index, rng, cities, statuses)
+                        for index in range(batch_start, batch_end)
+                    ]
+                )
+                Article.objects.bulk_create(
+                    [
+                        Article(
+                            shipment=shipment,
+                            name=f"Article {n}",
+                            quantity=rng.randint(1, 5),
+                            price=f"{rng.uniform(1, 500):.2f}",
+                            sku=f"SKU{rng.randrange(100000):05d}",
+                        )
+                        for shipment in shipments
+                        for n in range(options["articles"])
+                    ]
+                )
+                # bulk_create sends no signals: count the shipments in the
+                # rollup, then their articles (which adds their value).
+                ids = [shipment.id for shipment in shipments]
+                count_shipments(ids)
+                refresh_aggregates(ids)
+            self.stdout.write(f"Seeded {batch_end - start} shipments")
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {end - start} shipments with "
+                f"{(end - start) * options['articles']} articles "
+                f"in {elapsed:.1f}s"
+            )
+        )
+
+    @staticmethod
+    def build_shipment(index, rng, cities, statuses):
+        tracking_number, carrier = shipment_key(index)
+        city, country = rng.choice(cities)
+        # bulk_create skips save(), so the receiver location is set here.
+        return Shipment(
+            tracking_number=tracking_number,
+            carrier=carrier,
+            sender_address=f"Warehouse {index % 100}, 10115 Berlin, DE",
+            receiver_address=(
+                f"Street {rng.randint(1, 200)}, "
+                f"{rng.randint(10000, 99999)} {city}, {country}"
+            ),
+            receiver_city=normalize_place(city),
+            receiver_country=normalize_place(country),
+            status=rng.choice(statuses),
+        )
+
+    def clear(self):
+        """
+        Hard-delete synthetic rows with plain SQL; the soft-delete managers
+        would update them one by one.
+        """
+        shipment_table = Shipment._meta.db_table
+        article_table = Article._meta.db_table
+        pattern = f"{TRACKING_PREFIX}%"
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {article_table} WHERE shipment_id IN "
+                f"(SELECT id FROM {shipment_table} "
+                f"WHERE tracking_number LIKE %s)",
+                [pattern],
+            )
+            cursor.execute(
+                f"DELETE FROM {shipment_table} WHERE tracking_number LIKE %s",
+                [pattern],
+            )
+            deleted = cursor.rowcount
+        # Take them out of the stats too.
+        reconcile_rollup()
+        self.stdout.write(f"Deleted {deleted} synthetic shipments")
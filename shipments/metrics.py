@@ -0,0 +1,54 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+from Parcels.metrics import LATENCY_BUCKETS
+
+SHIPMENT_QUERY_SECONDS = Histogram(
+    "parcels_shipment_query_duration_seconds",
+    "Time to load a shipment and its articles for the detail view.",
+    buckets=LATENCY_BUCKETS,
+)
+
+SHIPMENT_SERIALIZE_SECONDS = Histogram(
+    "parcels_shipment_serialize_duration_seconds",
+    "Time to serialize a shipment for the detail view.",
+    buckets=LATENCY_BUCKETS,
+)
+
+INGEST_ROWS = Counter(
+    "parcels_ingest_rows",
+    "CSV rows processed by load_seed_data_task.",
+)
+
+INGEST_ERRORS = Counter(
+    "parcels_ingest_errors",
+    "CSV rows that failed to load.",
+)
+
+INGEST_BATCH_SECONDS = Histogram(
+    "parcels_ingest_batch_duration_seconds",
+    "Time to load one batch of CSV rows.",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+
+INGEST_ROWS_PER_SECOND = Gauge(
+    "parcels_ingest_rows_per_second",
+    "Throughput of the most recent load_seed_data_task run.",
+    multiprocess_mode="mostrecent",
+)
+
+STATUS_UPDATES = Counter(
+    "parcels_status_updates",
+    "Shipments in bulk status update requests, by result.",
+    ["result"],
+)
+
+MAINTENANCE_ROWS = Counter(
+    "parcels_maintenance_rows",
+    "Rows purged or archived by maintenance_task.",
+    ["table", "action"],
+)
+
+ROLLUP_CORRECTIONS = Counter(
+    "parcels_rollup_corrections",
+    "Daily rollup rows corrected by reconcile_rollup_task.",
+)
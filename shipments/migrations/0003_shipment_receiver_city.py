@@ -0,0 +1,30 @@
+# Generated by Django 5.2.1 on 2026-10-19 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shipments", "0002_alter_shipment_carrier_alter_shipment_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="shipment",
+            name="receiver_city",
+            field=models.CharField(blank=True, default="", max_length=100),
+        ),
+        migrations.AddField(
+            model_name="shipment",
+            name="receiver_country",
+            field=models.CharField(blank=True, default="", max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name="shipment",
+            index=models.Index(
+                fields=["receiver_city", "receiver_country"],
+                name="shipment_destination_idx",
+            ),
+        ),
+    ]
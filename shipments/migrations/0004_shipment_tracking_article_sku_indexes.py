@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-19 09:24
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build the indexes without locking the (large) tables against writes.
+    atomic = False
+
+    dependencies = [
+        ("shipments", "0003_shipment_receiver_city"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="article",
+            index=models.Index(
+                fields=["shipment", "sku"], name="article_shipment_sku_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="shipment",
+            index=models.Index(
+                fields=["tracking_number", "carrier"],
+                name="shipment_tracking_idx",
+            ),
+        ),
+    ]
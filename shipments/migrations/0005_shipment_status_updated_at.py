@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-19 09:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shipments", "0004_shipment_tracking_article_sku_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="shipment",
+            name="status_updated_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,101 @@
+# Generated by Django 5.2.1 on 2026-10-19 09:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shipments", "0005_shipment_status_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedShipment",
+            fields=[
+                (
+                    "id",
+                    models.BigIntegerField(primary_key=True, serialize=False),
+                ),
+                ("uuid", models.UUIDField(unique=True)),
+                ("created", models.DateTimeField()),
+                ("modified", models.DateTimeField()),
+                ("tracking_number", models.CharField(max_length=50)),
+                (
+                    "carrier",
+                    models.CharField(
+                        choices=[
+                            ("DHL", "Dhl"),
+                            ("UPS", "Ups"),
+                            ("DPD", "Dpd"),
+                            ("FedEx", "Fedex"),
+                            ("GLS", "Gls"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("sender_address", models.TextField()),
+                ("receiver_address", models.TextField()),
+                (
+                    "receiver_city",
+                    models.CharField(blank=True, default="", max_length=100),
+                ),
+                (
+                    "receiver_country",
+                    models.CharField(blank=True, default="", max_length=100),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("in-transit", "In Transit"),
+                            ("inbound-scan", "Inbound Scan"),
+                            ("delivery", "Delivery"),
+                            ("transit", "Transit"),
+                            ("scanned", "Scanned"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "status_updated_at",
+                    models.DateTimeField(blank=True, null=True),
+                ),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["tracking_number", "carrier"],
+                        name="archived_shipment_tracking_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="ArchivedArticle",
+            fields=[
+                (
+                    "id",
+                    models.BigIntegerField(primary_key=True, serialize=False),
+                ),
+                ("uuid", models.UUIDField(unique=True)),
+                ("created", models.DateTimeField()),
+                ("modified", models.DateTimeField()),
+                ("name", models.CharField(max_length=100)),
+                ("quantity", models.IntegerField()),
+                ("price", models.DecimalField(decimal_places=2, max_digits=10)),
+                ("sku", models.CharField(max_length=50)),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "shipment",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="articles",
+                        to="shipments.archivedshipment",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.1 on 2026-10-19 09:47
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Constant defaults make the new columns a catalog-only change; the
+    # indexes are built without locking the table against writes. Existing
+    # rows are filled in by the repair_article_aggregates command.
+    atomic = False
+
+    dependencies = [
+        ("shipments", "0006_archived_shipment_archived_article"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="shipment",
+            name="article_count",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="shipment",
+            name="total_value",
+            field=models.DecimalField(
+                decimal_places=2, default=0, editable=False, max_digits=14
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="shipment",
+            index=models.Index(
+                fields=["article_count", "id"],
+                name="shipment_article_count_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="shipment",
+            index=models.Index(
+                fields=["total_value", "id"], name="shipment_total_value_idx"
+            ),
+        ),
+    ]
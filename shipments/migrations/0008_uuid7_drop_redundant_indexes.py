@@ -0,0 +1,64 @@
+# Generated by Django 5.2.1 on 2026-10-19 09:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+import shipments.uuids
+
+
+class Migration(migrations.Migration):
+    # DROP INDEX CONCURRENTLY can't run in a transaction.
+    atomic = False
+
+    dependencies = [
+        ("shipments", "0007_shipment_article_aggregates"),
+    ]
+
+    operations = [
+        # The index on article.shipment_id duplicates the leading column of
+        # article_shipment_sku_idx. Drop only the index: AlterField would
+        # also drop and re-validate the foreign key, scanning the table.
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    sql=(
+                        "DROP INDEX CONCURRENTLY IF EXISTS "
+                        '"shipments_article_shipment_id_561de863"'
+                    ),
+                    reverse_sql=(
+                        "CREATE INDEX CONCURRENTLY IF NOT EXISTS "
+                        '"shipments_article_shipment_id_561de863" '
+                        'ON "shipments_article" ("shipment_id")'
+                    ),
+                ),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name="article",
+                    name="shipment",
+                    field=models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="articles",
+                        to="shipments.shipment",
+                    ),
+                ),
+            ],
+        ),
+        # Python-side default and a db_index that unique=True already
+        # implied: no SQL, the unique index is the only one on uuid.
+        migrations.AlterField(
+            model_name="article",
+            name="uuid",
+            field=models.UUIDField(
+                default=shipments.uuids.uuid7, editable=False, unique=True
+            ),
+        ),
+        migrations.AlterField(
+            model_name="shipment",
+            name="uuid",
+            field=models.UUIDField(
+                default=shipments.uuids.uuid7, editable=False, unique=True
+            ),
+        ),
+    ]
@@ -0,0 +1,99 @@
+# Generated by Django 5.2.1 on 2026-10-19 10:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shipments", "0008_uuid7_drop_redundant_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="archivedshipment",
+            name="article_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="archivedshipment",
+            name="total_value",
+            field=models.DecimalField(
+                decimal_places=2, default=0, max_digits=14
+            ),
+        ),
+        # Shipments archived so far keep their article totals, from the
+        # archived articles. The rollup itself is filled by the first
+        # reconcile_rollup_task run.
+        migrations.RunSQL(
+            sql="""
+                UPDATE shipments_archivedshipment AS shipment
+                SET article_count = archived.count,
+                    total_value = archived.value
+                FROM (
+                    SELECT shipment_id, count(*) AS count,
+                        sum(quantity * price) AS value
+                    FROM shipments_archivedarticle
+                    GROUP BY shipment_id
+                ) AS archived
+                WHERE shipment.id = archived.shipment_id
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.CreateModel(
+            name="ShipmentDailyRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "carrier",
+                    models.CharField(
+                        choices=[
+                            ("DHL", "Dhl"),
+                            ("UPS", "Ups"),
+                            ("DPD", "Dpd"),
+                            ("FedEx", "Fedex"),
+                            ("GLS", "Gls"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("in-transit", "In Transit"),
+                            ("inbound-scan", "Inbound Scan"),
+                            ("delivery", "Delivery"),
+                            ("transit", "Transit"),
+                            ("scanned", "Scanned"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("shipment_count", models.IntegerField(default=0)),
+                (
+                    "total_value",
+                    models.DecimalField(
+                        decimal_places=2, default=0, max_digits=16
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("day", "carrier", "status"),
+                        name="shipment_daily_rollup_key",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.1 on 2026-10-19 10:07
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import (
+    AddIndexConcurrently,
+    TrigramExtension,
+)
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # The indexes are built without locking the tables against writes;
+    # CREATE INDEX CONCURRENTLY can't run in a transaction.
+    atomic = False
+
+    dependencies = [
+        ("shipments", "0009_shipment_daily_rollup"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        AddIndexConcurrently(
+            model_name="article",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["name"],
+                name="article_name_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="article",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["sku"],
+                name="article_sku_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="shipment",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["receiver_address"],
+                name="shipment_receiver_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="shipment",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["sender_address"],
+                name="shipment_sender_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+    ]
@@ -1,9 +1,18 @@
-import uuid as uuid
-
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.db import models, router, transaction
 from django_extensions.db.models import TimeStampedModel
 from django_softdelete.models import SoftDeleteModel
 
+from .addresses import normalize_place, parse_address
+from .uuids import uuid7
+
+# Maintained by shipments.aggregates, never written by Shipment.save().
+SHIPMENT_AGGREGATE_FIELDS = ("article_count", "total_value")
+# The article fields the aggregates depend on.
+ARTICLE_AGGREGATE_FIELDS = ("shipment_id", "quantity", "price", "deleted_at")
+# The shipment fields its row in the daily rollup depends on.
+SHIPMENT_ROLLUP_FIELDS = ("carrier", "status", "created", "deleted_at")
+
 
 class Shipment(TimeStampedModel, SoftDeleteModel):
 
@@ -21,12 +30,12 @@ class Shipment(TimeStampedModel, SoftDeleteModel):
         TRANSIT = "transit", "Transit"
         SCANNED = "scanned", "Scanned"
 
+    # Time-ordered, so inserts append to the unique index (see uuids).
     uuid = models.UUIDField(
         unique=True,
         max_length=500,
-        default=uuid.uuid4,
+        default=uuid7,
         editable=False,
-        db_index=True,
         blank=False,
         null=False,
     )
@@ -34,23 +43,227 @@ class Shipment(TimeStampedModel, SoftDeleteModel):
     carrier = models.CharField(max_length=10, choices=Carrier.choices)
     sender_address = models.TextField()
     receiver_address = models.TextField()
+    # Normalized from receiver_address on save, see set_receiver_location().
+    receiver_city = models.CharField(max_length=100, blank=True, default="")
+    receiver_country = models.CharField(max_length=100, blank=True, default="")
     status = models.CharField(max_length=20, choices=Status.choices)
+    # Time of the carrier scan that set the status; older scans are ignored
+    # (see shipments.status_updates).
+    status_updated_at = models.DateTimeField(null=True, blank=True)
+    # Over the live articles (see shipments.aggregates).
+    article_count = models.IntegerField(default=0, editable=False)
+    total_value = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0, editable=False
+    )
+
+    class Meta(TimeStampedModel.Meta):
+        indexes = [
+            # Detail lookups filter on both; ingest on tracking_number alone.
+            models.Index(
+                fields=["tracking_number", "carrier"],
+                name="shipment_tracking_idx",
+            ),
+            models.Index(
+                fields=["receiver_city", "receiver_country"],
+                name="shipment_destination_idx",
+            ),
+            # Filtering and sorting the shipment list; id breaks ties.
+            models.Index(
+                fields=["article_count", "id"],
+                name="shipment_article_count_idx",
+            ),
+            models.Index(
+                fields=["total_value", "id"],
+                name="shipment_total_value_idx",
+            ),
+            # Search: ILIKE '%term%' on either address (shipments.search).
+            GinIndex(
+                fields=["receiver_address"],
+                opclasses=["gin_trgm_ops"],
+                name="shipment_receiver_trgm_idx",
+            ),
+            GinIndex(
+                fields=["sender_address"],
+                opclasses=["gin_trgm_ops"],
+                name="shipment_sender_trgm_idx",
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Compared on save, to publish status changes and to move the
+        # shipment between rollup rows (shipments.signals).
+        instance._loaded_status = instance.__dict__.get("status")
+        if all(name in instance.__dict__ for name in SHIPMENT_ROLLUP_FIELDS):
+            instance._loaded_rollup_values = {
+                name: instance.__dict__[name] for name in SHIPMENT_ROLLUP_FIELDS
+            }
+        return instance
+
+    def set_receiver_location(self):
+        city, country = parse_address(self.receiver_address)
+        # The address is unbounded text; a segment too long to be a place
+        # name is cut rather than failing the save.
+        self.receiver_city = normalize_place(city)[
+            : self._meta.get_field("receiver_city").max_length
+        ]
+        self.receiver_country = normalize_place(country)[
+            : self._meta.get_field("receiver_country").max_length
+        ]
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "receiver_address" in update_fields:
+            self.set_receiver_location()
+            if update_fields is not None:
+                kwargs["update_fields"] = {
+                    *update_fields,
+                    "receiver_city",
+                    "receiver_country",
+                }
+        if update_fields is None and not self._state.adding:
+            # Article writes may have moved the aggregates since this
+            # instance was loaded; leave them alone.
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in SHIPMENT_AGGREGATE_FIELDS
+            ]
+        super().save(*args, **kwargs)
 
 
 class Article(TimeStampedModel, SoftDeleteModel):
     uuid = models.UUIDField(
         unique=True,
         max_length=500,
-        default=uuid.uuid4,
+        default=uuid7,
         editable=False,
-        db_index=True,
         blank=False,
         null=False,
     )
+    # Indexed first in article_shipment_sku_idx; no index of its own.
+    shipment = models.ForeignKey(
+        Shipment,
+        related_name="articles",
+        on_delete=models.CASCADE,
+        db_index=False,
+    )
+    name = models.CharField(max_length=100)
+    quantity = models.IntegerField()
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    sku = models.CharField(max_length=50)
+
+    class Meta(TimeStampedModel.Meta):
+        indexes = [
+            # Ingest looks articles up by (shipment, sku).
+            models.Index(
+                fields=["shipment", "sku"],
+                name="article_shipment_sku_idx",
+            ),
+            # Search: ILIKE '%term%' on name or SKU (shipments.search).
+            GinIndex(
+                fields=["name"],
+                opclasses=["gin_trgm_ops"],
+                name="article_name_trgm_idx",
+            ),
+            GinIndex(
+                fields=["sku"],
+                opclasses=["gin_trgm_ops"],
+                name="article_sku_trgm_idx",
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Compared on save, to update the shipment's aggregates
+        # (shipments.signals); unset when any of them was deferred.
+        if all(name in instance.__dict__ for name in ARTICLE_AGGREGATE_FIELDS):
+            instance._loaded_values = {
+                name: instance.__dict__[name]
+                for name in ARTICLE_AGGREGATE_FIELDS
+            }
+        return instance
+
+    def save(self, *args, **kwargs):
+        # The article and the aggregate update of its post_save signal
+        # commit together.
+        using = kwargs.get("using") or router.db_for_write(
+            type(self), instance=self
+        )
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, **kwargs)
+
+
+class ArchivedShipment(models.Model):
+    """
+    A long-delivered shipment moved out of the hot table, keeping its id
+    (see shipments.maintenance). Columns match Shipment's.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    uuid = models.UUIDField(unique=True)
+    created = models.DateTimeField()
+    modified = models.DateTimeField()
+    tracking_number = models.CharField(max_length=50)
+    carrier = models.CharField(max_length=10, choices=Shipment.Carrier.choices)
+    sender_address = models.TextField()
+    receiver_address = models.TextField()
+    receiver_city = models.CharField(max_length=100, blank=True, default="")
+    receiver_country = models.CharField(max_length=100, blank=True, default="")
+    status = models.CharField(max_length=20, choices=Shipment.Status.choices)
+    status_updated_at = models.DateTimeField(null=True, blank=True)
+    article_count = models.IntegerField(default=0)
+    total_value = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0
+    )
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["tracking_number", "carrier"],
+                name="archived_shipment_tracking_idx",
+            ),
+        ]
+
+
+class ArchivedArticle(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    uuid = models.UUIDField(unique=True)
+    created = models.DateTimeField()
+    modified = models.DateTimeField()
     shipment = models.ForeignKey(
-        Shipment, related_name="articles", on_delete=models.CASCADE
+        ArchivedShipment, related_name="articles", on_delete=models.CASCADE
     )
     name = models.CharField(max_length=100)
     quantity = models.IntegerField()
     price = models.DecimalField(max_digits=10, decimal_places=2)
     sku = models.CharField(max_length=50)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+
+class ShipmentDailyRollup(models.Model):
+    """
+    Shipments and their total article value per carrier, status and day
+    created, archived shipments included (see shipments.rollup).
+    """
+
+    carrier = models.CharField(max_length=10, choices=Shipment.Carrier.choices)
+    status = models.CharField(max_length=20, choices=Shipment.Status.choices)
+    day = models.DateField()
+    shipment_count = models.IntegerField(default=0)
+    total_value = models.DecimalField(
+        max_digits=16, decimal_places=2, default=0
+    )
+
+    class Meta:
+        constraints = [
+            # Day first: the stats endpoint reads day ranges.
+            models.UniqueConstraint(
+                fields=["day", "carrier", "status"],
+                name="shipment_daily_rollup_key",
+            ),
+        ]
@@ -0,0 +1,24 @@
+from rest_framework.permissions import BasePermission
+
+
+class CarrierOwnsUpdates(BasePermission):
+    """
+    Only an authenticated carrier, and only with scans of its own
+    shipments. Malformed scans are left to the serializer.
+    """
+
+    message = "Scans may only be posted for the carrier's own shipments."
+
+    def has_permission(self, request, view):
+        carrier = request.auth
+        if not isinstance(carrier, str):
+            return False
+        data = request.data
+        updates = data.get("updates") if isinstance(data, dict) else None
+        if not isinstance(updates, list):
+            return True
+        return all(
+            update.get("carrier", carrier) == carrier
+            for update in updates
+            if isinstance(update, dict)
+        )
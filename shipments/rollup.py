@@ -0,0 +1,205 @@
+"""
+Shipment counts and total article value per carrier, status and day
+created, kept in ``ShipmentDailyRollup`` so stats never scan the shipments.
+
+Every write that adds, removes or moves a live shipment, or changes its
+``total_value``, adds the difference to the rollup in its own transaction:
+
+- shipment saves and deletes (``shipments.signals``);
+- article aggregate updates (``shipments.aggregates``);
+- bulk status updates (``shipments.status_updates``).
+
+Inside ``batched_rollup()`` the differences of an ingest batch are summed
+and upserted with one statement. Archived shipments stay counted; purged
+ones were soft-deleted, so they already are not.
+
+``reconcile_rollup`` corrects drift, e.g. after raw SQL writes: a single
+statement compares the rollup with a GROUP BY over the shipments, both at
+the same snapshot, and adds the difference. Being a difference like any
+other write, it commutes with concurrent writers and takes no table lock.
+"""
+
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections, router
+from django.utils import timezone
+
+from .models import ArchivedShipment, Shipment, ShipmentDailyRollup
+
+ROLLUP = ShipmentDailyRollup._meta.db_table
+SHIPMENTS = Shipment._meta.db_table
+ARCHIVED_SHIPMENTS = ArchivedShipment._meta.db_table
+
+_local = threading.local()
+
+
+def rollup_day(created):
+    return timezone.localtime(created, timezone.get_default_timezone()).date()
+
+
+def rollup_key(values):
+    """
+    Returns: (carrier, status, day) a shipment is counted under, or None
+    for a soft-deleted one, from its ``SHIPMENT_ROLLUP_FIELDS`` values.
+    """
+    if values["deleted_at"] is not None:
+        return None
+    return values["carrier"], values["status"], rollup_day(values["created"])
+
+
+def shipment_moves(old_key, new_key, value):
+    """
+    Returns: {key: (count, value)} moving a shipment worth ``value`` from
+    ``old_key`` to ``new_key`` (either may be None).
+    """
+    deltas = {}
+    if old_key == new_key:
+        return deltas
+    if old_key is not None:
+        deltas[old_key] = (-1, -value)
+    if new_key is not None:
+        deltas[new_key] = (1, value)
+    return deltas
+
+
+def merge(deltas, more):
+    for key, (count, value) in more.items():
+        pending_count, pending_value = deltas.get(key, (0, 0))
+        deltas[key] = (pending_count + count, pending_value + value)
+    return deltas
+
+
+def apply_rollup(deltas, using=None):
+    """Add ``{(carrier, status, day): (count, value)}`` to the rollup."""
+    rows = sorted(
+        (day, carrier, status, count, value)
+        for (carrier, status, day), (count, value) in deltas.items()
+        if (count, value) != (0, 0)
+    )
+    if not rows:
+        return
+    # In key order, so concurrent writers lock shared rows in the same order.
+    columns = [list(column) for column in zip(*rows)]
+    using = using or router.db_for_write(ShipmentDailyRollup)
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {ROLLUP} AS rollup
+                (day, carrier, status, shipment_count, total_value)
+            SELECT * FROM unnest(
+                %s::date[], %s::text[], %s::text[], %s::integer[],
+                %s::numeric[]
+            )
+            ON CONFLICT (day, carrier, status) DO UPDATE
+            SET shipment_count = rollup.shipment_count
+                    + EXCLUDED.shipment_count,
+                total_value = rollup.total_value + EXCLUDED.total_value
+            """,
+            columns,
+        )
+
+
+def add_rollup(deltas, using=None):
+    """Apply rollup deltas now, or at the end of the enclosing batch."""
+    pending = getattr(_local, "pending", None)
+    if pending is None:
+        apply_rollup(deltas, using)
+    else:
+        merge(pending, deltas)
+
+
+@contextmanager
+def batched_rollup(using=None):
+    """
+    Sum the rollup deltas of the writes inside, and upsert them with one
+    statement on exit. Use inside the writes' transaction. Nested blocks
+    join the outermost one.
+    """
+    if getattr(_local, "pending", None) is not None:
+        yield
+        return
+
+    _local.pending = {}
+    try:
+        yield
+        pending = _local.pending
+    finally:
+        _local.pending = None
+    apply_rollup(pending, using)
+
+
+def count_shipments(shipment_ids, using=None):
+    """
+    Count shipments written without save() (e.g. ``bulk_create``) in the
+    rollup, with their current ``total_value``.
+    """
+    using = using or router.db_for_write(Shipment)
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT carrier, status, created, total_value FROM {SHIPMENTS}
+            WHERE id = ANY(%s) AND deleted_at IS NULL
+            """,
+            [list(shipment_ids)],
+        )
+        rows = cursor.fetchall()
+    deltas = {}
+    for carrier, status, created, value in rows:
+        merge(deltas, {(carrier, status, rollup_day(created)): (1, value)})
+    add_rollup(deltas, using)
+
+
+def reconcile_rollup(using=None):
+    """
+    Add the difference between the rollup and the shipments to the rollup,
+    and drop rows left empty.
+
+    Returns: number of rollup rows corrected.
+    """
+    using = using or router.db_for_write(ShipmentDailyRollup)
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH actual AS (
+                SELECT (created AT TIME ZONE %s)::date AS day, carrier,
+                    status, count(*) AS shipment_count,
+                    sum(total_value) AS total_value
+                FROM (
+                    SELECT created, carrier, status, total_value
+                    FROM {SHIPMENTS} WHERE deleted_at IS NULL
+                    UNION ALL
+                    SELECT created, carrier, status, total_value
+                    FROM {ARCHIVED_SHIPMENTS}
+                ) AS shipment
+                GROUP BY 1, 2, 3
+            ),
+            drift AS (
+                SELECT day, carrier, status,
+                    COALESCE(actual.shipment_count, 0)
+                        - COALESCE(rollup.shipment_count, 0)
+                        AS shipment_count,
+                    COALESCE(actual.total_value, 0)
+                        - COALESCE(rollup.total_value, 0) AS total_value
+                FROM actual FULL JOIN {ROLLUP} AS rollup
+                    USING (day, carrier, status)
+            )
+            INSERT INTO {ROLLUP} AS rollup
+                (day, carrier, status, shipment_count, total_value)
+            SELECT * FROM drift
+            WHERE shipment_count <> 0 OR total_value <> 0
+            ORDER BY day, carrier, status
+            ON CONFLICT (day, carrier, status) DO UPDATE
+            SET shipment_count = rollup.shipment_count
+                    + EXCLUDED.shipment_count,
+                total_value = rollup.total_value + EXCLUDED.total_value
+            """,
+            [settings.TIME_ZONE],
+        )
+        corrected = cursor.rowcount
+        cursor.execute(
+            f"DELETE FROM {ROLLUP} "
+            "WHERE shipment_count = 0 AND total_value = 0"
+        )
+    return corrected
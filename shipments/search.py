@@ -0,0 +1,145 @@
+"""
+Search shipments by part of their sender or receiver address, or of the
+name or SKU of one of their articles.
+
+Each of those columns has a ``pg_trgm`` GIN index, which serves
+``ILIKE '%term%'`` from the trigrams of the term. The matches are plain
+SQL: Django's ``icontains`` compiles to ``UPPER(column::text) LIKE``, which
+the indexes can't serve. Terms need at least three characters, or they
+have no trigram and every row of the index is a candidate.
+
+A shipment ranks by its best ``similarity`` to the term over its addresses
+and articles, so an exact SKU or name comes first. Pages continue after the
+(rank, id) of the last shipment of the previous one.
+
+Each source (shipment addresses, articles) yields at most
+``SHIPMENT_SEARCH_MAX_CANDIDATES`` matches, the newest first, so a term
+contained in most rows costs a bounded scan instead of ranking the whole
+table. Such a term is ranked among its newest matches only, the same ones
+for every page, and the search reports that it was truncated.
+"""
+
+import re
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.conf import settings
+from django.db import connections, router
+
+from .models import Article, Shipment
+
+SHIPMENTS = Shipment._meta.db_table
+ARTICLES = Article._meta.db_table
+
+
+def like_pattern(term):
+    """Returns: an ILIKE pattern matching ``term`` anywhere, literally."""
+    return "%" + re.sub(r"([\\%_])", r"\\\1", term) + "%"
+
+
+def encode_cursor(rank, shipment_id):
+    """Returns: an opaque cursor for the page after this shipment."""
+    return urlsafe_b64encode(f"{rank!r}:{shipment_id}".encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Returns: (rank, shipment id) from ``encode_cursor``.
+    Raises: ValueError if the cursor is malformed.
+    """
+    rank, shipment_id = urlsafe_b64decode(cursor.encode()).decode().split(":")
+    return float(rank), int(shipment_id)
+
+
+def search_shipments(term, limit, after=None, using=None, max_candidates=None):
+    """
+    Returns: ([(shipment id, rank)], truncated): up to ``limit`` live
+    shipments matching ``term``, best first, after the ``(rank, id)`` of
+    ``after``, and whether a source had more than ``max_candidates``
+    matches, so older ones were left out.
+    """
+    if max_candidates is None:
+        max_candidates = settings.SHIPMENT_SEARCH_MAX_CANDIDATES
+    pattern = like_pattern(term)
+    # One more candidate per source than kept, to know if it had more.
+    params = [
+        *(term, term, pattern, pattern, max_candidates + 1),
+        *(term, term, pattern, pattern, max_candidates + 1),
+        max_candidates,
+        max_candidates,
+    ]
+    keyset = ""
+    if after is not None:
+        # rank is a real: compare as one, or the cursor misses ties.
+        keyset = "WHERE (rank, shipment_id) < (%s::real, %s)"
+        params.extend(after)
+    params.append(limit)
+
+    using = using or router.db_for_read(Shipment)
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH matches AS (
+                SELECT id AS shipment_id,
+                    greatest(
+                        similarity(%s, receiver_address),
+                        similarity(%s, sender_address)
+                    ) AS rank,
+                    row_number() OVER (ORDER BY id DESC) AS n
+                FROM (
+                    SELECT id, receiver_address, sender_address
+                    FROM {SHIPMENTS}
+                    WHERE deleted_at IS NULL
+                        AND (
+                            receiver_address ILIKE %s
+                            OR sender_address ILIKE %s
+                        )
+                    ORDER BY id DESC
+                    LIMIT %s
+                ) AS shipment
+                UNION ALL
+                SELECT shipment_id,
+                    greatest(similarity(%s, name), similarity(%s, sku)),
+                    row_number() OVER (ORDER BY id DESC)
+                FROM (
+                    SELECT article.id, article.shipment_id, article.name,
+                        article.sku
+                    FROM {ARTICLES} AS article
+                    JOIN {SHIPMENTS} AS shipment
+                        ON shipment.id = article.shipment_id
+                        AND shipment.deleted_at IS NULL
+                    WHERE article.deleted_at IS NULL
+                        AND (article.name ILIKE %s OR article.sku ILIKE %s)
+                    ORDER BY article.id DESC
+                    LIMIT %s
+                ) AS article
+            ),
+            capped AS (
+                SELECT coalesce(bool_or(n > %s), false) AS truncated
+                FROM matches
+            ),
+            ranked AS (
+                SELECT shipment_id, max(rank) AS rank
+                FROM matches
+                WHERE n <= %s
+                GROUP BY shipment_id
+            )
+            -- One row even for an empty page, to report truncated.
+            SELECT page.shipment_id, page.rank, capped.truncated
+            FROM capped
+            LEFT JOIN (
+                SELECT shipment_id, rank FROM ranked
+                {keyset}
+                ORDER BY rank DESC, shipment_id DESC
+                LIMIT %s
+            ) AS page ON true
+            ORDER BY page.rank DESC, page.shipment_id DESC
+            """,
+            params,
+        )
+        rows = cursor.fetchall()
+    truncated = rows[0][2]
+    return [
+        (shipment_id, rank)
+        for shipment_id, rank, _ in rows
+        if shipment_id is not None
+    ], truncated
@@ -1,6 +1,12 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
 from rest_framework import serializers
 
-from .models import Article, Shipment
+from .models import Article, Shipment, ShipmentDailyRollup
+from .search import decode_cursor
+from .tracking import is_plausible_tracking_number
 
 
 class ArticleSerializer(serializers.ModelSerializer):
@@ -15,3 +21,161 @@ class ShipmentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Shipment
         fields = "__all__"
+
+
+class ShipmentListSerializer(serializers.ModelSerializer):
+    """A shipment without its articles; see article_count/total_value."""
+
+    class Meta:
+        model = Shipment
+        fields = "__all__"
+
+
+class ShipmentListFilterSerializer(serializers.Serializer):
+    min_article_count = serializers.IntegerField(required=False, min_value=0)
+    max_article_count = serializers.IntegerField(required=False, min_value=0)
+    min_total_value = serializers.DecimalField(
+        max_digits=14, decimal_places=2, required=False
+    )
+    max_total_value = serializers.DecimalField(
+        max_digits=14, decimal_places=2, required=False
+    )
+
+
+class ShipmentStatsFilterSerializer(serializers.Serializer):
+    date_from = serializers.DateField(
+        required=False,
+        help_text="First day (shipment creation), inclusive.",
+    )
+    date_to = serializers.DateField(
+        required=False, help_text="Last day, inclusive. Defaults to today."
+    )
+    carrier = serializers.ChoiceField(
+        choices=Shipment.Carrier.choices, required=False
+    )
+    status = serializers.ChoiceField(
+        choices=Shipment.Status.choices, required=False
+    )
+
+    def validate(self, attrs):
+        date_to = attrs.get("date_to") or timezone.localdate()
+        date_from = attrs.get("date_from") or date_to - timedelta(
+            days=settings.SHIPMENT_STATS_DEFAULT_DAYS - 1
+        )
+        if date_from > date_to:
+            raise serializers.ValidationError(
+                "date_from must not be after date_to"
+            )
+        if (date_to - date_from).days >= settings.SHIPMENT_STATS_MAX_DAYS:
+            raise serializers.ValidationError(
+                f"At most {settings.SHIPMENT_STATS_MAX_DAYS} days at once"
+            )
+        return {**attrs, "date_from": date_from, "date_to": date_to}
+
+
+class ShipmentStatsRowSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ShipmentDailyRollup
+        fields = ["day", "carrier", "status", "shipment_count", "total_value"]
+
+
+class ShipmentStatsSerializer(serializers.Serializer):
+    date_from = serializers.DateField()
+    date_to = serializers.DateField()
+    shipment_count = serializers.IntegerField(
+        help_text="Shipments created in the range."
+    )
+    total_value = serializers.DecimalField(
+        max_digits=16,
+        decimal_places=2,
+        help_text="Total value of their live articles.",
+    )
+    rows = ShipmentStatsRowSerializer(
+        many=True,
+        help_text="Per day, carrier and status; empty ones are left out.",
+    )
+
+
+class ShipmentSearchFilterSerializer(serializers.Serializer):
+    q = serializers.CharField(
+        min_length=3,
+        max_length=200,
+        help_text=(
+            "Part of a sender or receiver address, article name or SKU; "
+            "case-insensitive."
+        ),
+    )
+    page_size = serializers.IntegerField(
+        required=False,
+        min_value=1,
+        max_value=settings.SHIPMENT_SEARCH_MAX_PAGE_SIZE,
+        default=settings.SHIPMENT_SEARCH_PAGE_SIZE,
+    )
+    cursor = serializers.CharField(
+        required=False, help_text="The `next` cursor of the previous page."
+    )
+
+    def validate_cursor(self, value):
+        try:
+            return decode_cursor(value)
+        except ValueError:
+            raise serializers.ValidationError("Invalid cursor")
+
+
+class ShipmentSearchResultSerializer(ShipmentListSerializer):
+    rank = serializers.FloatField(
+        read_only=True,
+        help_text="Best trigram similarity to the search term, 0 to 1.",
+    )
+
+
+class ShipmentSearchSerializer(serializers.Serializer):
+    next = serializers.URLField(allow_null=True)
+    truncated = serializers.BooleanField(
+        help_text=(
+            "The term matches more addresses or articles than are searched: "
+            "results are ranked among the newest matches only, the same for "
+            "every page. Narrow the term to find older shipments."
+        )
+    )
+    results = ShipmentSearchResultSerializer(many=True)
+
+
+class StatusScanSerializer(serializers.Serializer):
+    carrier = serializers.ChoiceField(choices=Shipment.Carrier.choices)
+    tracking_number = serializers.CharField(max_length=50)
+    status = serializers.ChoiceField(choices=Shipment.Status.choices)
+    timestamp = serializers.DateTimeField()
+
+    def validate(self, attrs):
+        if not is_plausible_tracking_number(
+            attrs["carrier"], attrs["tracking_number"]
+        ):
+            raise serializers.ValidationError(
+                {
+                    "tracking_number": (
+                        f"Invalid tracking number for carrier "
+                        f"{attrs['carrier']}"
+                    )
+                }
+            )
+        return attrs
+
+
+class StatusUpdateRequestSerializer(serializers.Serializer):
+    updates = serializers.ListField(
+        child=StatusScanSerializer(),
+        allow_empty=False,
+        max_length=settings.SHIPMENT_STATUS_UPDATE_MAX_BATCH,
+    )
+
+
+class StatusUpdateResultSerializer(serializers.Serializer):
+    received = serializers.IntegerField(help_text="Scans in the request.")
+    applied = serializers.IntegerField(help_text="Shipments updated.")
+    skipped = serializers.IntegerField(
+        help_text=(
+            "Shipments not updated: unknown, or their status is from a "
+            "newer scan."
+        )
+    )
@@ -0,0 +1,117 @@
+"""
+Publish shipment change events (see shipments.events) on saves, and keep
+the article aggregates of shipments (see shipments.aggregates) and the
+daily rollup (see shipments.rollup).
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .aggregates import (
+    add_deltas,
+    article_deltas,
+    contribution,
+    refresh_aggregates,
+)
+from .events import shipment_changed
+from .models import (
+    ARTICLE_AGGREGATE_FIELDS,
+    SHIPMENT_ROLLUP_FIELDS,
+    Article,
+    Shipment,
+)
+from .rollup import add_rollup, rollup_key, shipment_moves
+
+
+@receiver(post_save, sender=Shipment)
+def shipment_saved(sender, instance, created, **kwargs):
+    if created:
+        change = "created"
+    elif instance.deleted_at is not None:
+        change = "deleted"
+    elif instance.status != getattr(instance, "_loaded_status", None):
+        change = "status"
+    else:
+        return
+    instance._loaded_status = instance.status
+    shipment_changed(instance.carrier, instance.tracking_number, change)
+
+
+@receiver(post_delete, sender=Shipment)
+def shipment_deleted(sender, instance, **kwargs):
+    shipment_changed(instance.carrier, instance.tracking_number, "deleted")
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+def article_changed(sender, instance, **kwargs):
+    try:
+        shipment = instance.shipment
+    except Shipment.DoesNotExist:
+        # Deleted along with its shipment, which publishes the change.
+        return
+    shipment_changed(shipment.carrier, shipment.tracking_number, "articles")
+
+
+@receiver(post_save, sender=Article)
+def article_saved_aggregates(sender, instance, created, using, **kwargs):
+    values = {
+        name: getattr(instance, name) for name in ARTICLE_AGGREGATE_FIELDS
+    }
+    loaded = getattr(instance, "_loaded_values", None)
+    if loaded is None and not created:
+        # Not loaded whole (deferred fields): what it replaced is unknown.
+        refresh_aggregates([instance.shipment_id], using)
+    else:
+        add_deltas(
+            article_deltas(
+                contribution(loaded) if loaded else None, contribution(values)
+            ),
+            using,
+        )
+    instance._loaded_values = values
+
+
+@receiver(post_delete, sender=Article)
+def article_deleted_aggregates(sender, instance, using, **kwargs):
+    loaded = getattr(instance, "_loaded_values", None)
+    if loaded is None:
+        # The row is gone; recounting the rest is exact.
+        refresh_aggregates([instance.shipment_id], using)
+        return
+    add_deltas(article_deltas(contribution(loaded), None), using)
+
+
+@receiver(post_save, sender=Shipment)
+def shipment_saved_rollup(sender, instance, created, using, **kwargs):
+    values = {name: getattr(instance, name) for name in SHIPMENT_ROLLUP_FIELDS}
+    loaded = getattr(instance, "_loaded_rollup_values", None)
+    instance._loaded_rollup_values = values
+    if loaded is None and not created:
+        # Loaded with deferred fields; reconcile_rollup catches changes.
+        return
+
+    old_key = rollup_key(loaded) if loaded else None
+    new_key = rollup_key(values)
+    if old_key == new_key:
+        return
+    if created:
+        value = instance.total_value
+    else:
+        # Article writes keep total_value current in the row, not here.
+        value = (
+            Shipment.global_objects.using(using)
+            .filter(pk=instance.pk)
+            .values_list("total_value", flat=True)
+            .get()
+        )
+    add_rollup(shipment_moves(old_key, new_key, value), using)
+
+
+@receiver(post_delete, sender=Shipment)
+def shipment_deleted_rollup(sender, instance, using, **kwargs):
+    loaded = getattr(instance, "_loaded_rollup_values", None)
+    key = rollup_key(loaded) if loaded else None
+    if key is not None:
+        # Its articles were deleted first, taking their value along.
+        add_rollup(shipment_moves(key, None, 0), using)
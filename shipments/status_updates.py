@@ -0,0 +1,117 @@
+"""
+Bulk shipment status updates from carrier scans.
+
+A whole batch is applied with one ``UPDATE ... FROM unnest(...)``, joining
+the scans passed as four arrays: one parameter each however large the
+batch, where a VALUES list needs four per scan.
+
+A scan only wins if it is newer than the scan that set the stored status
+(``status_updated_at``), so scans arriving out of order are dropped by the
+statement itself: concurrent batches touching the same shipment wait for
+its row lock and re-check the timestamp. The rows are locked, in id order,
+by a CTE that also reads their previous status, to move them between rows
+of the daily rollup (``shipments.rollup``).
+"""
+
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from .events import publish
+from .models import Shipment
+from .rollup import add_rollup, merge, rollup_day, shipment_moves
+
+
+def latest_scans(scans):
+    """
+    Returns: {(carrier, tracking_number): (status, timestamp)}, keeping the
+    latest scan of each shipment.
+    """
+    latest = {}
+    for scan in scans:
+        key = (scan["carrier"], scan["tracking_number"])
+        if key not in latest or scan["timestamp"] > latest[key][1]:
+            latest[key] = (scan["status"], scan["timestamp"])
+    return latest
+
+
+def apply_status_updates(scans):
+    """
+    Apply carrier scans, given as dicts with carrier, tracking_number,
+    status and timestamp (aware datetime).
+
+    Returns: [(carrier, tracking_number, status)] of the shipments updated.
+    Scans of unknown shipments, and scans older than the stored status, are
+    skipped.
+    """
+    latest = latest_scans(scans)
+    if not latest:
+        return []
+
+    table = Shipment._meta.db_table
+    rows = sorted(
+        (carrier, tracking_number, status, timestamp)
+        for (carrier, tracking_number), (status, timestamp) in latest.items()
+    )
+    columns = [list(column) for column in zip(*rows)]
+
+    alias = router.db_for_write(Shipment)
+    with transaction.atomic(using=alias):
+        with connections[alias].cursor() as cursor:
+            cursor.execute(
+                f"""
+                WITH scan AS (
+                    SELECT * FROM unnest(
+                        %s::text[], %s::text[], %s::text[],
+                        %s::timestamptz[]
+                    ) AS scan (carrier, tracking_number, status, scanned_at)
+                ),
+                previous AS (
+                    SELECT shipment.id, shipment.status, scan.status AS scan_status,
+                        scan.scanned_at
+                    FROM {table} AS shipment
+                    JOIN scan ON shipment.carrier = scan.carrier
+                        AND shipment.tracking_number = scan.tracking_number
+                    WHERE shipment.deleted_at IS NULL
+                        AND (
+                            shipment.status_updated_at IS NULL
+                            OR shipment.status_updated_at < scan.scanned_at
+                        )
+                    -- Concurrent batches lock shared rows in the same
+                    -- order rather than deadlock.
+                    ORDER BY shipment.id
+                    FOR UPDATE OF shipment
+                )
+                UPDATE {table} AS shipment
+                SET status = previous.scan_status,
+                    status_updated_at = previous.scanned_at,
+                    modified = %s
+                FROM previous
+                WHERE shipment.id = previous.id
+                RETURNING shipment.carrier, shipment.tracking_number,
+                    shipment.status, previous.status, shipment.created,
+                    shipment.total_value
+                """,
+                [*columns, timezone.now()],
+            )
+            updated = cursor.fetchall()
+
+        # No save signals fire for the UPDATE; publish the changes and move
+        # the shipments between rollup rows here.
+        changes = {
+            (carrier, number): {"status"} for carrier, number, *_ in updated
+        }
+        if changes:
+            transaction.on_commit(lambda: publish(changes), using=alias)
+        moves = {}
+        for carrier, _, status, previous, created, value in updated:
+            day = rollup_day(created)
+            merge(
+                moves,
+                shipment_moves(
+                    (carrier, previous, day), (carrier, status, day), value
+                ),
+            )
+        add_rollup(moves, alias)
+    return [
+        (carrier, number, status) for carrier, number, status, *_ in updated
+    ]
@@ -0,0 +1,39 @@
+"""
+Deterministic synthetic shipments for load and scale tests.
+
+Shipment ``i`` always gets the same tracking number and carrier, so a load
+generator can address any seeded shipment without reading the database.
+"""
+
+import csv
+import os
+
+from django.conf import settings
+
+from .models import Shipment
+
+# TN9 + 9 digits: accepted for every carrier (see tracking.INTERNAL_FORMAT).
+TRACKING_PREFIX = "TN9"
+CARRIERS = list(Shipment.Carrier.values)
+
+
+def tracking_number(index):
+    return f"{TRACKING_PREFIX}{index:09d}"
+
+
+def carrier(index):
+    return CARRIERS[index % len(CARRIERS)]
+
+
+def shipment_key(index):
+    """Returns: (tracking_number, carrier) of synthetic shipment ``index``."""
+    return tracking_number(index), carrier(index)
+
+
+def gazetteer_cities():
+    """Returns: [(name, country code)] from the bundled gazetteer."""
+    path = os.path.join(settings.BASE_DIR, "data", "gazetteer.csv")
+    with open(path, newline="", encoding="utf-8") as csvfile:
+        return [
+            (row["name"], row["country"]) for row in csv.DictReader(csvfile)
+        ]
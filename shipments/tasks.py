@@ -1,11 +1,27 @@
 import csv
 import logging
 import os
+import time
 
 from celery import shared_task
+from django.conf import settings
 from django.db import transaction
 
+from weather.prewarm import prewarm_weather
+
+from .aggregates import batched_aggregates
+from .events import batched_events
+from .maintenance import run_maintenance
+from .metrics import (
+    INGEST_BATCH_SECONDS,
+    INGEST_ERRORS,
+    INGEST_ROWS,
+    INGEST_ROWS_PER_SECOND,
+    ROLLUP_CORRECTIONS,
+)
 from .models import Article, Shipment
+from .rollup import batched_rollup, reconcile_rollup
+from .tracking import forget_miss, is_plausible_tracking_number
 
 logger = logging.getLogger(__name__)
 
@@ -24,17 +40,33 @@ def process_csv_row(row, row_num):
         if not tracking_number:
             return False, False, f"Row {row_num}: Empty tracking number"
 
+        carrier = row.get("carrier", "").strip()
+        if not is_plausible_tracking_number(carrier, tracking_number):
+            # Lookups reject it without a query, so it could never be found.
+            return (
+                False,
+                False,
+                f"Row {row_num}: Invalid tracking number {tracking_number} "
+                f"for carrier {carrier}",
+            )
+
         # Create shipment
         shipment, shipment_created = Shipment.objects.get_or_create(
             tracking_number=tracking_number,
             defaults={
-                "carrier": row.get("carrier", "").strip(),
+                "carrier": carrier,
                 "sender_address": row.get("sender_address", "").strip(),
                 "receiver_address": row.get("receiver_address", "").strip(),
                 "status": row.get("status", "").strip(),
             },
         )
 
+        if shipment_created:
+            # Clear a cached "not found" once the shipment is visible.
+            transaction.on_commit(
+                lambda: forget_miss(shipment.carrier, shipment.tracking_number)
+            )
+
         # Create article
         article, article_created = Article.objects.get_or_create(
             shipment=shipment,
@@ -68,7 +100,15 @@ def process_batch(batch_rows, batch_start_index):
     errors = []
 
     try:
-        with transaction.atomic():
+        # One change event per shipment of the batch, after it commits, and
+        # one aggregate update and rollup upsert for the whole batch, before
+        # (the aggregate update adds to the rollup, so it goes first).
+        with (
+            transaction.atomic(),
+            batched_events(),
+            batched_rollup(),
+            batched_aggregates(),
+        ):
             for idx, row in enumerate(batch_rows):
                 row_num = batch_start_index + idx + 1
 
@@ -141,10 +181,17 @@ def validate_csv_file(csv_path):
         return False, f"Error reading CSV file: {str(e)}", required_columns
 
 
-@shared_task(bind=True, name="shipments.tasks.load_seed_data_task")
+@shared_task(
+    bind=True,
+    name="shipments.tasks.load_seed_data_task",
+    # Acknowledge after the run, so an ingest lost with its worker (e.g. in
+    # a deploy) is redelivered; rows are get_or_create'd, so reruns are safe.
+    acks_late=True,
+)
 def load_seed_data_task(self, csv_path, batch_size=1000):
     """
-    Load seed data from CSV in batches - always runs asynchronously.
+    Load seed data from CSV in batches - always runs asynchronously, on the
+    ingest queue.
 
     :param self: Reference to the task instance.
     :param csv_path: Path to the CSV file.
@@ -160,6 +207,7 @@ def load_seed_data_task(self, csv_path, batch_size=1000):
             return {"success": False, "message": error_message}
 
         logger.info(f"Starting seed data loading from {csv_path}")
+        started = time.perf_counter()
 
         total_rows = 0
         total_shipments_created = 0
@@ -180,9 +228,12 @@ def load_seed_data_task(self, csv_path, batch_size=1000):
                 batch = rows[i : i + batch_size]
                 batch_num = (i // batch_size) + 1
 
-                shipments_created, articles_created, errors = process_batch(
-                    batch, i
-                )
+                with INGEST_BATCH_SECONDS.time():
+                    shipments_created, articles_created, errors = process_batch(
+                        batch, i
+                    )
+                INGEST_ROWS.inc(len(batch))
+                INGEST_ERRORS.inc(len(errors))
 
                 total_shipments_created += shipments_created
                 total_articles_created += articles_created
@@ -198,6 +249,10 @@ def load_seed_data_task(self, csv_path, batch_size=1000):
                     },
                 )
 
+        elapsed = time.perf_counter() - started
+        if elapsed > 0:
+            INGEST_ROWS_PER_SECOND.set(total_rows / elapsed)
+
         # Final results
         success_msg = (
             f"Seed data loaded successfully! "
@@ -224,3 +279,50 @@ def load_seed_data_task(self, csv_path, batch_size=1000):
         error_msg = f"Task failed: {str(e)}"
         logger.error(error_msg, exc_info=True)
         return {"success": False, "message": error_msg}
+
+
+@shared_task(name="shipments.tasks.prewarm_weather_task")
+def prewarm_weather_task():
+    """
+    Refresh cached weather for the destinations of undelivered shipments
+    before it expires. Runs from Celery beat every WEATHER_PREWARM_INTERVAL
+    seconds and stops in time for the next run.
+    """
+    cities = (
+        Shipment.objects.exclude(status=Shipment.Status.DELIVERY)
+        .exclude(receiver_city="")
+        .values_list("receiver_city", flat=True)
+        .distinct()
+    )
+    summary = prewarm_weather(
+        list(cities), time_budget=settings.WEATHER_PREWARM_INTERVAL
+    )
+    logger.info(f"Weather prewarm: {summary}")
+    return summary
+
+
+@shared_task(name="shipments.tasks.maintenance_task")
+def maintenance_task():
+    """
+    Purge old soft-deleted rows and archive long-delivered shipments, in
+    throttled chunks. Runs from Celery beat every
+    SHIPMENT_MAINTENANCE_INTERVAL seconds; a run cut short by its time
+    budget is continued by the next one.
+    """
+    summary = run_maintenance()
+    logger.info(f"Shipment maintenance: {summary}")
+    return summary
+
+
+@shared_task(name="shipments.tasks.reconcile_rollup_task")
+def reconcile_rollup_task():
+    """
+    Correct the daily shipment rollup from a scan of the shipments. Runs
+    from Celery beat every SHIPMENT_ROLLUP_RECONCILE_INTERVAL seconds;
+    writes keep the rollup current in between.
+    """
+    corrected = reconcile_rollup()
+    ROLLUP_CORRECTIONS.inc(corrected)
+    if corrected:
+        logger.warning(f"Shipment rollup: corrected {corrected} rows")
+    return {"corrected": corrected}
@@ -60,6 +60,57 @@ def shipment_without_articles(db):
     )
 
 
+@pytest.fixture
+def make_shipment(db):
+    """Factory: a shipment with one article per SKU in ``skus``."""
+
+    def make(
+        tracking_number,
+        carrier="DHL",
+        status="in-transit",
+        receiver_address="Street 10, 75001 Paris, France",
+        skus=(),
+    ):
+        shipment = Shipment.objects.create(
+            tracking_number=tracking_number,
+            carrier=carrier,
+            sender_address="Street 1, 10115 Berlin, Germany",
+            receiver_address=receiver_address,
+            status=status,
+        )
+        for sku in skus:
+            Article.objects.create(
+                shipment=shipment,
+                name="Item",
+                quantity=1,
+                price="9.99",
+                sku=sku,
+            )
+        return shipment
+
+    return make
+
+
+@pytest.fixture
+def csv_row():
+    """Factory: a row of a seed CSV file, as read by csv.DictReader."""
+
+    def make(tracking_number, sku, price, quantity=1, carrier="DHL"):
+        return {
+            "tracking_number": tracking_number,
+            "carrier": carrier,
+            "sender_address": "Street 1, 10115 Berlin, Germany",
+            "receiver_address": "Street 10, 75001 Paris, France",
+            "status": "in-transit",
+            "article_name": "Item",
+            "article_quantity": str(quantity),
+            "article_price": str(price),
+            "SKU": sku,
+        }
+
+    return make
+
+
 @pytest.fixture
 def sample_csv_data():
     """Sample CSV data for testing"""
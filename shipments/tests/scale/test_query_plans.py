@@ -0,0 +1,214 @@
+"""
+Query plans of the hot paths at production data scale.
+
+Seeds SCALE_TEST_SHIPMENTS synthetic shipments (see seed_synthetic), runs
+each hot query under EXPLAIN (ANALYZE, BUFFERS) and fails on sequential
+scans of the shipment and article tables. Slow, so only run with
+RUN_SCALE_TESTS=True.
+"""
+
+import json
+import os
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from shipments.models import Article, Shipment
+from shipments.synthetic import shipment_key
+from shipments.tasks import process_csv_row
+
+SCALE_TEST_SHIPMENTS = int(os.getenv("SCALE_TEST_SHIPMENTS", "200000"))
+# Below this, sequential scans rightly win over the trigram indexes for the
+# search (they do at 20000), so its plans are only checked from here on.
+SEARCH_PLANS_MIN_SHIPMENTS = 200000
+WATCHED_TABLES = {Shipment._meta.db_table, Article._meta.db_table}
+
+pytestmark = pytest.mark.skipif(
+    os.getenv("RUN_SCALE_TESTS", "False").lower() != "true",
+    reason="Scale tests only run with RUN_SCALE_TESTS=True",
+)
+
+
+@pytest.fixture(scope="module")
+def synthetic_dataset(django_db_setup, django_db_blocker):
+    """Seed once per module; committed, so visible to every test."""
+    with django_db_blocker.unblock():
+        call_command(
+            "seed_synthetic",
+            shipments=SCALE_TEST_SHIPMENTS,
+            clear=True,
+            stdout=StringIO(),
+        )
+        with connection.cursor() as cursor:
+            for table in sorted(WATCHED_TABLES):
+                cursor.execute(f"ANALYZE {table}")
+    yield SCALE_TEST_SHIPMENTS
+    with django_db_blocker.unblock():
+        call_command(
+            "seed_synthetic", shipments=0, clear=True, stdout=StringIO()
+        )
+
+
+def explain(sql):
+    """Returns: the root plan node of EXPLAIN (ANALYZE, BUFFERS) for sql."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}")
+        result = cursor.fetchone()[0]
+    if isinstance(result, str):
+        result = json.loads(result)
+    return result[0]["Plan"]
+
+
+def plan_nodes(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def assert_no_sequential_scans(queries):
+    """EXPLAIN every captured SELECT (or WITH) and check the watched tables."""
+    for query in queries:
+        sql = query["sql"]
+        if not sql.lstrip().upper().startswith(("SELECT", "WITH")):
+            continue
+        plan = explain(sql)
+        seq_scans = [
+            node["Relation Name"]
+            for node in plan_nodes(plan)
+            if node["Node Type"] == "Seq Scan"
+            and node.get("Relation Name") in WATCHED_TABLES
+        ]
+        assert not seq_scans, (
+            f"Sequential scan on {seq_scans} for:\n{sql}\n"
+            f"{json.dumps(plan, indent=2)}"
+        )
+
+
+@pytest.mark.django_db
+class TestDetailViewPlans:
+
+    def setup_method(self):
+        self.client = APIClient()
+
+    def url(self, index):
+        tracking_number, carrier = shipment_key(index)
+        return reverse(
+            "v1:shipments",
+            kwargs={"tracking_number": tracking_number, "carrier": carrier},
+        )
+
+    @patch("shipments.views.get_weather", return_value={})
+    def test_detail_lookup_and_article_prefetch(
+        self, mock_get_weather, synthetic_dataset
+    ):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url(synthetic_dataset // 2))
+
+        assert response.status_code == 200
+        # The shipment, then its prefetched articles.
+        assert len(queries) == 2
+        assert_no_sequential_scans(queries)
+
+    @patch("shipments.views.is_known_miss", return_value=False)
+    def test_detail_miss(self, mock_is_known_miss, synthetic_dataset):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url(synthetic_dataset * 2))
+
+        assert response.status_code == 404
+        assert len(queries) == 1
+        assert_no_sequential_scans(queries)
+
+
+@pytest.mark.django_db
+class TestIngestPlans:
+
+    def row(self, index, sku):
+        tracking_number, carrier = shipment_key(index)
+        return {
+            "tracking_number": tracking_number,
+            "carrier": carrier,
+            "sender_address": "Street 1, 10115 Berlin, DE",
+            "receiver_address": "Street 10, 75001 Paris, FR",
+            "status": "in-transit",
+            "article_name": "Laptop",
+            "article_quantity": "1",
+            "article_price": "800",
+            "SKU": sku,
+        }
+
+    def test_existing_shipment_and_article(self, synthetic_dataset):
+        index = synthetic_dataset // 3
+        tracking_number, carrier = shipment_key(index)
+        sku = (
+            Article.objects.filter(
+                shipment__tracking_number=tracking_number,
+                shipment__carrier=carrier,
+            )
+            .values_list("sku", flat=True)
+            .first()
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            result = process_csv_row(self.row(index, sku), 1)
+
+        assert result == (False, False, None)
+        # One existence check per get_or_create, nothing written.
+        assert len(queries) == 2
+        assert_no_sequential_scans(queries)
+
+    def test_new_article_on_existing_shipment(self, synthetic_dataset):
+        with CaptureQueriesContext(connection) as queries:
+            result = process_csv_row(
+                self.row(synthetic_dataset // 4, "NEW-SKU"), 1
+            )
+
+        assert result == (False, True, None)
+        assert_no_sequential_scans(queries)
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(
+    SCALE_TEST_SHIPMENTS < SEARCH_PLANS_MIN_SHIPMENTS,
+    reason=f"Search plans need {SEARCH_PLANS_MIN_SHIPMENTS} shipments",
+)
+class TestSearchPlans:
+
+    def setup_method(self):
+        self.client = APIClient()
+
+    def search(self, term):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse("v1:shipment-search"), {"q": term}
+            )
+
+        assert response.status_code == 200
+        assert response.data["results"]
+        # The ranked ids, then the shipments.
+        assert len(queries) == 2
+        assert_no_sequential_scans(queries)
+
+    def test_search_by_sku(self, synthetic_dataset):
+        tracking_number, carrier = shipment_key(synthetic_dataset // 5)
+        self.search(
+            Article.objects.filter(
+                shipment__tracking_number=tracking_number,
+                shipment__carrier=carrier,
+            )
+            .values_list("sku", flat=True)
+            .first()
+        )
+
+    def test_search_by_receiver_address(self, synthetic_dataset):
+        tracking_number, carrier = shipment_key(synthetic_dataset // 6)
+        receiver_address = Shipment.objects.values_list(
+            "receiver_address", flat=True
+        ).get(tracking_number=tracking_number, carrier=carrier)
+        # Postcode and city, e.g. "48213 Lyon".
+        self.search(receiver_address.split(", ")[1])
@@ -0,0 +1,272 @@
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from shipments.aggregates import refresh_aggregates
+from shipments.models import Article, Shipment
+from shipments.tasks import process_batch
+
+
+def aggregates(shipment):
+    shipment = Shipment.global_objects.get(pk=shipment.pk)
+    return shipment.article_count, shipment.total_value
+
+
+@pytest.mark.django_db
+class TestArticleWrites:
+
+    def test_created_articles_are_counted(self, valid_shipment_with_articles):
+        assert aggregates(valid_shipment_with_articles) == (
+            2,
+            Decimal("825.00"),
+        )
+
+    def test_changed_quantity_and_price(self, valid_shipment_with_articles):
+        article = Article.objects.get(sku="LP123")
+        article.quantity = 2
+        article.price = "750.50"
+        article.save()
+
+        assert aggregates(valid_shipment_with_articles) == (
+            2,
+            Decimal("1526.00"),
+        )
+
+    def test_other_changes_leave_aggregates_alone(
+        self, valid_shipment_with_articles
+    ):
+        article = Article.objects.get(sku="LP123")
+        article.name = "Notebook"
+
+        with CaptureQueriesContext(connection) as queries:
+            article.save()
+
+        assert not any(
+            "UPDATE shipments_shipment" in query["sql"]
+            for query in queries.captured_queries
+        )
+
+    def test_soft_delete_and_restore(self, valid_shipment_with_articles):
+        article = Article.objects.get(sku="LP123")
+
+        article.delete()
+        assert aggregates(valid_shipment_with_articles) == (1, Decimal("25.00"))
+
+        article.restore()
+        assert aggregates(valid_shipment_with_articles) == (
+            2,
+            Decimal("825.00"),
+        )
+
+    def test_hard_delete(self, valid_shipment_with_articles):
+        Article.objects.get(sku="MO456").hard_delete()
+
+        assert aggregates(valid_shipment_with_articles) == (
+            1,
+            Decimal("800.00"),
+        )
+
+    def test_moved_article(self, valid_shipment_with_articles, make_shipment):
+        other = make_shipment("TN87654321")
+        article = Article.objects.get(sku="MO456")
+        article.shipment = other
+        article.save()
+
+        assert aggregates(valid_shipment_with_articles) == (
+            1,
+            Decimal("800.00"),
+        )
+        assert aggregates(other) == (1, Decimal("25.00"))
+
+    def test_deferred_article_is_recounted(self, valid_shipment_with_articles):
+        article = Article.objects.only("id", "shipment", "price").get(
+            sku="LP123"
+        )
+        article.quantity = 3
+        article.save()
+
+        assert aggregates(valid_shipment_with_articles) == (
+            2,
+            Decimal("2425.00"),
+        )
+
+    def test_shipment_save_keeps_aggregates(self, valid_shipment_with_articles):
+        # Loaded before the article was added.
+        shipment = Shipment.objects.get(pk=valid_shipment_with_articles.pk)
+        Article.objects.create(
+            shipment=shipment, name="Pad", quantity=1, price="5.00", sku="PD1"
+        )
+
+        shipment.status = "delivery"
+        shipment.save()
+
+        assert aggregates(shipment) == (3, Decimal("830.00"))
+
+
+@pytest.mark.django_db
+class TestIngest:
+
+    def test_batch_counts_articles(self, csv_row):
+        rows = [
+            csv_row("TN100", "A", "10.005", quantity=2),
+            csv_row("TN100", "B", "1.50"),
+            csv_row("TN101", "A", "2.00", quantity=3),
+            # Already there: not counted twice.
+            csv_row("TN100", "A", "10.005", quantity=2),
+        ]
+
+        process_batch(rows, 0)
+
+        assert aggregates(Shipment.objects.get(tracking_number="TN100")) == (
+            2,
+            Decimal("21.52"),
+        )
+        assert aggregates(Shipment.objects.get(tracking_number="TN101")) == (
+            1,
+            Decimal("6.00"),
+        )
+
+    def test_batch_updates_aggregates_once(self, csv_row):
+        rows = [
+            csv_row(f"TN20{n}", f"SKU{k}", "1.00")
+            for n in range(3)
+            for k in range(2)
+        ]
+
+        with CaptureQueriesContext(connection) as queries:
+            process_batch(rows, 0)
+
+        updates = [
+            query["sql"]
+            for query in queries.captured_queries
+            if "article_count" in query["sql"]
+            and query["sql"].lstrip().startswith("UPDATE")
+        ]
+        assert len(updates) == 1
+        assert Shipment.objects.filter(article_count=2).count() == 3
+
+    def test_failed_batch_leaves_no_aggregates(self, csv_row):
+        rows = [
+            csv_row("TN300", "A", "1.00"),
+            csv_row("TN300", "B", "not-a-price"),
+        ]
+
+        process_batch(rows, 0)
+
+        shipment = Shipment.objects.get(tracking_number="TN300")
+        assert aggregates(shipment) == (1, Decimal("1.00"))
+
+
+@pytest.mark.django_db
+class TestRepair:
+
+    def test_refresh_fixes_drift(self, valid_shipment_with_articles):
+        Shipment.objects.filter(pk=valid_shipment_with_articles.pk).update(
+            article_count=7, total_value=0
+        )
+
+        repaired = refresh_aggregates([valid_shipment_with_articles.pk])
+
+        assert repaired == [valid_shipment_with_articles.pk]
+        assert aggregates(valid_shipment_with_articles) == (
+            2,
+            Decimal("825.00"),
+        )
+        assert refresh_aggregates([valid_shipment_with_articles.pk]) == []
+
+    def test_command_repairs_bulk_writes(self, shipment_without_articles):
+        Article.objects.bulk_create(
+            [
+                Article(
+                    shipment=shipment_without_articles,
+                    name="Item",
+                    quantity=2,
+                    price="3.25",
+                    sku=f"SKU{n}",
+                )
+                for n in range(3)
+            ]
+        )
+        out = StringIO()
+
+        call_command("repair_article_aggregates", batch_size=1, stdout=out)
+
+        assert aggregates(shipment_without_articles) == (3, Decimal("19.50"))
+        assert "1 of 1 shipments fixed" in out.getvalue()
+
+
+@pytest.mark.django_db
+class TestShipmentList:
+
+    def setup_method(self):
+        self.client = APIClient()
+        self.url = reverse("v1:shipment-list")
+
+    @pytest.fixture
+    def shipments(self, make_shipment):
+        values = {"TN500": ["5.00"], "TN501": [], "TN502": ["1.00", "9.00"]}
+        for tracking_number, prices in values.items():
+            shipment = make_shipment(tracking_number)
+            for n, price in enumerate(prices):
+                Article.objects.create(
+                    shipment=shipment,
+                    name="Item",
+                    quantity=1,
+                    price=price,
+                    sku=f"SKU{n}",
+                )
+
+    def tracking_numbers(self, response):
+        assert response.status_code == 200
+        return [item["tracking_number"] for item in response.data["results"]]
+
+    def test_lists_aggregates_without_articles(self, shipments):
+        response = self.client.get(self.url)
+
+        first = response.data["results"][0]
+        assert first["article_count"] == 1
+        assert first["total_value"] == "5.00"
+        assert "articles" not in first
+
+    def test_sort_by_total_value(self, shipments):
+        response = self.client.get(self.url, {"ordering": "-total_value"})
+
+        assert self.tracking_numbers(response) == ["TN502", "TN500", "TN501"]
+
+    def test_filter_by_aggregates(self, shipments):
+        response = self.client.get(
+            self.url, {"min_article_count": 1, "max_total_value": "9.99"}
+        )
+
+        assert self.tracking_numbers(response) == ["TN500"]
+
+    def test_invalid_filter(self, shipments):
+        response = self.client.get(self.url, {"min_total_value": "lots"})
+
+        assert response.status_code == 400
+        assert "min_total_value" in response.data
+
+    def test_cursor_pages(self, shipments):
+        response = self.client.get(
+            self.url, {"ordering": "article_count", "page_size": 2}
+        )
+        second = self.client.get(response.data["next"])
+
+        assert self.tracking_numbers(response) == ["TN501", "TN500"]
+        assert self.tracking_numbers(second) == ["TN502"]
+
+    def test_does_not_read_articles(self, shipments):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                self.url, {"ordering": "-article_count", "min_total_value": 1}
+            )
+
+        assert response.status_code == 200
+        assert len(queries) == 1
+        assert Article._meta.db_table not in queries[0]["sql"]
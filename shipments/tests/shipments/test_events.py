@@ -0,0 +1,169 @@
+import asyncio
+import json
+from unittest.mock import patch
+
+import pytest
+import redis
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.urls import reverse
+
+from shipments.events import channel_name, publish
+from shipments.models import Article, Shipment
+from shipments.tasks import process_batch
+
+
+@pytest.mark.django_db
+class TestChangeEvents:
+
+    @pytest.fixture(autouse=True)
+    def published(self):
+        with patch("shipments.events.publish") as mock_publish:
+            yield mock_publish
+
+    def changes(self, published):
+        return [call.args[0] for call in published.call_args_list]
+
+    def test_status_changes_are_published(
+        self,
+        published,
+        valid_shipment_with_articles,
+        django_capture_on_commit_callbacks,
+    ):
+        published.reset_mock()
+        shipment = Shipment.objects.get(pk=valid_shipment_with_articles.pk)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            shipment.save()
+            shipment.status = Shipment.Status.DELIVERY
+            shipment.save()
+
+        assert self.changes(published) == [{("DHL", "TN12345678"): {"status"}}]
+
+    def test_article_changes_are_published(
+        self,
+        published,
+        valid_shipment_with_articles,
+        django_capture_on_commit_callbacks,
+    ):
+        published.reset_mock()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Article.objects.filter(sku="LP123").get().delete()
+
+        assert self.changes(published) == [
+            {("DHL", "TN12345678"): {"articles"}}
+        ]
+
+    def test_ingest_publishes_each_shipment_once(
+        self, published, django_capture_on_commit_callbacks
+    ):
+        row = {
+            "tracking_number": "TN55555555",
+            "carrier": "UPS",
+            "sender_address": "Street 1, 10115 Berlin, Germany",
+            "receiver_address": "Street 10, 75001 Paris, France",
+            "status": "in-transit",
+            "article_name": "Laptop",
+            "article_quantity": "1",
+            "article_price": "800",
+        }
+
+        with django_capture_on_commit_callbacks(execute=True):
+            process_batch([{**row, "SKU": "A"}, {**row, "SKU": "B"}], 0)
+
+        assert self.changes(published) == [
+            {("UPS", "TN55555555"): {"created", "articles"}}
+        ]
+
+
+class TestPublish:
+
+    def test_publishes_on_the_shipment_channel(self):
+        client = redis.Redis.from_url(settings.SHIPMENT_EVENTS_REDIS_URL)
+        pubsub = client.pubsub()
+        pubsub.subscribe(channel_name("DHL", "TN1"))
+        assert pubsub.get_message(timeout=2)["type"] == "subscribe"
+
+        publish({("DHL", "TN1"): {"status", "articles"}})
+
+        message = pubsub.get_message(timeout=2)
+        pubsub.close()
+        assert json.loads(message["data"]) == {
+            "changed": ["articles", "status"]
+        }
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+class TestShipmentEventStream:
+
+    @pytest.fixture(autouse=True)
+    def stream_settings(self, settings):
+        settings.SHIPMENT_EVENTS_HEARTBEAT = 0.2
+        settings.SHIPMENT_EVENTS_MAX_DURATION = 10
+
+    def url(self, tracking_number="TN12345678", carrier="DHL"):
+        return reverse(
+            "v1:shipment-events",
+            kwargs={"tracking_number": tracking_number, "carrier": carrier},
+        )
+
+    async def next_event(self, stream):
+        """Returns: (event, data) of the next event, skipping keep-alives."""
+        while True:
+            chunk = await asyncio.wait_for(anext(stream), timeout=5)
+            chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+            fields = dict(
+                line.split(": ", 1)
+                for line in chunk.splitlines()
+                if line and not line.startswith(":")
+            )
+            if "event" in fields:
+                return fields["event"], json.loads(fields["data"])
+
+    async def test_unknown_shipment_is_not_found(self, async_client):
+        response = await async_client.get(self.url("TN99999999"))
+
+        assert response.status_code == 404
+
+    async def test_streams_snapshot_then_changes(
+        self, async_client, valid_shipment_with_articles
+    ):
+        response = await async_client.get(self.url())
+        stream = aiter(response.streaming_content)
+
+        assert response["Content-Type"] == "text/event-stream"
+        event, data = await self.next_event(stream)
+        assert event == "shipment"
+        assert data["status"] == "in-transit"
+        assert len(data["articles"]) == 2
+
+        shipment = valid_shipment_with_articles
+        shipment.status = Shipment.Status.DELIVERY
+        await sync_to_async(shipment.save)()
+
+        event, data = await self.next_event(stream)
+        assert event == "shipment"
+        assert data["status"] == "delivery"
+
+        await sync_to_async(shipment.delete)()
+        # Else the saves' thread keeps a connection to the test database.
+        await sync_to_async(connections.close_all)()
+
+        event, data = await self.next_event(stream)
+        assert event == "deleted"
+        await stream.aclose()
+
+    async def test_idle_stream_sends_keep_alives(
+        self, async_client, valid_shipment_with_articles
+    ):
+        response = await async_client.get(self.url())
+        stream = aiter(response.streaming_content)
+        await self.next_event(stream)
+
+        chunk = await asyncio.wait_for(anext(stream), timeout=5)
+
+        assert chunk.startswith(b": keep-alive")
+        await stream.aclose()
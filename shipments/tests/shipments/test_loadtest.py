@@ -0,0 +1,74 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from shipments.models import Article, Shipment
+from shipments.synthetic import shipment_key
+from shipments.tracking import is_plausible_tracking_number
+
+
+@pytest.mark.django_db
+class TestSeedSynthetic:
+
+    def test_seeds_addressable_shipments(self):
+        call_command(
+            "seed_synthetic",
+            shipments=25,
+            articles=2,
+            batch_size=10,
+            stdout=StringIO(),
+        )
+
+        assert Shipment.objects.count() == 25
+        assert Article.objects.count() == 50
+        tracking_number, carrier = shipment_key(24)
+        shipment = Shipment.objects.get(
+            tracking_number=tracking_number, carrier=carrier
+        )
+        assert shipment.receiver_city
+        assert is_plausible_tracking_number(carrier, tracking_number)
+
+    def test_clear_removes_only_synthetic_shipments(
+        self, valid_shipment_with_articles
+    ):
+        call_command("seed_synthetic", shipments=5, stdout=StringIO())
+
+        call_command(
+            "seed_synthetic", shipments=3, clear=True, stdout=StringIO()
+        )
+
+        assert Shipment.objects.count() == 4
+        assert Article.objects.count() == 2 + 3 * 2
+
+
+@pytest.mark.django_db(transaction=True)
+class TestLoadtest:
+
+    @pytest.mark.parametrize("server", ["wsgi", "asgi"])
+    def test_reports_latency_percentiles(self, tmp_path, server):
+        call_command("seed_synthetic", shipments=20, stdout=StringIO())
+        output = tmp_path / "report.json"
+
+        stdout = StringIO()
+        call_command(
+            "loadtest",
+            shipments=20,
+            server=server,
+            requests=60,
+            concurrency=4,
+            missing_rate=0.1,
+            weather_latency=0,
+            output=str(output),
+            stdout=stdout,
+        )
+
+        report = json.loads(output.read_text())
+        assert json.loads(stdout.getvalue()) == report
+        assert report["requests"] == 60
+        assert report["errors"] == 0
+        assert set(report["statuses"]) <= {"200", "404"}
+        assert report["statuses"]["200"] > 0
+        assert set(report["latency_ms"]) == {"mean", "p50", "p95", "p99", "max"}
+        assert report["throughput_rps"] > 0
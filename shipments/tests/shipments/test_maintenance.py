@@ -0,0 +1,172 @@
+import threading
+from datetime import timedelta
+
+import pytest
+from django.db import connection, transaction
+from django.utils import timezone
+
+from shipments.maintenance import MaintenanceRun, run_maintenance
+from shipments.models import (
+    ArchivedArticle,
+    ArchivedShipment,
+    Article,
+    Shipment,
+)
+from shipments.tasks import maintenance_task
+
+
+def make_run(chunk_size=100, time_budget=60):
+    return MaintenanceRun(
+        chunk_size=chunk_size,
+        pause=0,
+        time_budget=time_budget,
+        lock_timeout_ms=1000,
+    )
+
+
+def days_ago(days):
+    return timezone.now() - timedelta(days=days)
+
+
+@pytest.mark.django_db
+class TestPurge:
+
+    def test_old_soft_deleted_shipments_are_purged(self, make_shipment):
+        old = make_shipment("TN100", skus=["SKU0", "SKU1"])
+        recent = make_shipment("TN101")
+        Shipment.global_objects.filter(pk=old.pk).update(
+            deleted_at=days_ago(31)
+        )
+        Shipment.global_objects.filter(pk=recent.pk).update(
+            deleted_at=days_ago(1)
+        )
+
+        summary = run_maintenance(make_run())
+
+        assert summary["purged_shipments"] == 1
+        assert summary["purged_articles"] == 2
+        assert not Shipment.global_objects.filter(pk=old.pk).exists()
+        assert Shipment.global_objects.filter(pk=recent.pk).exists()
+
+    def test_old_soft_deleted_articles_are_purged(self, make_shipment):
+        shipment = make_shipment("TN100", skus=["SKU0", "SKU1"])
+        Article.global_objects.filter(sku="SKU0").update(
+            deleted_at=days_ago(31)
+        )
+
+        summary = run_maintenance(make_run())
+
+        assert summary["purged_articles"] == 1
+        assert list(
+            Article.global_objects.filter(shipment=shipment).values_list(
+                "sku", flat=True
+            )
+        ) == ["SKU1"]
+
+
+@pytest.mark.django_db
+class TestArchive:
+
+    def test_long_delivered_shipments_are_moved(self, make_shipment):
+        shipment = make_shipment(
+            "TN100", status="delivery", skus=["SKU0", "SKU1"]
+        )
+        Shipment.objects.filter(pk=shipment.pk).update(
+            status_updated_at=days_ago(91)
+        )
+        recent = make_shipment("TN101", status="delivery")
+        active = make_shipment("TN102")
+        Shipment.objects.update(modified=days_ago(100))
+        Shipment.objects.filter(pk=recent.pk).update(
+            status_updated_at=days_ago(1)
+        )
+
+        summary = run_maintenance(make_run())
+
+        assert summary["archived_shipments"] == 1
+        assert summary["archived_articles"] == 2
+        archived = ArchivedShipment.objects.get(pk=shipment.pk)
+        assert archived.tracking_number == "TN100"
+        assert archived.articles.count() == 2
+        assert not Article.global_objects.filter(shipment_id=shipment.pk)
+        assert set(Shipment.objects.values_list("pk", flat=True)) == {
+            recent.pk,
+            active.pk,
+        }
+
+    def test_runs_in_chunks(self, make_shipment):
+        for n in range(5):
+            make_shipment(f"TN10{n}", status="delivery", skus=["SKU0"])
+        Shipment.objects.update(status_updated_at=days_ago(91))
+
+        summary = run_maintenance(make_run(chunk_size=2))
+
+        assert summary["archived_shipments"] == 5
+        assert summary["chunks"] == 3
+        assert summary["complete"]
+        assert ArchivedArticle.objects.count() == 5
+
+    def test_stops_at_time_budget(self, make_shipment):
+        make_shipment("TN100", status="delivery")
+        Shipment.objects.update(status_updated_at=days_ago(91))
+
+        summary = run_maintenance(make_run(time_budget=0))
+
+        assert summary["archived_shipments"] == 0
+        assert not summary["complete"]
+        assert Shipment.objects.count() == 1
+
+    def test_task_reports_rows_moved(self, make_shipment, settings):
+        settings.SHIPMENT_MAINTENANCE_CHUNK_PAUSE = 0
+        make_shipment("TN100", status="delivery")
+        Shipment.objects.update(status_updated_at=days_ago(91))
+
+        summary = maintenance_task.apply().get()
+
+        assert summary["archived_shipments"] == 1
+        assert summary["complete"]
+
+
+@pytest.mark.django_db(transaction=True)
+class TestLocks:
+
+    def hold_lock(self, article):
+        """Lock the article from another connection until released."""
+        locked = threading.Event()
+        self.release = threading.Event()
+
+        def hold():
+            try:
+                with transaction.atomic():
+                    Article.objects.select_for_update().get(pk=article.pk)
+                    locked.set()
+                    self.release.wait(10)
+            finally:
+                connection.close()
+
+        self.holder = threading.Thread(target=hold)
+        self.holder.start()
+        assert locked.wait(10)
+
+    def teardown_method(self):
+        self.release.set()
+        self.holder.join()
+
+    def test_locked_article_ends_the_run(self, make_shipment):
+        shipment = make_shipment("TN100", skus=["SKU0", "SKU1"])
+        Shipment.global_objects.filter(pk=shipment.pk).update(
+            deleted_at=days_ago(31)
+        )
+        self.hold_lock(Article.global_objects.filter(shipment=shipment)[0])
+
+        summary = run_maintenance(
+            MaintenanceRun(
+                chunk_size=100, pause=0, time_budget=60, lock_timeout_ms=50
+            )
+        )
+
+        assert summary["purged_shipments"] == 0
+        assert summary["purged_articles"] == 0
+        assert not summary["complete"]
+        assert Shipment.global_objects.filter(pk=shipment.pk).exists()
+        assert Article.global_objects.filter(shipment=shipment).count() == 2
@@ -0,0 +1,49 @@
+from unittest.mock import patch
+
+import pytest
+from prometheus_client import REGISTRY
+
+
+def sample(name):
+    return REGISTRY.get_sample_value(name) or 0
+
+
+@pytest.mark.django_db
+class TestShipmentMetrics:
+
+    @patch("shipments.views.get_weather", return_value={"temp": 1})
+    def test_shipment_query_and_serialization_are_timed(
+        self, _, client, valid_shipment_with_articles
+    ):
+        query_before = sample("parcels_shipment_query_duration_seconds_count")
+        serialize_before = sample(
+            "parcels_shipment_serialize_duration_seconds_count"
+        )
+
+        client.get("/api/v1/shipments/TN12345678/DHL/")
+
+        assert (
+            sample("parcels_shipment_query_duration_seconds_count")
+            == query_before + 1
+        )
+        assert (
+            sample("parcels_shipment_serialize_duration_seconds_count")
+            == serialize_before + 1
+        )
+
+    def test_ingest_metrics(self, temp_csv_file):
+        from shipments.tasks import load_seed_data_task
+
+        rows_before = sample("parcels_ingest_rows_total")
+        batches_before = sample("parcels_ingest_batch_duration_seconds_count")
+
+        load_seed_data_task.apply(
+            args=[temp_csv_file], kwargs={"batch_size": 1}
+        )
+
+        assert sample("parcels_ingest_rows_total") == rows_before + 2
+        assert (
+            sample("parcels_ingest_batch_duration_seconds_count")
+            == batches_before + 2
+        )
+        assert sample("parcels_ingest_rows_per_second") > 0
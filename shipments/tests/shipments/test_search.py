@@ -0,0 +1,204 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from shipments.models import Article
+from shipments.search import (
+    decode_cursor,
+    encode_cursor,
+    like_pattern,
+    search_shipments,
+)
+
+
+class TestHelpers:
+
+    def test_like_pattern_escapes_wildcards(self):
+        assert like_pattern(r"10%_a\b") == r"%10\%\_a\\b%"
+
+    def test_cursor_round_trip(self):
+        assert decode_cursor(encode_cursor(0.35714287, 42)) == (0.35714287, 42)
+
+
+@pytest.mark.django_db
+class TestSearchShipments:
+
+    def test_matches_addresses_article_names_and_skus(
+        self, valid_shipment_with_articles, shipment_without_articles
+    ):
+        with_articles = valid_shipment_with_articles.id
+        without_articles = shipment_without_articles.id
+
+        def found(term):
+            results, _ = search_shipments(term, 10)
+            return {shipment_id for shipment_id, _ in results}
+
+        assert found("paris") == {with_articles}
+        assert found("new york") == {without_articles}
+        assert found("BERLIN") == {with_articles, without_articles}
+        assert found("lapt") == {with_articles}
+        assert found("o45") == {with_articles}
+        assert found("Tokyo") == set()
+
+    def test_one_result_per_shipment(self, valid_shipment_with_articles):
+        # Both addresses contain it.
+        results, _ = search_shipments("Street", 10)
+
+        assert [shipment_id for shipment_id, _ in results] == [
+            valid_shipment_with_articles.id
+        ]
+
+    def test_closest_match_first(self, make_shipment):
+        partial = make_shipment(
+            "TN100", receiver_address="Main St, Paris", skus=["AB1234567"]
+        )
+        exact = make_shipment(
+            "TN101", receiver_address="Main St, Paris", skus=["AB1234"]
+        )
+
+        results, _ = search_shipments("AB1234", 10)
+
+        assert [shipment_id for shipment_id, _ in results] == [
+            exact.id,
+            partial.id,
+        ]
+        assert results[0][1] == 1.0
+
+    def test_candidates_are_the_newest_per_source(self, make_shipment):
+        by_address = [
+            make_shipment(f"TN10{n}", receiver_address="Main St, Paris")
+            for n in range(5)
+        ]
+        by_articles = [
+            make_shipment(
+                f"TN11{n}", receiver_address="Main St, Lyon", skus=["PARIS"]
+            )
+            for n in range(3)
+        ]
+
+        results, truncated = search_shipments("paris", 10, max_candidates=2)
+
+        assert {shipment_id for shipment_id, _ in results} == {
+            shipment.id for shipment in by_address[-2:] + by_articles[-2:]
+        }
+        assert truncated
+
+    def test_not_truncated_within_the_bound(self, make_shipment):
+        make_shipment("TN100", receiver_address="Main St, Paris")
+        make_shipment("TN101", receiver_address="Main St, Lyon", skus=["PARIS"])
+
+        results, truncated = search_shipments("paris", 10, max_candidates=1)
+
+        assert len(results) == 2
+        assert not truncated
+
+    def test_truncated_is_reported_past_the_last_page(self, make_shipment):
+        for n in range(3):
+            make_shipment(f"TN10{n}", receiver_address="Main St, Paris")
+
+        assert search_shipments(
+            "paris", 10, after=(0.0, 0), max_candidates=2
+        ) == ([], True)
+
+    def test_wildcards_are_literal(self, valid_shipment_with_articles):
+        assert search_shipments("Str%t", 10) == ([], False)
+        assert search_shipments("Str_et", 10) == ([], False)
+
+    def test_skips_deleted_shipments_and_articles(
+        self, valid_shipment_with_articles, shipment_without_articles
+    ):
+        Article.objects.get(sku="LP123").delete()
+        shipment_without_articles.delete()
+
+        assert search_shipments("Laptop", 10) == ([], False)
+        assert search_shipments("New York", 10) == ([], False)
+
+    def test_pages_continue_after_the_cursor(self, make_shipment):
+        shipments = [
+            make_shipment(f"TN{n}", receiver_address=f"Street {n}, Paris")
+            for n in range(1, 6)
+        ]
+
+        seen = []
+        after = None
+        while True:
+            page, _ = search_shipments("Paris", 2, after=after)
+            if not page:
+                break
+            seen.extend(page)
+            shipment_id, rank = page[-1]
+            after = (rank, shipment_id)
+
+        assert sorted(shipment_id for shipment_id, _ in seen) == sorted(
+            shipment.id for shipment in shipments
+        )
+        assert seen == sorted(seen, key=lambda row: (-row[1], -row[0]))
+
+
+@pytest.mark.django_db
+class TestShipmentSearchView:
+
+    def setup_method(self):
+        self.client = APIClient()
+        self.url = reverse("v1:shipment-search")
+
+    def test_results(self, valid_shipment_with_articles):
+        response = self.client.get(self.url, {"q": "laptop"})
+
+        assert response.status_code == 200
+        assert response.data["next"] is None
+        assert response.data["truncated"] is False
+        [result] = response.data["results"]
+        assert result["tracking_number"] == "TN12345678"
+        assert result["total_value"] == "825.00"
+        assert 0 < result["rank"] <= 1
+        assert "articles" not in result
+
+    def test_follows_next(self, make_shipment):
+        for n in range(5):
+            make_shipment(
+                f"TN{n}", receiver_address=f"Street {n}, 75001 Paris, France"
+            )
+
+        tracking_numbers = []
+        url, params = self.url, {"q": "Paris", "page_size": 2}
+        while url:
+            response = self.client.get(url, params)
+            assert response.status_code == 200
+            tracking_numbers.extend(
+                result["tracking_number"] for result in response.data["results"]
+            )
+            url, params = response.data["next"], None
+
+        assert sorted(tracking_numbers) == [f"TN{n}" for n in range(5)]
+
+    def test_reports_truncated_candidates(self, settings, make_shipment):
+        settings.SHIPMENT_SEARCH_MAX_CANDIDATES = 2
+        for n in range(3):
+            make_shipment(f"TN10{n}", receiver_address="Main St, Paris")
+
+        response = self.client.get(self.url, {"q": "Paris"})
+
+        assert len(response.data["results"]) == 2
+        assert response.data["truncated"] is True
+
+    def test_two_queries(self, valid_shipment_with_articles):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url, {"q": "Paris"})
+
+        # The ranked ids, then the shipments.
+        assert len(queries) == 2
+
+    @pytest.mark.parametrize(
+        "params",
+        [
+            {},
+            {"q": "ab"},
+            {"q": "Paris", "page_size": 1000},
+            {"q": "Paris", "cursor": "not-a-cursor"},
+        ],
+    )
+    def test_invalid_parameters(self, params):
+        assert self.client.get(self.url, params).status_code == 400
@@ -0,0 +1,149 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+from django.conf import settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from shipments.models import Shipment
+from shipments.status_updates import apply_status_updates
+
+T0 = datetime(2026, 5, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def scan(status, minutes, tracking_number="TN12345678", carrier="DHL"):
+    return {
+        "carrier": carrier,
+        "tracking_number": tracking_number,
+        "status": status,
+        "timestamp": T0 + timedelta(minutes=minutes),
+    }
+
+
+@pytest.mark.django_db
+class TestApplyStatusUpdates:
+
+    def test_newer_scan_updates_status(self, valid_shipment_with_articles):
+        updated = apply_status_updates([scan("delivery", 5)])
+
+        shipment = Shipment.objects.get(pk=valid_shipment_with_articles.pk)
+        assert updated == [("DHL", "TN12345678", "delivery")]
+        assert shipment.status == "delivery"
+        assert shipment.status_updated_at == T0 + timedelta(minutes=5)
+
+    def test_out_of_order_scan_is_dropped(self, valid_shipment_with_articles):
+        apply_status_updates([scan("delivery", 5)])
+
+        assert apply_status_updates([scan("transit", 1)]) == []
+        shipment = Shipment.objects.get(pk=valid_shipment_with_articles.pk)
+        assert shipment.status == "delivery"
+
+    def test_latest_scan_of_a_batch_wins(self, valid_shipment_with_articles):
+        updated = apply_status_updates(
+            [scan("delivery", 9), scan("scanned", 1), scan("transit", 3)]
+        )
+
+        assert updated == [("DHL", "TN12345678", "delivery")]
+
+    def test_batch_is_one_query(
+        self, valid_shipment_with_articles, django_assert_num_queries
+    ):
+        scans = [
+            scan("transit", i, tracking_number=f"TN{i:08d}") for i in range(500)
+        ]
+
+        # The UPDATE and the rollup upsert, inside a savepoint (the test's
+        # transaction).
+        with django_assert_num_queries(4):
+            apply_status_updates(scans + [scan("delivery", 1)])
+
+    def test_changes_are_published(
+        self, valid_shipment_with_articles, django_capture_on_commit_callbacks
+    ):
+        with patch("shipments.status_updates.publish") as mock_publish:
+            with django_capture_on_commit_callbacks(execute=True):
+                apply_status_updates([scan("delivery", 5), scan("scanned", 5)])
+
+        mock_publish.assert_called_once_with(
+            {("DHL", "TN12345678"): {"status"}}
+        )
+
+
+@pytest.mark.django_db
+class TestStatusUpdateView:
+
+    @pytest.fixture(autouse=True)
+    def tokens(self, settings):
+        settings.CARRIER_API_TOKENS = {"DHL": "dhl-token", "UPS": "ups-token"}
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION="Token dhl-token")
+        self.url = reverse("v1:shipment-status-updates")
+
+    def post(self, *scans):
+        updates = [
+            {**s, "timestamp": s["timestamp"].isoformat()} for s in scans
+        ]
+        return self.client.post(self.url, {"updates": updates}, format="json")
+
+    def test_requires_a_token(self, valid_shipment_with_articles):
+        self.client.credentials()
+
+        response = self.post(scan("delivery", 5))
+
+        assert response.status_code == 401
+        shipment = Shipment.objects.get(pk=valid_shipment_with_articles.pk)
+        assert shipment.status == "in-transit"
+
+    def test_rejects_unknown_tokens(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token not-a-token")
+
+        assert self.post(scan("delivery", 5)).status_code == 401
+
+    def test_rejects_scans_of_other_carriers(
+        self, valid_shipment_with_articles
+    ):
+        self.client.credentials(HTTP_AUTHORIZATION="Token ups-token")
+
+        response = self.post(scan("delivery", 5))
+
+        assert response.status_code == 403
+        shipment = Shipment.objects.get(pk=valid_shipment_with_articles.pk)
+        assert shipment.status == "in-transit"
+
+    def test_reports_applied_and_skipped(self, valid_shipment_with_articles):
+        response = self.post(
+            scan("delivery", 5),
+            scan("transit", 1),
+            scan("transit", 1, tracking_number="TN00000001"),
+        )
+
+        assert response.status_code == 200
+        assert response.data == {"received": 3, "applied": 1, "skipped": 1}
+
+    def test_rejects_unknown_status(self, valid_shipment_with_articles):
+        response = self.post(scan("lost-in-space", 5))
+
+        assert response.status_code == 400
+        assert "status" in response.data["updates"][0]
+        shipment = Shipment.objects.get(pk=valid_shipment_with_articles.pk)
+        assert shipment.status == "in-transit"
+
+    def test_rejects_invalid_tracking_numbers(
+        self, valid_shipment_with_articles
+    ):
+        response = self.post(
+            scan("delivery", 5), scan("delivery", 5, tracking_number="X1")
+        )
+
+        assert response.status_code == 400
+        assert "tracking_number" in response.data["updates"][1]
+        shipment = Shipment.objects.get(pk=valid_shipment_with_articles.pk)
+        assert shipment.status == "in-transit"
+
+    def test_rejects_oversized_batches(self):
+        limit = settings.SHIPMENT_STATUS_UPDATE_MAX_BATCH
+
+        response = self.post(*[scan("transit", i) for i in range(limit + 1)])
+
+        assert response.status_code == 400
@@ -1,12 +1,21 @@
+from unittest.mock import patch
+
 import pytest
+from django.core.cache import cache
+from django.db.models import QuerySet
 from django.urls import reverse
 from rest_framework.test import APIClient
 
+from shipments.models import Shipment
+from shipments.tasks import process_csv_row
+from shipments.tracking import is_known_miss
+
 
 @pytest.mark.django_db
 class TestShipmentDetailView:
     def setup_method(self):
         self.client = APIClient()
+        cache.clear()
 
     def test_shipment_detail_success(self, valid_shipment_with_articles):
         shipment = valid_shipment_with_articles
@@ -75,3 +84,131 @@ class TestShipmentDetailView:
         assert response.data["tracking_number"] == shipment.tracking_number
         assert "articles" in response.data
         assert len(response.data["articles"]) == 0
+
+    @patch("shipments.views.get_weather", return_value={})
+    def test_shipment_detail_query_count(
+        self,
+        mock_get_weather,
+        valid_shipment_with_articles,
+        django_assert_num_queries,
+    ):
+        shipment = valid_shipment_with_articles
+        url = reverse(
+            "v1:shipments",
+            kwargs={
+                "tracking_number": shipment.tracking_number,
+                "carrier": shipment.carrier,
+            },
+        )
+
+        # The shipment, then its articles in one prefetch query.
+        with django_assert_num_queries(2):
+            assert self.client.get(url).status_code == 200
+
+    def test_implausible_tracking_number_skips_database(
+        self, django_assert_num_queries
+    ):
+        url = reverse(
+            "v1:shipments",
+            kwargs={"tracking_number": "not-a-number!", "carrier": "DHL"},
+        )
+
+        with django_assert_num_queries(0):
+            response = self.client.get(url)
+
+        assert response.status_code == 404
+        assert response.data["error"] == "Shipment not found"
+
+    def test_recent_miss_is_served_from_negative_cache(
+        self, django_assert_num_queries
+    ):
+        url = reverse(
+            "v1:shipments",
+            kwargs={"tracking_number": "TN99999999", "carrier": "UPS"},
+        )
+
+        with django_assert_num_queries(1):
+            assert self.client.get(url).status_code == 404
+        with django_assert_num_queries(0):
+            assert self.client.get(url).status_code == 404
+
+    def test_ingest_clears_negative_cache_entry(
+        self, django_capture_on_commit_callbacks
+    ):
+        url = reverse(
+            "v1:shipments",
+            kwargs={"tracking_number": "TN99999999", "carrier": "UPS"},
+        )
+        assert self.client.get(url).status_code == 404
+        assert is_known_miss("UPS", "TN99999999")
+
+        row = {
+            "tracking_number": "TN99999999",
+            "carrier": "UPS",
+            "sender_address": "Street 1, 10115 Berlin, Germany",
+            "receiver_address": "Street 10, 75001 Paris, France",
+            "status": "in-transit",
+            "article_name": "Laptop",
+            "article_quantity": "1",
+            "article_price": "800",
+            "SKU": "LP123",
+        }
+        with django_capture_on_commit_callbacks(execute=True):
+            process_csv_row(row, 1)
+
+        assert not is_known_miss("UPS", "TN99999999")
+        assert self.client.get(url).status_code == 200
+
+    @patch("shipments.views.get_weather", return_value={})
+    def test_replica_miss_is_read_again_on_primary(
+        self, mock_get_weather, valid_shipment_with_articles
+    ):
+        shipment = valid_shipment_with_articles
+        url = reverse(
+            "v1:shipments",
+            kwargs={
+                "tracking_number": shipment.tracking_number,
+                "carrier": shipment.carrier,
+            },
+        )
+        first = QuerySet.first
+
+        def lagging_replica_first(queryset):
+            # The replica has not received the shipment yet.
+            if queryset.db == "replica_1":
+                return None
+            return first(queryset)
+
+        with (
+            patch(
+                "Parcels.routers.ReplicaRouter.db_for_read",
+                side_effect=lambda model, **hints: (
+                    "replica_1" if model is Shipment else None
+                ),
+            ),
+            patch.object(QuerySet, "first", lagging_replica_first),
+        ):
+            response = self.client.get(url)
+
+        assert response.status_code == 200
+        assert not is_known_miss(shipment.carrier, shipment.tracking_number)
+
+    @patch("shipments.views.get_weather")
+    def test_weather_uses_stored_receiver_city(
+        self, mock_get_weather, valid_shipment_with_articles
+    ):
+        mock_get_weather.return_value = {"temp": 20.0, "description": "sun"}
+        shipment = valid_shipment_with_articles
+        url = reverse(
+            "v1:shipments",
+            kwargs={
+                "tracking_number": shipment.tracking_number,
+                "carrier": shipment.carrier,
+            },
+        )
+
+        response = self.client.get(url)
+
+        mock_get_weather.assert_called_once_with("paris")
+        assert response.data["receiver_city"] == "paris"
+        assert response.data["weather"] == {"temp": 20.0, "description": "sun"}
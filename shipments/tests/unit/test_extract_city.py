@@ -1,5 +1,10 @@
+from io import StringIO
+
 import pytest
+from django.core.management import call_command
 
+from shipments.addresses import normalize_place, parse_address
+from shipments.models import Shipment
 from shipments.views import ShipmentDetailView
 
 
@@ -28,3 +33,86 @@ class TestExtractCity:
         expected = "Berlin"
         result = ShipmentDetailView.extract_city(address)
         assert result == expected
+
+    def test_alphanumeric_postcode(self):
+        address = "Hauptstr. 5, D-10115 Berlin, Germany"
+        expected = "Berlin"
+        result = ShipmentDetailView.extract_city(address)
+        assert result == expected
+
+
+class TestParseAddress:
+    def test_city_and_country(self):
+        assert parse_address("Street 10, 75001 Paris, France") == (
+            "Paris",
+            "France",
+        )
+
+    def test_address_without_country(self):
+        assert parse_address("Street 10, 75001 Paris") == ("Paris", "")
+
+    def test_us_address(self):
+        assert parse_address("1 Main St, New York, NY 10001") == (
+            "New York",
+            "",
+        )
+
+    def test_us_address_with_country(self):
+        assert parse_address("1 Main St, New York, NY 10001, USA") == (
+            "New York",
+            "USA",
+        )
+
+    def test_city_before_postcode(self):
+        assert parse_address("Rue 5, Paris 75001, France") == (
+            "Paris",
+            "France",
+        )
+
+    def test_empty_address(self):
+        assert parse_address("") == ("", "")
+
+    def test_normalize_place(self):
+        assert normalize_place("  New   York ") == "new york"
+
+
+@pytest.mark.django_db
+class TestReceiverLocation:
+    def test_location_is_set_on_create(self, valid_shipment_with_articles):
+        shipment = Shipment.objects.get(pk=valid_shipment_with_articles.pk)
+
+        assert shipment.receiver_city == "paris"
+        assert shipment.receiver_country == "france"
+
+    def test_location_follows_address_update(self, shipment_without_articles):
+        shipment = shipment_without_articles
+        shipment.receiver_address = "Street 5, 28013 Madrid, Spain"
+        shipment.save(update_fields=["receiver_address"])
+
+        shipment.refresh_from_db()
+        assert shipment.receiver_city == "madrid"
+        assert shipment.receiver_country == "spain"
+
+    def test_long_segments_are_truncated(self):
+        shipment = Shipment.objects.create(
+            tracking_number="TN100",
+            carrier="DHL",
+            sender_address="Street 1, 10115 Berlin, Germany",
+            receiver_address=f"Street 1, 10115 {'B' * 300}, {'C' * 300}",
+            status="in-transit",
+        )
+
+        shipment.refresh_from_db()
+        assert shipment.receiver_city == "b" * 100
+        assert shipment.receiver_country == "c" * 100
+
+    def test_backfill_command(self, shipment_without_articles):
+        Shipment.objects.filter(pk=shipment_without_articles.pk).update(
+            receiver_city="", receiver_country=""
+        )
+
+        call_command("backfill_receiver_city", stdout=StringIO())
+
+        shipment_without_articles.refresh_from_db()
+        assert shipment_without_articles.receiver_city == "new york"
+        assert shipment_without_articles.receiver_country == "usa"
@@ -130,6 +130,21 @@ class TestRowProcessing:
         assert error is not None
         assert "Empty tracking number" in error
 
+    @pytest.mark.parametrize(
+        "tracking_number, carrier",
+        [("INVALID123", "DHL"), ("TN001", "Pigeon")],
+    )
+    def test_process_row_invalid_tracking_number(
+        self, csv_row, tracking_number, carrier
+    ):
+        row = csv_row(tracking_number, "SKU001", "29.99", carrier=carrier)
+
+        shipment_created, article_created, error = process_csv_row(row, 1)
+
+        assert (shipment_created, article_created) == (False, False)
+        assert "Invalid tracking number" in error
+        assert not Shipment.objects.exists()
+
 
 @pytest.mark.unit
 @pytest.mark.django_db
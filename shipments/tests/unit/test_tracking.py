@@ -0,0 +1,58 @@
+import pytest
+
+from shipments.tracking import (
+    forget_miss,
+    is_known_miss,
+    is_plausible_tracking_number,
+    remember_miss,
+)
+
+
+class TestTrackingNumberFormats:
+    @pytest.mark.parametrize(
+        "carrier, tracking_number",
+        [
+            ("DHL", "TN12345678"),
+            ("DHL", "1234567890"),
+            ("DHL", "JJD000390007827657001"),
+            ("UPS", "1Z999AA10123456784"),
+            ("DPD", "01234567890123"),
+            ("FedEx", "123456789012"),
+            ("GLS", "12345678901"),
+        ],
+    )
+    def test_plausible(self, carrier, tracking_number):
+        assert is_plausible_tracking_number(carrier, tracking_number)
+
+    @pytest.mark.parametrize(
+        "carrier, tracking_number",
+        [
+            ("DHL", "INVALID123"),
+            ("UPS", "1Z123"),
+            ("DPD", "0123456789012345"),
+            ("FedEx", "' OR 1=1 --"),
+            ("FAKECARRIER", "TN12345678"),
+            ("dhl", "TN12345678"),
+            ("DHL", ""),
+        ],
+    )
+    def test_implausible(self, carrier, tracking_number):
+        assert not is_plausible_tracking_number(carrier, tracking_number)
+
+
+class TestNegativeCache:
+    def setup_method(self):
+        from django.core.cache import cache
+
+        cache.clear()
+
+    def test_remember_and_forget_miss(self):
+        assert not is_known_miss("DHL", "TN001")
+
+        remember_miss("DHL", "TN001")
+        assert is_known_miss("DHL", "TN001")
+        assert not is_known_miss("DHL", "tn001")
+        assert not is_known_miss("UPS", "TN001")
+
+        forget_miss("DHL", "TN001")
+        assert not is_known_miss("DHL", "TN001")
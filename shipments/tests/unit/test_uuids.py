@@ -0,0 +1,45 @@
+import time
+from unittest.mock import patch
+
+from shipments.uuids import COUNTER_MAX, uuid7, uuid7_time
+
+
+class TestUuid7:
+
+    def test_version_and_variant(self):
+        value = uuid7()
+
+        assert value.version == 7
+        assert value.variant == "specified in RFC 4122"
+
+    def test_carries_the_time(self):
+        before = time.time_ns() // 1_000_000
+        value = uuid7()
+        after = time.time_ns() // 1_000_000
+
+        assert before <= uuid7_time(value) <= after
+
+    def test_strictly_increasing(self):
+        values = [uuid7() for _ in range(10000)]
+
+        assert values == sorted(values)
+        assert len(set(values)) == len(values)
+
+    def test_increasing_when_the_clock_goes_back(self):
+        first = uuid7()
+        with patch("shipments.uuids.time.time_ns", return_value=0):
+            second = uuid7()
+
+        assert second > first
+
+    def test_counter_overflow_moves_to_the_next_millisecond(self):
+        now_ns = time.time_ns() + 10**9
+        # Restores the module's last timestamp, left in the future, after.
+        with (
+            patch("shipments.uuids._last_ms", 0),
+            patch("shipments.uuids.time.time_ns", return_value=now_ns),
+        ):
+            values = [uuid7() for _ in range(COUNTER_MAX + 2)]
+
+        assert values == sorted(values)
+        assert uuid7_time(values[-1]) == now_ns // 1_000_000 + 1
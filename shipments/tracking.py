@@ -0,0 +1,91 @@
+"""
+Tracking number checks that let lookups skip the database.
+
+A lookup only reaches the database when the tracking number matches a
+format its carrier actually issues and the same key did not miss recently.
+"""
+
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Shipment
+
+# Our own seed/test tracking numbers, accepted for every carrier.
+INTERNAL_FORMAT = r"TN\d{3,12}"
+
+CARRIER_FORMATS = {
+    Shipment.Carrier.DHL: [
+        r"\d{10,11}",  # Express waybill
+        r"\d{20}",  # Parcel Germany
+        r"JJD\d{16,20}",
+        r"JVGL\d{8,20}",
+        r"3S[A-Z0-9]{8,20}",
+        r"[A-Z]{2}\d{9}[A-Z]{2}",  # UPU / international mail
+    ],
+    Shipment.Carrier.UPS: [
+        r"1Z[0-9A-Z]{16}",
+        r"T\d{10}",
+        r"\d{9}",
+        r"\d{26}",  # Mail Innovations
+    ],
+    Shipment.Carrier.DPD: [
+        r"\d{14}",
+        r"\d{28}",
+    ],
+    Shipment.Carrier.FEDEX: [
+        r"\d{12}",
+        r"\d{15}",
+        r"\d{20}",
+        r"\d{22}",
+        r"\d{34}",
+    ],
+    Shipment.Carrier.GLS: [
+        r"\d{11,12}",
+        r"\d{20}",
+        r"[A-Z0-9]{8}",
+    ],
+}
+
+TRACKING_NUMBER_PATTERNS = {
+    carrier.value: re.compile(
+        "|".join(f"(?:{fmt})" for fmt in [INTERNAL_FORMAT, *formats]),
+        re.IGNORECASE,
+    )
+    for carrier, formats in CARRIER_FORMATS.items()
+}
+
+
+def is_plausible_tracking_number(carrier, tracking_number):
+    """
+    Check a tracking number could have been issued by the carrier.
+
+    :param carrier: Carrier code, e.g. "DHL".
+    :param tracking_number: Tracking number as given by the client.
+
+    Returns: False for unknown carriers and malformed tracking numbers.
+    """
+    pattern = TRACKING_NUMBER_PATTERNS.get(carrier)
+    return bool(pattern and pattern.fullmatch(tracking_number))
+
+
+def negative_cache_key(carrier, tracking_number):
+    # Lookups are case-sensitive, so the key must be too.
+    return f"shipment_miss_{carrier}_{tracking_number}"
+
+
+def is_known_miss(carrier, tracking_number):
+    return bool(cache.get(negative_cache_key(carrier, tracking_number)))
+
+
+def remember_miss(carrier, tracking_number):
+    cache.set(
+        negative_cache_key(carrier, tracking_number),
+        True,
+        timeout=settings.SHIPMENT_NEGATIVE_CACHE_TIMEOUT,
+    )
+
+
+def forget_miss(carrier, tracking_number):
+    cache.delete(negative_cache_key(carrier, tracking_number))
@@ -1,11 +1,39 @@
 from django.urls import path
 
-from shipments.views import ShipmentDetailView
+from shipments.views import (
+    ShipmentDetailView,
+    ShipmentListView,
+    ShipmentSearchView,
+    ShipmentStatsView,
+    ShipmentStatusUpdateView,
+    shipment_events,
+)
 
 urlpatterns = [
+    path("shipments/", ShipmentListView.as_view(), name="shipment-list"),
+    path(
+        "shipments/search/",
+        ShipmentSearchView.as_view(),
+        name="shipment-search",
+    ),
+    path(
+        "shipments/stats/",
+        ShipmentStatsView.as_view(),
+        name="shipment-stats",
+    ),
+    path(
+        "shipments/status-updates/",
+        ShipmentStatusUpdateView.as_view(),
+        name="shipment-status-updates",
+    ),
     path(
         "shipments/<str:tracking_number>/<str:carrier>/",
         ShipmentDetailView.as_view(),
         name="shipments",
     ),
+    path(
+        "shipments/<str:tracking_number>/<str:carrier>/events/",
+        shipment_events,
+        name="shipment-events",
+    ),
 ]
@@ -0,0 +1,54 @@
+"""
+Time-ordered UUIDs (version 7, RFC 9562) for the ``uuid`` columns.
+
+Random version 4 keys land all over their unique index, so every insert
+dirties a random leaf page; with a 48-bit millisecond timestamp up front,
+new keys are appended to the right edge of the index like a sequence.
+
+Layout: unix_ts_ms (48 bits), version (4), counter (12), variant (2),
+random (62). The counter starts at a random value each millisecond and is
+incremented for every further UUID of the same millisecond, so the UUIDs of
+one process are strictly increasing (RFC 9562, section 6.2, method 1).
+"""
+
+import secrets
+import threading
+import time
+import uuid
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+COUNTER_MAX = 0xFFF
+
+
+def uuid7():
+    global _last_ms, _counter
+    with _lock:
+        now_ms = time.time_ns() // 1_000_000
+        if now_ms > _last_ms:
+            # Leave the upper half of the counter to count up into.
+            _last_ms, _counter = now_ms, secrets.randbits(11)
+        elif _counter < COUNTER_MAX:
+            # Same millisecond (or the clock went back): count up.
+            _counter += 1
+        else:
+            # Counter exhausted: borrow the next millisecond.
+            _last_ms, _counter = _last_ms + 1, secrets.randbits(11)
+        timestamp_ms, counter = _last_ms, _counter
+
+    return uuid.UUID(
+        int=(
+            timestamp_ms << 80
+            | 0x7 << 76
+            | counter << 64
+            | 0b10 << 62
+            | secrets.randbits(62)
+        )
+    )
+
+
+def uuid7_time(value):
+    """Returns: the unix time in milliseconds a version 7 UUID was made."""
+    return value.int >> 80
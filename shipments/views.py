@@ -1,19 +1,65 @@
+import asyncio
+import json
 import logging
 import re
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import QuerySet
+from django.http import JsonResponse, StreamingHttpResponse
 from drf_spectacular.utils import extend_schema
 from rest_framework import status
+from rest_framework.filters import OrderingFilter
+from rest_framework.generics import ListAPIView
+from rest_framework.pagination import CursorPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.views import APIView
 
 from weather.services import get_weather
 
-from .models import Shipment
-from .serializers import ShipmentSerializer
+from .addresses import parse_address
+from .authentication import CarrierTokenAuthentication
+from .events import CLOSED, subscription
+from .metrics import (
+    SHIPMENT_QUERY_SECONDS,
+    SHIPMENT_SERIALIZE_SECONDS,
+    STATUS_UPDATES,
+)
+from .models import Shipment, ShipmentDailyRollup
+from .permissions import CarrierOwnsUpdates
+from .search import encode_cursor, search_shipments
+from .serializers import (
+    ShipmentListFilterSerializer,
+    ShipmentListSerializer,
+    ShipmentSearchFilterSerializer,
+    ShipmentSearchSerializer,
+    ShipmentSerializer,
+    ShipmentStatsFilterSerializer,
+    ShipmentStatsSerializer,
+    StatusUpdateRequestSerializer,
+    StatusUpdateResultSerializer,
+)
+from .status_updates import apply_status_updates, latest_scans
+from .tracking import is_known_miss, is_plausible_tracking_number, remember_miss
 
 logger = logging.getLogger(__name__)
 
 
+def read_on_primary_if_missed(queryset, read):
+    """
+    Returns: read(queryset), read again on the primary if it found nothing
+    on a replica. A lagging replica may not have a just-ingested shipment
+    yet, and remember_miss() must only cache a miss the primary confirms.
+    """
+    result = read(queryset)
+    if not result and queryset.db != DEFAULT_DB_ALIAS:
+        result = read(queryset.using(DEFAULT_DB_ALIAS))
+    return result
+
+
 @extend_schema(responses={200: ShipmentSerializer})
 class ShipmentDetailView(APIView):
     """Shipment Detail View."""
@@ -24,35 +70,43 @@ class ShipmentDetailView(APIView):
     def extract_city(receiver_address: str) -> str:
         """
         Extracts the city name from a formatted address.
-        Assumes city is the second-to-last comma-separated part, and removes numeric tokens like ZIP codes.
+        Used for shipments stored before receiver_city was populated.
         """
-        parts = [part.strip() for part in receiver_address.split(",")]
-
-        if len(parts) < 2:
-            return ""
-
-        city_with_zip = parts[-2]
-        words = city_with_zip.split()
-
-        city = " ".join(word for word in words if not word.isdigit())
+        city, _ = parse_address(receiver_address)
         return city
 
+    @staticmethod
+    def not_found():
+        return Response(
+            {"error": "Shipment not found"},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+
     def get(self, request, tracking_number, carrier):
         try:
-            shipment = (
-                Shipment.objects.prefetch_related("articles")
-                .filter(tracking_number=tracking_number, carrier=carrier)
-                .first()
-            )
+            # Reject malformed and recently missed keys without a query.
+            if not is_plausible_tracking_number(
+                carrier, tracking_number
+            ) or is_known_miss(carrier, tracking_number):
+                return self.not_found()
 
-            if not shipment:
-                return Response(
-                    {"error": "Shipment not found"},
-                    status=status.HTTP_404_NOT_FOUND,
+            with SHIPMENT_QUERY_SECONDS.time():
+                shipment = read_on_primary_if_missed(
+                    Shipment.objects.prefetch_related("articles").filter(
+                        tracking_number=tracking_number, carrier=carrier
+                    ),
+                    QuerySet.first,
                 )
 
-            data = self.serializer_class(shipment).data
-            city = self.extract_city(receiver_address=shipment.receiver_address)
+            if not shipment:
+                remember_miss(carrier, tracking_number)
+                return self.not_found()
+
+            with SHIPMENT_SERIALIZE_SECONDS.time():
+                data = self.serializer_class(shipment).data
+            city = shipment.receiver_city or self.extract_city(
+                receiver_address=shipment.receiver_address
+            )
 
             try:
                 data["weather"] = get_weather(city)
@@ -72,3 +126,295 @@ class ShipmentDetailView(APIView):
                 {"error": "Internal server error"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
+
+
+class ShipmentOrdering(OrderingFilter):
+    """Breaks ties by id, in the direction of the requested ordering."""
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if ordering[0].lstrip("-") == "id":
+            return ordering
+        return [*ordering, "-id" if ordering[0].startswith("-") else "id"]
+
+
+class ShipmentCursorPagination(CursorPagination):
+    # Cursors, not page numbers: no COUNT(*) over the table, and deep pages
+    # cost the same as the first.
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+
+# Filter parameter -> lookup on the aggregates kept on Shipment.
+AGGREGATE_FILTERS = {
+    "min_article_count": "article_count__gte",
+    "max_article_count": "article_count__lte",
+    "min_total_value": "total_value__gte",
+    "max_total_value": "total_value__lte",
+}
+
+
+@extend_schema(parameters=[ShipmentListFilterSerializer])
+class ShipmentListView(ListAPIView):
+    """
+    List shipments without their articles, filtered and sorted by article
+    count and total value. Both are kept on the shipment, so listing reads
+    no articles.
+    """
+
+    serializer_class = ShipmentListSerializer
+    pagination_class = ShipmentCursorPagination
+    filter_backends = [ShipmentOrdering]
+    ordering_fields = ["article_count", "total_value", "created", "id"]
+    ordering = ["id"]
+
+    def get_queryset(self):
+        filters = ShipmentListFilterSerializer(data=self.request.query_params)
+        filters.is_valid(raise_exception=True)
+        return Shipment.objects.filter(
+            **{
+                AGGREGATE_FILTERS[name]: value
+                for name, value in filters.validated_data.items()
+            }
+        )
+
+
+@extend_schema(
+    parameters=[ShipmentSearchFilterSerializer],
+    responses={200: ShipmentSearchSerializer},
+)
+class ShipmentSearchView(APIView):
+    """
+    Shipments whose sender or receiver address, or one of whose articles'
+    name or SKU, contains the search term; best match first. See
+    shipments.search.
+    """
+
+    def get(self, request):
+        filters = ShipmentSearchFilterSerializer(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+        params = filters.validated_data
+        page_size = params["page_size"]
+
+        # One more than a page, to know whether there is a next one.
+        matches, truncated = search_shipments(
+            params["q"], page_size + 1, after=params.get("cursor")
+        )
+        has_next = len(matches) > page_size
+        matches = matches[:page_size]
+
+        shipments = Shipment.objects.in_bulk(
+            [shipment_id for shipment_id, _ in matches]
+        )
+        results = []
+        for shipment_id, rank in matches:
+            shipment = shipments.get(shipment_id)
+            # Unless deleted since the search.
+            if shipment is not None:
+                shipment.rank = rank
+                results.append(shipment)
+
+        next_url = None
+        if has_next:
+            last_id, last_rank = matches[-1]
+            next_url = replace_query_param(
+                request.build_absolute_uri(),
+                "cursor",
+                encode_cursor(last_rank, last_id),
+            )
+        return Response(
+            ShipmentSearchSerializer(
+                {"next": next_url, "truncated": truncated, "results": results}
+            ).data
+        )
+
+
+@extend_schema(
+    parameters=[ShipmentStatsFilterSerializer],
+    responses={200: ShipmentStatsSerializer},
+)
+class ShipmentStatsView(APIView):
+    """
+    Shipments and their total article value per day created, carrier and
+    status. Read from a rollup kept current by every write (and reconciled
+    periodically), never from the shipments themselves.
+    """
+
+    def get(self, request):
+        filters = ShipmentStatsFilterSerializer(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+        params = filters.validated_data
+
+        rows = list(
+            ShipmentDailyRollup.objects.filter(
+                day__range=(params["date_from"], params["date_to"]),
+                **{
+                    name: params[name]
+                    for name in ("carrier", "status")
+                    if name in params
+                },
+            )
+            .exclude(shipment_count=0, total_value=0)
+            .order_by("day", "carrier", "status")
+        )
+
+        return Response(
+            ShipmentStatsSerializer(
+                {
+                    "date_from": params["date_from"],
+                    "date_to": params["date_to"],
+                    "shipment_count": sum(row.shipment_count for row in rows),
+                    "total_value": sum(row.total_value for row in rows),
+                    "rows": rows,
+                }
+            ).data
+        )
+
+
+@extend_schema(
+    request=StatusUpdateRequestSerializer,
+    responses={200: StatusUpdateResultSerializer},
+)
+class ShipmentStatusUpdateView(APIView):
+    """
+    Apply a batch of carrier status scans. Scans older than the one that
+    set a shipment's current status are skipped, so scans may be sent out
+    of order and retried.
+
+    Carriers authenticate with their API token and may only post scans of
+    their own shipments.
+    """
+
+    authentication_classes = [CarrierTokenAuthentication]
+    permission_classes = [CarrierOwnsUpdates]
+
+    def post(self, request):
+        serializer = StatusUpdateRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        scans = serializer.validated_data["updates"]
+
+        shipments = len(latest_scans(scans))
+        applied = len(apply_status_updates(scans))
+        STATUS_UPDATES.labels(result="applied").inc(applied)
+        STATUS_UPDATES.labels(result="skipped").inc(shipments - applied)
+
+        return Response(
+            StatusUpdateResultSerializer(
+                {
+                    "received": len(scans),
+                    "applied": applied,
+                    "skipped": shipments - applied,
+                }
+            ).data
+        )
+
+
+# Milliseconds a browser waits before reconnecting an ended stream.
+EVENT_STREAM_RETRY_MS = 3000
+
+
+def in_worker_thread(func):
+    """
+    Run func in a worker thread and give its database connections back
+    afterwards: a stream lives for minutes and must not hold one.
+    """
+
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            connections.close_all()
+
+    return sync_to_async(wrapper, thread_sensitive=False)
+
+
+@in_worker_thread
+def find_shipment(tracking_number, carrier):
+    """Returns: whether the shipment exists, after the 404 fast paths."""
+    if not is_plausible_tracking_number(
+        carrier, tracking_number
+    ) or is_known_miss(carrier, tracking_number):
+        return False
+    exists = read_on_primary_if_missed(
+        Shipment.objects.filter(
+            tracking_number=tracking_number, carrier=carrier
+        ),
+        QuerySet.exists,
+    )
+    if not exists:
+        remember_miss(carrier, tracking_number)
+    return exists
+
+
+@in_worker_thread
+def load_shipment_json(tracking_number, carrier):
+    """
+    Returns: the shipment serialized as in ShipmentDetailView, without
+    weather, or None. Reads the primary: events are published when the
+    change commits there, and a replica may not have it yet.
+    """
+    shipment = (
+        Shipment.objects.using(DEFAULT_DB_ALIAS)
+        .prefetch_related("articles")
+        .filter(tracking_number=tracking_number, carrier=carrier)
+        .first()
+    )
+    if shipment is None:
+        return None
+    return json.dumps(ShipmentSerializer(shipment).data, cls=DjangoJSONEncoder)
+
+
+def server_sent_event(event, data):
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+async def shipment_event_stream(tracking_number, carrier):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.SHIPMENT_EVENTS_MAX_DURATION
+
+    async with subscription(carrier, tracking_number) as queue:
+        # Loaded after subscribing, so no change can fall in between.
+        data = await load_shipment_json(tracking_number, carrier)
+        yield f"retry: {EVENT_STREAM_RETRY_MS}\n"
+        while data is not None:
+            yield server_sent_event("shipment", data)
+            while True:
+                timeout = min(
+                    settings.SHIPMENT_EVENTS_HEARTBEAT, deadline - loop.time()
+                )
+                if timeout <= 0:
+                    # The client reconnects and gets a fresh snapshot.
+                    return
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if message is CLOSED:
+                    return
+                changed = await load_shipment_json(tracking_number, carrier)
+                if changed != data:
+                    data = changed
+                    break
+        yield server_sent_event("deleted", "{}")
+
+
+async def shipment_events(request, tracking_number, carrier):
+    """
+    Server-sent events for one shipment: its current state, then its new
+    state each time its status or articles change. An alternative to
+    polling ShipmentDetailView; serve it from ASGI, where an idle stream
+    holds no thread or database connection.
+    """
+    if not await find_shipment(tracking_number, carrier):
+        return JsonResponse({"error": "Shipment not found"}, status=404)
+
+    response = StreamingHttpResponse(
+        shipment_event_stream(tracking_number, carrier),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    # Don't let nginx buffer the stream.
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -25,3 +25,21 @@ def format(c):
     black(c)
     isort(c)
     flake8(c)
+
+
+@task
+def schema(c):
+    """Regenerate the committed OpenAPI schema (checked by the test suite)."""
+    c.run("python manage.py spectacular --file schema.yml")
+
+
+@task
+def scale_tests(c, shipments=200000):
+    """Run the query-plan tests against a large synthetic dataset."""
+    c.run(
+        "pytest shipments/tests/scale",
+        env={
+            "RUN_SCALE_TESTS": "True",
+            "SCALE_TEST_SHIPMENTS": str(shipments),
+        },
+    )
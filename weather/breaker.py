@@ -0,0 +1,81 @@
+"""
+Circuit breaker with its state in the Django cache.
+
+Keeping the state in the shared cache (Redis) means every web and Celery
+worker sees the same circuit: once the upstream is declared down, no worker
+keeps paying its timeouts.
+"""
+
+import logging
+import time
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after ``failure_threshold`` consecutive failures.
+    Open -> half-open once ``reset_timeout`` seconds have passed; a single
+    caller across all workers is then let through as a probe. A successful
+    probe closes the circuit, a failed one opens it again.
+
+    :param name: Name used in the cache keys.
+    :param failure_threshold: Consecutive failures that open the circuit.
+    :param reset_timeout: Seconds the circuit stays open before a probe.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures_key = f"circuit_{name}_failures"
+        self.opened_at_key = f"circuit_{name}_opened_at"
+        self.probe_key = f"circuit_{name}_probe"
+
+    @property
+    def state(self):
+        opened_at = cache.get(self.opened_at_key)
+        if opened_at is None:
+            return self.CLOSED
+        if time.time() - opened_at < self.reset_timeout:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    def allow_request(self):
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.OPEN:
+            return False
+        # Half-open: only the caller that wins the add() probes.
+        return cache.add(self.probe_key, True, timeout=self.reset_timeout)
+
+    def record_success(self):
+        if cache.get(self.failures_key) or cache.get(self.opened_at_key):
+            cache.delete_many(
+                [self.failures_key, self.opened_at_key, self.probe_key]
+            )
+            logger.info(f"Circuit {self.name} closed")
+
+    def record_failure(self):
+        cache.add(self.failures_key, 0, timeout=None)
+        try:
+            failures = cache.incr(self.failures_key)
+        except ValueError:
+            # Evicted between add() and incr().
+            failures = 1
+            cache.set(self.failures_key, failures, timeout=None)
+
+        if failures >= self.failure_threshold:
+            cache.set(self.opened_at_key, time.time(), timeout=None)
+            cache.delete(self.probe_key)
+            logger.warning(
+                f"Circuit {self.name} open after {failures} consecutive "
+                f"failures, retrying in {self.reset_timeout}s"
+            )
@@ -0,0 +1,166 @@
+"""
+HTTP client for the OpenWeatherMap API.
+
+One ``WeatherClient`` per process owns a pooled ``requests.Session``, so
+calls reuse kept-alive connections instead of paying a TCP+TLS handshake
+each time. Every call is bounded by connect/read timeouts and retried a
+limited number of times with jittered exponential backoff.
+"""
+
+import logging
+import threading
+import time
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def build_session(retries, backoff_factor, backoff_jitter, pool_size):
+    """
+    ``requests.Session`` with a sized connection pool and retries of GETs on
+    connection errors, read timeouts and retryable statuses.
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        backoff_jitter=backoff_jitter,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET"}),
+        raise_on_status=False,
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=2, pool_maxsize=pool_size, max_retries=retry
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class WeatherClient:
+    """
+    OpenWeatherMap client with a sized connection pool.
+
+    :param api_key: OpenWeatherMap API key.
+    :param geocode_url: Direct geocoding endpoint.
+    :param weather_url: Current weather endpoint.
+    :param connect_timeout: Seconds to wait for a connection.
+    :param read_timeout: Seconds to wait for a response once connected.
+    :param retries: Retries after the first attempt, for connection errors,
+        read timeouts and retryable statuses.
+    :param backoff_factor: Base of the exponential backoff between retries.
+    :param backoff_jitter: Upper bound of random seconds added to a backoff.
+    :param pool_size: Connections kept alive per host.
+    """
+
+    def __init__(
+        self,
+        api_key,
+        geocode_url,
+        weather_url,
+        connect_timeout=2.0,
+        read_timeout=5.0,
+        retries=2,
+        backoff_factor=0.2,
+        backoff_jitter=0.1,
+        pool_size=10,
+    ):
+        self.api_key = api_key
+        self.geocode_url = geocode_url
+        self.weather_url = weather_url
+        self.timeout = (connect_timeout, read_timeout)
+        self.latency_observers = []
+
+        self.session = build_session(
+            retries, backoff_factor, backoff_jitter, pool_size
+        )
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            api_key=settings.OPENWEATHERMAP_API_KEY,
+            geocode_url=settings.OPENWEATHERMAP_GEOCODE_URL,
+            weather_url=settings.OPENWEATHERMAP_WEATHER_URL,
+            connect_timeout=settings.WEATHER_HTTP_CONNECT_TIMEOUT,
+            read_timeout=settings.WEATHER_HTTP_READ_TIMEOUT,
+            retries=settings.WEATHER_HTTP_RETRIES,
+            backoff_factor=settings.WEATHER_HTTP_BACKOFF_FACTOR,
+            backoff_jitter=settings.WEATHER_HTTP_BACKOFF_JITTER,
+            pool_size=settings.WEATHER_HTTP_POOL_SIZE,
+        )
+
+    def add_latency_observer(self, observer):
+        """
+        Register ``observer(endpoint, seconds, status_code)``, called after
+        every call (retries included). ``status_code`` is None when no
+        response was received.
+        """
+        self.latency_observers.append(observer)
+
+    def get_json(self, endpoint, url, params):
+        start = time.perf_counter()
+        status_code = None
+        try:
+            response = self.session.get(
+                url,
+                params={**params, "appid": self.api_key},
+                timeout=self.timeout,
+            )
+            status_code = response.status_code
+            response.raise_for_status()
+            return response.json()
+        finally:
+            elapsed = time.perf_counter() - start
+            logger.debug(f"Weather API {endpoint} took {elapsed * 1000:.1f}ms")
+            for observer in self.latency_observers:
+                try:
+                    observer(endpoint, elapsed, status_code)
+                except Exception as e:
+                    logger.warning(f"Latency observer failed: {e}")
+
+    def geocode(self, city):
+        """
+        Returns: list of matches with "lat"/"lon", empty if none.
+        """
+        return self.get_json(
+            "geocode", self.geocode_url, {"q": city, "limit": 1}
+        )
+
+    def current_weather(self, lat, lon):
+        return self.get_json(
+            "weather",
+            self.weather_url,
+            {"lat": lat, "lon": lon, "units": "metric"},
+        )
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Process-wide client, created from settings on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = WeatherClient.from_settings()
+    return _client
+
+
+def reset_client():
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
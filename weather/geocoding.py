@@ -0,0 +1,78 @@
+"""
+City -> (lat, lon) resolution.
+
+Coordinates never change, so they are stored in ``CityLocation`` the first
+time the geocoding API resolves a city (or in bulk from the bundled
+gazetteer) and served from an in-process LRU in front of that table.
+"""
+
+import logging
+from functools import lru_cache
+
+from Parcels.timing import timed
+
+from .client import get_client
+from .models import CityLocation
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_city(city):
+    return " ".join(city.split()).lower()
+
+
+@lru_cache(maxsize=4096)
+def _stored_coordinates(name):
+    # Raises DoesNotExist on a miss; lru_cache does not cache exceptions, so
+    # a city geocoded later by another process is picked up on the next call.
+    location = CityLocation.objects.only("latitude", "longitude").get(name=name)
+    return location.latitude, location.longitude
+
+
+def clear_coordinates_cache():
+    _stored_coordinates.cache_clear()
+
+
+@timed("http")
+def geocode(city):
+    """
+    Resolve a city through the OpenWeatherMap geocoding API.
+
+    Returns: (lat, lon)
+    """
+    geo_data = get_client().geocode(city)
+
+    if not geo_data:
+        raise ValueError(f"No coordinates found for {city}")
+
+    return geo_data[0]["lat"], geo_data[0]["lon"]
+
+
+def get_coordinates(city):
+    """
+    Coordinates of a city, geocoding and storing it on first use.
+
+    :param city: City name, in any case.
+
+    Returns: (lat, lon)
+    """
+    name = normalize_city(city)
+    if not name:
+        raise ValueError("No city given")
+
+    try:
+        return _stored_coordinates(name)
+    except CityLocation.DoesNotExist:
+        pass
+
+    lat, lon = geocode(city)
+    CityLocation.objects.get_or_create(
+        name=name,
+        defaults={
+            "latitude": lat,
+            "longitude": lon,
+            "source": CityLocation.Source.GEOCODING_API,
+        },
+    )
+    logger.info(f"Stored coordinates for {name}")
+    return lat, lon
@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from weather.testing import FakeOpenWeatherMapServer
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a local stand-in for the OpenWeatherMap and Open-Meteo APIs. "
+        "Point OPENWEATHERMAP_GEOCODE_URL, OPENWEATHERMAP_WEATHER_URL and "
+        "OPEN_METEO_URL at it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", type=str, default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8081)
+        parser.add_argument(
+            "--latency",
+            type=float,
+            default=0.05,
+            help="Seconds to wait before each answer",
+        )
+        parser.add_argument(
+            "--error-rate",
+            type=float,
+            default=0.0,
+            help="Fraction of requests answered with HTTP 503",
+        )
+
+    def handle(self, *args, **options):
+        server = FakeOpenWeatherMapServer(
+            host=options["host"],
+            port=options["port"],
+            latency=options["latency"],
+            error_rate=options["error_rate"],
+        )
+        with server:
+            self.stdout.write(
+                self.style.SUCCESS(f"Fake weather API on {server.url}")
+            )
+            self.stdout.write(
+                f"OPENWEATHERMAP_GEOCODE_URL={server.geocode_url}"
+            )
+            self.stdout.write(
+                f"OPENWEATHERMAP_WEATHER_URL={server.weather_url}"
+            )
+            self.stdout.write(f"OPEN_METEO_URL={server.open_meteo_url}")
+            try:
+                while True:
+                    time.sleep(60)
+            except KeyboardInterrupt:
+                pass
+        self.stdout.write(f"Requests served: {dict(server.requests)}")
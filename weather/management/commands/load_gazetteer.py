@@ -0,0 +1,53 @@
+import csv
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from weather.geocoding import clear_coordinates_cache, normalize_city
+from weather.models import CityLocation
+
+
+class Command(BaseCommand):
+    help = "Load city coordinates from the offline gazetteer CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--csv",
+            type=str,
+            default=os.path.join(settings.BASE_DIR, "data", "gazetteer.csv"),
+            help="Path to a CSV with name, country, latitude, longitude",
+        )
+
+    def handle(self, *args, **options):
+        csv_path = options["csv"]
+
+        if not os.path.exists(csv_path):
+            raise CommandError(f"CSV file not found: {csv_path}")
+
+        with open(csv_path, newline="", encoding="utf-8") as csvfile:
+            locations = [
+                CityLocation(
+                    name=normalize_city(row["name"]),
+                    country=row.get("country", "").strip().upper(),
+                    latitude=float(row["latitude"]),
+                    longitude=float(row["longitude"]),
+                    source=CityLocation.Source.GAZETTEER,
+                )
+                for row in csv.DictReader(csvfile)
+            ]
+
+        # Cities already known (from the API or an earlier load) are kept.
+        before = CityLocation.objects.count()
+        CityLocation.objects.bulk_create(
+            locations, batch_size=1000, ignore_conflicts=True
+        )
+        created = CityLocation.objects.count() - before
+        clear_coordinates_cache()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Loaded {created} new cities from {csv_path} "
+                f"({len(locations) - created} already known)"
+            )
+        )
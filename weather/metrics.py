@@ -0,0 +1,22 @@
+from prometheus_client import Counter, Histogram
+
+from Parcels.metrics import LATENCY_BUCKETS
+
+WEATHER_CACHE_LOOKUPS = Counter(
+    "parcels_weather_cache_lookups",
+    "Weather lookups by outcome: fresh hit, stale value served, or miss.",
+    ["result"],
+)
+
+WEATHER_UPSTREAM_SECONDS = Histogram(
+    "parcels_weather_upstream_duration_seconds",
+    "Time taken by weather provider calls, including failed ones.",
+    ["provider"],
+    buckets=LATENCY_BUCKETS,
+)
+
+WEATHER_UPSTREAM_ERRORS = Counter(
+    "parcels_weather_upstream_errors",
+    "Failed weather provider calls, by kind of failure.",
+    ["provider", "reason"],
+)
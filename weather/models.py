@@ -1,3 +1,19 @@
 from django.db import models
+from django_extensions.db.models import TimeStampedModel
 
-# Create your models here.
+
+class CityLocation(TimeStampedModel):
+    """Coordinates of a city, keyed by its normalized name."""
+
+    class Source(models.TextChoices):
+        GAZETTEER = "gazetteer", "Gazetteer"
+        GEOCODING_API = "geocoding-api", "Geocoding API"
+
+    name = models.CharField(max_length=100, unique=True)
+    country = models.CharField(max_length=2, blank=True, default="")
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    source = models.CharField(max_length=20, choices=Source.choices)
+
+    def __str__(self):
+        return self.name
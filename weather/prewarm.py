@@ -0,0 +1,104 @@
+"""
+Refresh cached weather before it expires, so requests rarely wait on the
+upstream API.
+"""
+
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .breaker import CircuitBreaker
+from .ratelimit import TokenBucket
+from .services import (
+    WEATHER_CACHE_VERSION,
+    breaker,
+    lookup_count_key,
+    refresh_weather,
+    weather_cache_key,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def prewarm_bucket():
+    """
+    Rate limiter sized to the share of the API plan reserved for prewarming;
+    the rest is left to cache misses on the request path.
+    """
+    rate = (
+        settings.WEATHER_API_CALLS_PER_MINUTE
+        * settings.WEATHER_PREWARM_RATE_SHARE
+        / 60
+    )
+    return TokenBucket(rate=rate, capacity=max(1.0, rate * 10))
+
+
+def cities_to_refresh(cities, horizon):
+    """
+    Cities whose weather is missing or stops being fresh within ``horizon``
+    seconds, most looked-up first.
+    """
+    cities = {city.lower() for city in cities if city}
+    if not cities:
+        return []
+
+    entries = cache.get_many(
+        [weather_cache_key(city) for city in cities],
+        version=WEATHER_CACHE_VERSION,
+    )
+    counts = cache.get_many([lookup_count_key(city) for city in cities])
+
+    expires_before = time.time() + horizon
+    due = [
+        city
+        for city in cities
+        if entries.get(weather_cache_key(city), {}).get("fresh_until", 0)
+        < expires_before
+    ]
+    return sorted(
+        due, key=lambda city: (-counts.get(lookup_count_key(city), 0), city)
+    )
+
+
+def prewarm_weather(cities, time_budget, bucket=None):
+    """
+    Refresh due cities under the rate limiter.
+
+    :param cities: Candidate city names.
+    :param time_budget: Seconds the run may take; cities that do not get a
+        token in time are left for the next run.
+    :param bucket: TokenBucket to draw from, defaults to prewarm_bucket().
+
+    Returns: dict with candidates, due, refreshed, failed and deferred counts.
+    """
+    bucket = bucket or prewarm_bucket()
+    deadline = time.monotonic() + time_budget
+    due = cities_to_refresh(
+        cities,
+        horizon=settings.WEATHER_PREWARM_INTERVAL
+        + settings.WEATHER_PREWARM_MARGIN,
+    )
+
+    refreshed = failed = 0
+    for city in due:
+        if breaker.state != CircuitBreaker.CLOSED:
+            logger.warning("Weather circuit not closed, stopping prewarm")
+            break
+        if not bucket.acquire(timeout=deadline - time.monotonic()):
+            break
+
+        if refresh_weather(city):
+            refreshed += 1
+        else:
+            failed += 1
+
+    processed = refreshed + failed
+    return {
+        "candidates": len(set(city.lower() for city in cities if city)),
+        "due": len(due),
+        "refreshed": refreshed,
+        "failed": failed,
+        "deferred": len(due) - processed,
+    }
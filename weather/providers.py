@@ -0,0 +1,313 @@
+"""
+Pluggable current-weather providers, with hedged requests across them.
+
+Providers are looked up by name in a registry and configured, in order of
+preference, by ``WEATHER_PROVIDERS``. Each returns the same
+``{"temp", "description"}`` shape. With more than one configured, a call
+goes to the first; if it has not answered within its recent p95 latency
+(or has failed), the next is called too and the first answer wins.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+from django.conf import settings
+
+from Parcels.timing import timed
+
+from .client import build_session, get_client
+from .metrics import WEATHER_UPSTREAM_ERRORS, WEATHER_UPSTREAM_SECONDS
+
+logger = logging.getLogger(__name__)
+
+HEDGE_PERCENTILE = 95
+# Latency samples kept per provider, and needed before the percentile is
+# trusted over WEATHER_HEDGE_DEFAULT_DELAY.
+LATENCY_WINDOW = 200
+LATENCY_MIN_SAMPLES = 20
+
+# WMO weather interpretation codes used by Open-Meteo.
+WMO_DESCRIPTIONS = {
+    0: "clear sky",
+    1: "mainly clear",
+    2: "partly cloudy",
+    3: "overcast",
+    45: "fog",
+    48: "depositing rime fog",
+    51: "light drizzle",
+    53: "moderate drizzle",
+    55: "dense drizzle",
+    56: "light freezing drizzle",
+    57: "dense freezing drizzle",
+    61: "slight rain",
+    63: "moderate rain",
+    65: "heavy rain",
+    66: "light freezing rain",
+    67: "heavy freezing rain",
+    71: "slight snow fall",
+    73: "moderate snow fall",
+    75: "heavy snow fall",
+    77: "snow grains",
+    80: "slight rain showers",
+    81: "moderate rain showers",
+    82: "violent rain showers",
+    85: "slight snow showers",
+    86: "heavy snow showers",
+    95: "thunderstorm",
+    96: "thunderstorm with slight hail",
+    99: "thunderstorm with heavy hail",
+}
+
+
+class WeatherProvider:
+    """Base class; subclasses set ``name`` and implement current_weather."""
+
+    name = None
+
+    def current_weather(self, lat, lon):
+        """Returns: {"temp": <celsius>, "description": <text>}."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class OpenWeatherMapProvider(WeatherProvider):
+    name = "openweathermap"
+
+    def current_weather(self, lat, lon):
+        weather_data = get_client().current_weather(lat, lon)
+        return {
+            "temp": weather_data["main"]["temp"],
+            "description": weather_data["weather"][0]["description"],
+        }
+
+
+class OpenMeteoProvider(WeatherProvider):
+    """
+    Open-Meteo forecast API; needs no API key.
+
+    :param url: Forecast endpoint.
+    :param timeout: (connect, read) timeout in seconds.
+    :param session: Session to send requests with.
+    """
+
+    name = "open-meteo"
+
+    def __init__(self, url, timeout, session):
+        self.url = url
+        self.timeout = timeout
+        self.session = session
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            url=settings.OPEN_METEO_URL,
+            timeout=(
+                settings.WEATHER_HTTP_CONNECT_TIMEOUT,
+                settings.WEATHER_HTTP_READ_TIMEOUT,
+            ),
+            session=build_session(
+                retries=settings.WEATHER_HTTP_RETRIES,
+                backoff_factor=settings.WEATHER_HTTP_BACKOFF_FACTOR,
+                backoff_jitter=settings.WEATHER_HTTP_BACKOFF_JITTER,
+                pool_size=settings.WEATHER_HTTP_POOL_SIZE,
+            ),
+        )
+
+    def current_weather(self, lat, lon):
+        response = self.session.get(
+            self.url,
+            params={
+                "latitude": lat,
+                "longitude": lon,
+                "current": "temperature_2m,weather_code",
+            },
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        current = response.json()["current"]
+        return {
+            "temp": current["temperature_2m"],
+            "description": WMO_DESCRIPTIONS.get(
+                current["weather_code"], "unknown"
+            ),
+        }
+
+    def close(self):
+        self.session.close()
+
+
+class LatencyWindow:
+    """Most recent call durations of a provider."""
+
+    def __init__(self, size=LATENCY_WINDOW):
+        self.samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self.samples.append(seconds)
+
+    def percentile(self, percent):
+        """Returns: None until LATENCY_MIN_SAMPLES have been recorded."""
+        with self._lock:
+            samples = sorted(self.samples)
+        if len(samples) < LATENCY_MIN_SAMPLES:
+            return None
+        index = min(len(samples) - 1, int(len(samples) * percent / 100))
+        return samples[index]
+
+
+PROVIDER_FACTORIES = {
+    OpenWeatherMapProvider.name: OpenWeatherMapProvider,
+    OpenMeteoProvider.name: OpenMeteoProvider.from_settings,
+}
+
+_providers = {}
+_latencies = {}
+_executor = None
+_lock = threading.Lock()
+
+
+def register_provider(name, factory):
+    """
+    Make ``factory()`` the provider for ``name``, replacing any previous
+    one, e.g. with a local fake in tests.
+    """
+    with _lock:
+        PROVIDER_FACTORIES[name] = factory
+        stale = _providers.pop(name, None)
+        _latencies.pop(name, None)
+    if stale is not None:
+        stale.close()
+
+
+def get_provider(name):
+    """Process-wide provider instance, created on first use."""
+    provider = _providers.get(name)
+    if provider is None:
+        with _lock:
+            provider = _providers.get(name)
+            if provider is None:
+                provider = PROVIDER_FACTORIES[name]()
+                _providers[name] = provider
+    return provider
+
+
+def get_providers():
+    return [get_provider(name) for name in settings.WEATHER_PROVIDERS]
+
+
+def reset_providers():
+    with _lock:
+        providers = list(_providers.values())
+        _providers.clear()
+        _latencies.clear()
+    for provider in providers:
+        provider.close()
+
+
+def latency_window(name):
+    with _lock:
+        return _latencies.setdefault(name, LatencyWindow())
+
+
+def hedge_delay(name):
+    """Seconds to wait on provider ``name`` before hedging."""
+    p95 = latency_window(name).percentile(HEDGE_PERCENTILE)
+    if p95 is None:
+        return settings.WEATHER_HEDGE_DEFAULT_DELAY
+    return max(p95, settings.WEATHER_HEDGE_MIN_DELAY)
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.WEATHER_HEDGE_MAX_WORKERS,
+                    thread_name_prefix="weather-hedge",
+                )
+    return _executor
+
+
+def error_reason(error):
+    """Bounded label value for a provider failure."""
+    if isinstance(error, requests.Timeout):
+        return "timeout"
+    if isinstance(error, requests.ConnectionError):
+        return "connection"
+    if isinstance(error, requests.HTTPError):
+        return "http_status"
+    if isinstance(error, (KeyError, IndexError, TypeError, ValueError)):
+        return "bad_response"
+    return "other"
+
+
+def timed_call(provider, lat, lon):
+    start = time.perf_counter()
+    try:
+        return provider.current_weather(lat, lon)
+    except Exception as e:
+        WEATHER_UPSTREAM_ERRORS.labels(
+            provider=provider.name, reason=error_reason(e)
+        ).inc()
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        latency_window(provider.name).add(elapsed)
+        WEATHER_UPSTREAM_SECONDS.labels(provider=provider.name).observe(elapsed)
+
+
+@timed("http")
+def current_weather(lat, lon, providers=None):
+    """
+    Current weather from the first provider to answer.
+
+    The next provider is called once the newest in-flight call has taken
+    longer than its hedge delay, or as soon as a call fails. Calls still
+    queued when an answer arrives are cancelled; ones already running are
+    left to finish in the background and their results discarded.
+
+    Raises: the first provider's error if every provider fails.
+    """
+    providers = providers or get_providers()
+    if len(providers) == 1:
+        return timed_call(providers[0], lat, lon)
+
+    executor = get_executor()
+    remaining = list(providers)
+    pending = {}
+    first_error = None
+    while remaining or pending:
+        timeout = None
+        if remaining:
+            provider = remaining.pop(0)
+            future = executor.submit(timed_call, provider, lat, lon)
+            pending[future] = provider
+            if remaining:
+                timeout = hedge_delay(provider.name)
+
+        done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            provider = pending.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.warning(f"Weather provider {provider.name} failed: {e}")
+                first_error = first_error or e
+                continue
+
+            for loser in pending:
+                loser.cancel()
+            if provider is not providers[0]:
+                logger.info(f"Weather answered by {provider.name}")
+            return result
+
+    raise first_error
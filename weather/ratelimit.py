@@ -0,0 +1,54 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter.
+
+    :param rate: Tokens added per second.
+    :param capacity: Maximum tokens held, i.e. the largest burst.
+    """
+
+    def __init__(self, rate, capacity, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        with self._lock:
+            self._refill()
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1, timeout=None):
+        """
+        Wait until ``tokens`` are available.
+
+        Returns: False if that would take longer than ``timeout`` seconds.
+        """
+        deadline = None if timeout is None else self._clock() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return True
+                wait = (tokens - self.tokens) / self.rate
+
+            if deadline is not None and self._clock() + wait > deadline:
+                return False
+            self._sleep(wait)
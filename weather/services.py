@@ -1,54 +1,175 @@
 import logging
-import os
+import time
+import uuid
 
 import requests
+from django.conf import settings
 from django.core.cache import cache
 
+from .breaker import CircuitBreaker
+from .geocoding import get_coordinates
+from .metrics import WEATHER_CACHE_LOOKUPS
+from .providers import current_weather
+
 logger = logging.getLogger(__name__)
 
-API_KEY = os.getenv("OPENWEATHERMAP_API_KEY")
-GEOCODE_URL = "http://api.openweathermap.org/geo/1.0/direct"
-WEATHER_URL = "https://api.openweathermap.org/data/2.5/weather"
+WEATHER_UNAVAILABLE = {"temp": None, "description": "Weather not available"}
+
+# Entries are {"data": ..., "fresh_until": ...}; bumped from the implicit
+# version 1, which cached the bare result.
+WEATHER_CACHE_VERSION = 2
+
+breaker = CircuitBreaker(
+    "weather",
+    failure_threshold=settings.WEATHER_CIRCUIT_FAILURE_THRESHOLD,
+    reset_timeout=settings.WEATHER_CIRCUIT_RESET_TIMEOUT,
+)
+
+
+def weather_cache_key(city):
+    return f"weather_{city.lower()}"
 
 
 def get_weather(city):
-    cache_key = f"weather_{city.lower()}"
-    cached = cache.get(cache_key)
-    if cached:
-        return cached
+    """
+    Current weather for a city, from cache when possible.
+
+    A cache entry is fresh for ``WEATHER_CACHE_TIMEOUT`` seconds and kept
+    as a stale fallback for ``WEATHER_STALE_TIMEOUT`` more. On a miss only
+    one caller across all workers fetches (single flight); the others serve
+    the stale value or wait briefly for the fetcher's result.
+    """
+    record_lookup(city)
+
+    cache_key = weather_cache_key(city)
+    entry = cache.get(cache_key, version=WEATHER_CACHE_VERSION)
+    if entry and entry["fresh_until"] > time.time():
+        WEATHER_CACHE_LOOKUPS.labels(result="hit").inc()
+        return entry["data"]
+    stale = entry["data"] if entry else None
+    WEATHER_CACHE_LOOKUPS.labels(result="stale" if stale else "miss").inc()
+
+    # Recently failed for this city, or upstream is down: answer now
+    # instead of waiting on a timeout.
+    unavailable_key = f"weather_unavailable_{city.lower()}"
+    if cache.get(unavailable_key) or not breaker.allow_request():
+        return stale or dict(WEATHER_UNAVAILABLE)
+
+    token = acquire_fetch_lock(city)
+    if not token:
+        if stale:
+            return stale
+        return wait_for_weather(cache_key, unavailable_key)
+
+    try:
+        # The previous holder may have cached the result between our read
+        # and taking the lock.
+        entry = cache.get(cache_key, version=WEATHER_CACHE_VERSION)
+        if entry and entry["fresh_until"] > time.time():
+            return entry["data"]
+        return fetch_weather(city)
+    except Exception:
+        return stale or dict(WEATHER_UNAVAILABLE)
+    finally:
+        release_fetch_lock(city, token)
+
+
+def refresh_weather(city):
+    """
+    Fetch and cache a city's weather now, unless another worker already is.
+
+    Returns: True if fresh weather was cached.
+    """
+    token = acquire_fetch_lock(city)
+    if not token:
+        return False
 
     try:
-        # Get coordinates
-        geo_params = {"q": city, "limit": 1, "appid": API_KEY}
-        geo_response = requests.get(GEOCODE_URL, params=geo_params)
-        geo_response.raise_for_status()
-        geo_data = geo_response.json()
-
-        if not geo_data:
-            raise ValueError(f"No coordinates found for {city}")
-
-        lat = geo_data[0]["lat"]
-        lon = geo_data[0]["lon"]
-
-        # Get weather using lat/lon
-        weather_params = {
-            "lat": lat,
-            "lon": lon,
-            "appid": API_KEY,
-            "units": "metric",
-        }
-        weather_response = requests.get(WEATHER_URL, params=weather_params)
-        weather_response.raise_for_status()
-        weather_data = weather_response.json()
-
-        result = {
-            "temp": weather_data["main"]["temp"],
-            "description": weather_data["weather"][0]["description"],
-        }
-
-        cache.set(cache_key, result, timeout=7200)
+        fetch_weather(city)
+        return True
+    except Exception:
+        return False
+    finally:
+        release_fetch_lock(city, token)
+
+
+def acquire_fetch_lock(city):
+    """Returns: a token to release the lock with, None if it is held."""
+    token = uuid.uuid4().hex
+    if cache.add(
+        f"weather_lock_{city.lower()}",
+        token,
+        timeout=settings.WEATHER_FETCH_LOCK_TIMEOUT,
+    ):
+        return token
+    return None
+
+
+def release_fetch_lock(city, token):
+    lock_key = f"weather_lock_{city.lower()}"
+    if cache.get(lock_key) == token:
+        cache.delete(lock_key)
+
+
+def fetch_weather(city):
+    """
+    Fetch from upstream and cache the result.
+
+    Failures are recorded (circuit breaker, negative cache) and re-raised.
+    """
+    try:
+        # Get coordinates (stored after the first lookup of a city)
+        lat, lon = get_coordinates(city)
+
+        # Get weather using lat/lon, hedged across providers
+        result = current_weather(lat, lon)
+
+        breaker.record_success()
+        cache.set(
+            weather_cache_key(city),
+            {
+                "data": result,
+                "fresh_until": time.time() + settings.WEATHER_CACHE_TIMEOUT,
+            },
+            timeout=settings.WEATHER_CACHE_TIMEOUT
+            + settings.WEATHER_STALE_TIMEOUT,
+            version=WEATHER_CACHE_VERSION,
+        )
         return result
 
     except Exception as e:
+        if isinstance(e, requests.RequestException):
+            breaker.record_failure()
         logger.error(f"Failed to fetch weather for {city}: {e}")
-        return {"temp": None, "description": "Weather not available"}
+        cache.set(
+            f"weather_unavailable_{city.lower()}",
+            True,
+            timeout=settings.WEATHER_NEGATIVE_CACHE_TIMEOUT,
+        )
+        raise
+
+
+def wait_for_weather(cache_key, unavailable_key):
+    """Poll for the result of a fetch running in another worker."""
+    deadline = time.monotonic() + settings.WEATHER_COALESCE_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(0.02)
+        entry = cache.get(cache_key, version=WEATHER_CACHE_VERSION)
+        if entry:
+            return entry["data"]
+        if cache.get(unavailable_key):
+            break
+    return dict(WEATHER_UNAVAILABLE)
+
+
+def lookup_count_key(city):
+    return f"weather_lookups_{city.lower()}"
+
+
+def record_lookup(city):
+    """Count lookups per city over WEATHER_LOOKUP_WINDOW, for prewarming."""
+    key = lookup_count_key(city)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=settings.WEATHER_LOOKUP_WINDOW)
@@ -0,0 +1,198 @@
+"""
+Local stand-ins for the weather APIs.
+
+``FakeOpenWeatherMapServer`` serves the OpenWeatherMap geocoding and current
+weather endpoints, and the Open-Meteo forecast endpoint, over real HTTP with
+configurable latency and error rate, for tests and load tests.
+``FakeWeatherProvider`` replaces a provider in-process.
+"""
+
+import json
+import random
+import threading
+import time
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+GEOCODE_PATH = "/geo/1.0/direct"
+WEATHER_PATH = "/data/2.5/weather"
+OPEN_METEO_PATH = "/v1/forecast"
+
+
+class FakeOpenWeatherMapServer:
+    """
+    Threaded HTTP server answering like OpenWeatherMap.
+
+    :param host: Interface to bind.
+    :param port: Port to bind, 0 picks a free one.
+    :param latency: Seconds to wait before answering each request.
+    :param error_rate: Fraction of requests answered with HTTP 503.
+    :param unknown_cities: City names the geocoder returns no match for.
+    """
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=0,
+        latency=0.0,
+        error_rate=0.0,
+        unknown_cities=(),
+    ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.unknown_cities = {city.lower() for city in unknown_cities}
+        self.requests = Counter()
+        self.connections = set()
+        self._fail_next = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def geocode_url(self):
+        return self.url + GEOCODE_PATH
+
+    @property
+    def weather_url(self):
+        return self.url + WEATHER_PATH
+
+    @property
+    def open_meteo_url(self):
+        return self.url + OPEN_METEO_PATH
+
+    def fail_next(self, count, status=503):
+        """Answer the next ``count`` requests with ``status``."""
+        with self._lock:
+            self._fail_next.extend([status] * count)
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            kwargs={"poll_interval": 0.05},
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def respond(self, path, query):
+        """Returns: (status, payload) for a request."""
+        with self._lock:
+            self.requests[path] += 1
+            forced_status = self._fail_next.pop(0) if self._fail_next else None
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        if forced_status:
+            return forced_status, {"message": "forced failure"}
+        if self.error_rate and random.random() < self.error_rate:
+            return 503, {"message": "service unavailable"}
+
+        if path == GEOCODE_PATH:
+            city = query.get("q", [""])[0]
+            if not city or city.lower() in self.unknown_cities:
+                return 200, []
+            # Stable fake coordinates derived from the name.
+            seed = zlib.crc32(city.lower().encode())
+            lat = round((seed % 18000) / 100 - 90, 4)
+            lon = round((seed // 18000 % 36000) / 100 - 180, 4)
+            return 200, [{"name": city, "lat": lat, "lon": lon}]
+
+        if path == WEATHER_PATH:
+            lat = float(query.get("lat", ["0"])[0])
+            return 200, {
+                "main": {"temp": round(25 - abs(lat) / 3, 1)},
+                "weather": [{"description": "clear sky"}],
+            }
+
+        if path == OPEN_METEO_PATH:
+            lat = float(query.get("latitude", ["0"])[0])
+            return 200, {
+                "current": {
+                    "temperature_2m": round(25 - abs(lat) / 3, 1),
+                    "weather_code": 0,
+                }
+            }
+
+        return 404, {"message": "not found"}
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # HTTP/1.1 so clients can keep connections alive.
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with fake._lock:
+                    fake.connections.add(self.client_address)
+                parsed = urlparse(self.path)
+                status, payload = fake.respond(
+                    parsed.path, parse_qs(parsed.query)
+                )
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except ConnectionError:
+                    # Client gave up waiting (timeouts, hedged losers).
+                    self.close_connection = True
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+class FakeWeatherProvider:
+    """
+    In-process weather provider answering after ``latency`` seconds, or
+    raising ``error`` if given.
+    """
+
+    def __init__(
+        self,
+        name,
+        result=None,
+        latency=0.0,
+        error=None,
+    ):
+        self.name = name
+        self.result = result or {"temp": 20.0, "description": "clear sky"}
+        self.latency = latency
+        self.error = error
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def current_weather(self, lat, lon):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.error:
+            raise self.error
+        return dict(self.result)
+
+    def close(self):
+        pass
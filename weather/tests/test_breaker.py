@@ -0,0 +1,104 @@
+import time
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache
+
+from weather.breaker import CircuitBreaker
+from weather.client import WeatherClient
+from weather.geocoding import clear_coordinates_cache
+from weather.models import CityLocation
+from weather.services import WEATHER_UNAVAILABLE, breaker, get_weather
+from weather.testing import FakeOpenWeatherMapServer
+
+
+class TestCircuitBreaker:
+
+    def setup_method(self):
+        cache.clear()
+        self.breaker = CircuitBreaker(
+            "test", failure_threshold=3, reset_timeout=30
+        )
+
+    def test_opens_after_consecutive_failures(self):
+        for _ in range(2):
+            self.breaker.record_failure()
+        assert self.breaker.allow_request()
+
+        self.breaker.record_failure()
+        assert self.breaker.state == CircuitBreaker.OPEN
+        assert not self.breaker.allow_request()
+
+    def test_success_resets_failure_count(self):
+        for _ in range(2):
+            self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+
+        assert self.breaker.state == CircuitBreaker.CLOSED
+
+    def test_half_open_allows_a_single_probe(self):
+        for _ in range(3):
+            self.breaker.record_failure()
+
+        with patch("weather.breaker.time.time", return_value=time.time() + 31):
+            assert self.breaker.state == CircuitBreaker.HALF_OPEN
+            assert self.breaker.allow_request()
+            assert not self.breaker.allow_request()
+
+            self.breaker.record_success()
+            assert self.breaker.state == CircuitBreaker.CLOSED
+
+    def test_failed_probe_reopens(self):
+        for _ in range(3):
+            self.breaker.record_failure()
+
+        with patch("weather.breaker.time.time", return_value=time.time() + 31):
+            assert self.breaker.allow_request()
+            self.breaker.record_failure()
+
+        assert self.breaker.state == CircuitBreaker.OPEN
+
+
+@pytest.mark.django_db
+class TestWeatherOutage:
+
+    def setup_method(self):
+        cache.clear()
+        clear_coordinates_cache()
+        for name in ("berlin", "paris", "madrid", "rome", "oslo", "vienna"):
+            CityLocation.objects.create(
+                name=name,
+                latitude=50.0,
+                longitude=10.0,
+                source=CityLocation.Source.GAZETTEER,
+            )
+
+    @pytest.fixture
+    def failing_upstream(self):
+        with FakeOpenWeatherMapServer(error_rate=1.0) as server:
+            client = WeatherClient(
+                api_key="test",
+                geocode_url=server.geocode_url,
+                weather_url=server.weather_url,
+                retries=0,
+            )
+            with patch("weather.providers.get_client", return_value=client):
+                yield server
+
+    def test_failed_city_is_negatively_cached(self, failing_upstream):
+        assert get_weather("Berlin") == WEATHER_UNAVAILABLE
+        assert get_weather("Berlin") == WEATHER_UNAVAILABLE
+
+        assert failing_upstream.requests["/data/2.5/weather"] == 1
+
+    def test_open_circuit_stops_upstream_calls(self, failing_upstream):
+        cities = ["Berlin", "Paris", "Madrid", "Rome", "Oslo", "Vienna"]
+        for city in cities:
+            assert get_weather(city) == WEATHER_UNAVAILABLE
+
+        assert breaker.state == CircuitBreaker.OPEN
+        assert (
+            failing_upstream.requests["/data/2.5/weather"]
+            == breaker.failure_threshold
+        )
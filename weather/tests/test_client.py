@@ -0,0 +1,106 @@
+import time
+
+import pytest
+import requests
+
+from weather.client import WeatherClient
+from weather.testing import FakeOpenWeatherMapServer
+
+
+@pytest.fixture
+def fake_server():
+    with FakeOpenWeatherMapServer(unknown_cities=["Atlantis"]) as server:
+        yield server
+
+
+def make_client(server, **kwargs):
+    options = {
+        "api_key": "test",
+        "geocode_url": server.geocode_url,
+        "weather_url": server.weather_url,
+        "backoff_factor": 0,
+        "backoff_jitter": 0,
+        **kwargs,
+    }
+    return WeatherClient(**options)
+
+
+class TestWeatherClient:
+
+    def test_geocode_and_weather(self, fake_server):
+        client = make_client(fake_server)
+
+        matches = client.geocode("Berlin")
+        weather = client.current_weather(matches[0]["lat"], matches[0]["lon"])
+
+        assert set(matches[0]) >= {"lat", "lon"}
+        assert weather["weather"][0]["description"] == "clear sky"
+        assert "temp" in weather["main"]
+
+    def test_unknown_city_returns_no_match(self, fake_server):
+        assert make_client(fake_server).geocode("Atlantis") == []
+
+    def test_connection_is_reused(self, fake_server):
+        """Keep-alive: several calls share one connection"""
+        client = make_client(fake_server)
+
+        for _ in range(5):
+            client.geocode("Paris")
+
+        assert fake_server.requests["/geo/1.0/direct"] == 5
+        assert len(fake_server.connections) == 1
+
+    def test_retries_transient_errors(self, fake_server):
+        client = make_client(fake_server, retries=2)
+        fake_server.fail_next(2, status=503)
+
+        assert client.geocode("Paris")
+        assert fake_server.requests["/geo/1.0/direct"] == 3
+
+    def test_gives_up_after_retries(self, fake_server):
+        client = make_client(fake_server, retries=1)
+        fake_server.fail_next(5, status=502)
+
+        with pytest.raises(requests.HTTPError):
+            client.geocode("Paris")
+        assert fake_server.requests["/geo/1.0/direct"] == 2
+
+    def test_client_errors_are_not_retried(self, fake_server):
+        client = make_client(fake_server, retries=3)
+        fake_server.fail_next(1, status=401)
+
+        with pytest.raises(requests.HTTPError):
+            client.geocode("Paris")
+        assert fake_server.requests["/geo/1.0/direct"] == 1
+
+    def test_read_timeout(self, fake_server):
+        """A slow upstream costs the read timeout, not more"""
+        fake_server.latency = 0.5
+        client = make_client(fake_server, read_timeout=0.1, retries=0)
+
+        start = time.perf_counter()
+        # requests reports a read timeout that exhausted the retries as a
+        # ConnectionError, so only the base class is stable here.
+        with pytest.raises(requests.RequestException):
+            client.geocode("Paris")
+        assert time.perf_counter() - start < 0.4
+
+    def test_latency_observers(self, fake_server):
+        client = make_client(fake_server, retries=0)
+        calls = []
+        client.add_latency_observer(
+            lambda endpoint, seconds, status: calls.append(
+                (endpoint, seconds, status)
+            )
+        )
+
+        client.geocode("Paris")
+        fake_server.fail_next(1, status=503)
+        with pytest.raises(requests.HTTPError):
+            client.current_weather(1.0, 2.0)
+
+        assert [(call[0], call[2]) for call in calls] == [
+            ("geocode", 200),
+            ("weather", 503),
+        ]
+        assert all(call[1] > 0 for call in calls)
@@ -0,0 +1,98 @@
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.core.management import call_command
+
+from weather.geocoding import clear_coordinates_cache, get_coordinates
+from weather.models import CityLocation
+
+
+@pytest.mark.django_db
+class TestGetCoordinates:
+
+    def setup_method(self):
+        clear_coordinates_cache()
+
+    @patch("weather.client.requests.Session.get")
+    def test_geocoded_city_is_stored(self, mock_get):
+        """First lookup calls the API and stores the result"""
+        mock_geo = MagicMock()
+        mock_geo.raise_for_status.return_value = None
+        mock_geo.json.return_value = [{"lat": 52.52, "lon": 13.405}]
+        mock_get.return_value = mock_geo
+
+        assert get_coordinates("Berlin") == (52.52, 13.405)
+
+        location = CityLocation.objects.get(name="berlin")
+        assert location.source == CityLocation.Source.GEOCODING_API
+
+        clear_coordinates_cache()
+        assert get_coordinates("BERLIN") == (52.52, 13.405)
+        mock_get.assert_called_once()
+
+    @patch("weather.client.requests.Session.get")
+    def test_repeat_lookup_is_served_in_process(
+        self, mock_get, django_assert_num_queries
+    ):
+        """LRU hit needs neither the API nor the database"""
+        CityLocation.objects.create(
+            name="madrid",
+            latitude=40.4168,
+            longitude=-3.7038,
+            source=CityLocation.Source.GAZETTEER,
+        )
+
+        assert get_coordinates("Madrid") == (40.4168, -3.7038)
+        with django_assert_num_queries(0):
+            assert get_coordinates("madrid") == (40.4168, -3.7038)
+        mock_get.assert_not_called()
+
+    @patch("weather.client.requests.Session.get")
+    def test_unknown_city_raises(self, mock_get):
+        mock_geo = MagicMock()
+        mock_geo.raise_for_status.return_value = None
+        mock_geo.json.return_value = []
+        mock_get.return_value = mock_geo
+
+        with pytest.raises(ValueError):
+            get_coordinates("Atlantis")
+        assert not CityLocation.objects.exists()
+
+    @patch("weather.client.requests.Session.get")
+    def test_empty_city_raises_without_api_call(self, mock_get):
+        with pytest.raises(ValueError):
+            get_coordinates("  ")
+        mock_get.assert_not_called()
+
+
+@pytest.mark.django_db
+class TestLoadGazetteer:
+
+    def setup_method(self):
+        clear_coordinates_cache()
+
+    @patch("weather.client.requests.Session.get")
+    def test_gazetteer_cities_resolve_offline(self, mock_get):
+        call_command("load_gazetteer", stdout=StringIO())
+
+        assert (
+            CityLocation.objects.filter(
+                source=CityLocation.Source.GAZETTEER
+            ).count()
+            > 0
+        )
+        assert get_coordinates("Copenhagen") == (55.6761, 12.5683)
+        mock_get.assert_not_called()
+
+    def test_existing_cities_are_kept(self):
+        CityLocation.objects.create(
+            name="paris",
+            latitude=1.0,
+            longitude=2.0,
+            source=CityLocation.Source.GEOCODING_API,
+        )
+
+        call_command("load_gazetteer", stdout=StringIO())
+
+        assert CityLocation.objects.get(name="paris").latitude == 1.0
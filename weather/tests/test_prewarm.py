@@ -0,0 +1,129 @@
+import time
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache
+
+from shipments.models import Shipment
+from shipments.tasks import prewarm_weather_task
+from weather.client import WeatherClient
+from weather.geocoding import clear_coordinates_cache
+from weather.prewarm import cities_to_refresh, prewarm_weather
+from weather.ratelimit import TokenBucket
+from weather.services import (
+    WEATHER_CACHE_VERSION,
+    breaker,
+    get_weather,
+    weather_cache_key,
+)
+from weather.testing import FakeOpenWeatherMapServer
+
+
+def cache_weather(city, fresh_for):
+    cache.set(
+        weather_cache_key(city),
+        {
+            "data": {"temp": 20.0, "description": "clear sky"},
+            "fresh_until": time.time() + fresh_for,
+        },
+        version=WEATHER_CACHE_VERSION,
+    )
+
+
+@pytest.mark.django_db
+class TestPrewarmWeather:
+
+    def setup_method(self):
+        cache.clear()
+        clear_coordinates_cache()
+
+    @pytest.fixture(autouse=True)
+    def upstream(self):
+        with FakeOpenWeatherMapServer() as server:
+            client = WeatherClient(
+                api_key="test",
+                geocode_url=server.geocode_url,
+                weather_url=server.weather_url,
+                retries=0,
+            )
+            with (
+                patch("weather.providers.get_client", return_value=client),
+                patch("weather.geocoding.get_client", return_value=client),
+            ):
+                self.server = server
+                yield server
+
+    def test_only_missing_or_expiring_cities_are_due(self):
+        cache_weather("paris", fresh_for=3600)
+        cache_weather("berlin", fresh_for=60)
+
+        due = cities_to_refresh(["Paris", "Berlin", "Rome"], horizon=900)
+
+        assert sorted(due) == ["berlin", "rome"]
+
+    def test_most_looked_up_cities_come_first(self):
+        with patch("weather.services.fetch_weather", side_effect=Exception):
+            for _ in range(3):
+                get_weather("Rome")
+            get_weather("Berlin")
+
+        due = cities_to_refresh(["Berlin", "Oslo", "Rome"], horizon=900)
+
+        assert due == ["rome", "berlin", "oslo"]
+
+    def test_refreshes_due_cities(self):
+        summary = prewarm_weather(["Paris", "Rome"], time_budget=5)
+
+        assert summary["refreshed"] == 2
+        assert self.server.requests["/data/2.5/weather"] == 2
+
+        # Lookups are now served from cache.
+        get_weather("Paris")
+        assert self.server.requests["/data/2.5/weather"] == 2
+
+    def test_stops_when_rate_limit_exceeds_time_budget(self):
+        bucket = TokenBucket(rate=0.01, capacity=1)
+
+        summary = prewarm_weather(
+            ["Paris", "Rome", "Oslo"], time_budget=1, bucket=bucket
+        )
+
+        assert summary["refreshed"] == 1
+        assert summary["deferred"] == 2
+        assert self.server.requests["/data/2.5/weather"] == 1
+
+    def test_stops_while_circuit_is_open(self):
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure()
+
+        summary = prewarm_weather(["Paris"], time_budget=5)
+
+        assert summary["deferred"] == 1
+        assert self.server.requests["/data/2.5/weather"] == 0
+
+    def test_task_prewarms_destinations_of_undelivered_shipments(self):
+        Shipment.objects.create(
+            tracking_number="TN10000001",
+            carrier=Shipment.Carrier.DHL,
+            sender_address="Street 1, 10115 Berlin, Germany",
+            receiver_address="Street 10, 75001 Paris, France",
+            status=Shipment.Status.TRANSIT,
+        )
+        Shipment.objects.create(
+            tracking_number="TN10000002",
+            carrier=Shipment.Carrier.DHL,
+            sender_address="Street 1, 10115 Berlin, Germany",
+            receiver_address="Street 5, 00100 Rome, Italy",
+            status=Shipment.Status.DELIVERY,
+        )
+
+        summary = prewarm_weather_task()
+
+        assert summary["candidates"] == 1
+        assert summary["refreshed"] == 1
+        assert cache.get(
+            weather_cache_key("paris"), version=WEATHER_CACHE_VERSION
+        )
+        assert not cache.get(
+            weather_cache_key("rome"), version=WEATHER_CACHE_VERSION
+        )
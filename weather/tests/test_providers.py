@@ -0,0 +1,101 @@
+import time
+
+import pytest
+import requests
+from django.test import override_settings
+
+from weather.providers import (
+    LATENCY_MIN_SAMPLES,
+    OpenMeteoProvider,
+    current_weather,
+    get_providers,
+    hedge_delay,
+    latency_window,
+    register_provider,
+    reset_providers,
+)
+from weather.testing import FakeOpenWeatherMapServer, FakeWeatherProvider
+
+PRIMARY = {"temp": 10.0, "description": "overcast"}
+SECONDARY = {"temp": 11.0, "description": "clear sky"}
+
+
+class TestHedgedRequests:
+
+    def setup_method(self):
+        reset_providers()
+        self.settings = override_settings(WEATHER_HEDGE_DEFAULT_DELAY=0.05)
+        self.settings.enable()
+
+    def teardown_method(self):
+        self.settings.disable()
+        reset_providers()
+
+    def test_fast_primary_is_not_hedged(self):
+        primary = FakeWeatherProvider("primary", PRIMARY)
+        secondary = FakeWeatherProvider("secondary", SECONDARY)
+
+        assert current_weather(1, 2, [primary, secondary]) == PRIMARY
+        assert secondary.calls == 0
+
+    def test_slow_primary_is_hedged(self):
+        primary = FakeWeatherProvider("primary", PRIMARY, latency=1)
+        secondary = FakeWeatherProvider("secondary", SECONDARY)
+
+        start = time.perf_counter()
+        result = current_weather(1, 2, [primary, secondary])
+
+        assert result == SECONDARY
+        assert time.perf_counter() - start < 0.5
+        assert secondary.calls == 1
+
+    def test_failed_primary_falls_over_without_waiting(self):
+        primary = FakeWeatherProvider(
+            "primary", error=requests.ConnectionError("down")
+        )
+        secondary = FakeWeatherProvider("secondary", SECONDARY)
+
+        with override_settings(WEATHER_HEDGE_DEFAULT_DELAY=5):
+            start = time.perf_counter()
+            assert current_weather(1, 2, [primary, secondary]) == SECONDARY
+            assert time.perf_counter() - start < 1
+
+    def test_raises_primary_error_when_all_fail(self):
+        primary = FakeWeatherProvider(
+            "primary", error=requests.ConnectionError("down")
+        )
+        secondary = FakeWeatherProvider("secondary", error=KeyError("temp"))
+
+        with pytest.raises(requests.ConnectionError):
+            current_weather(1, 2, [primary, secondary])
+
+    def test_hedge_delay_follows_p95_latency(self):
+        window = latency_window("primary")
+        for _ in range(LATENCY_MIN_SAMPLES - 1):
+            window.add(0.2)
+        assert hedge_delay("primary") == 0.05
+
+        for _ in range(100):
+            window.add(0.2)
+        window.add(3.0)
+        assert hedge_delay("primary") == pytest.approx(0.2)
+
+    def test_registered_fakes_replace_providers(self):
+        fake = FakeWeatherProvider("openweathermap", PRIMARY)
+        register_provider("openweathermap", lambda: fake)
+
+        with override_settings(WEATHER_PROVIDERS=["openweathermap"]):
+            assert get_providers() == [fake]
+            assert current_weather(1, 2) == PRIMARY
+
+
+class TestOpenMeteoProvider:
+
+    def test_current_weather(self):
+        with FakeOpenWeatherMapServer() as server:
+            with override_settings(OPEN_METEO_URL=server.open_meteo_url):
+                provider = OpenMeteoProvider.from_settings()
+                result = provider.current_weather(52.52, 13.405)
+                provider.close()
+
+        assert result == {"temp": 7.5, "description": "clear sky"}
@@ -0,0 +1,55 @@
+from weather.ratelimit import TokenBucket
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestTokenBucket:
+
+    def setup_method(self):
+        self.clock = FakeClock()
+        self.bucket = TokenBucket(
+            rate=2, capacity=4, clock=self.clock, sleep=self.clock.sleep
+        )
+
+    def test_allows_a_burst_up_to_capacity(self):
+        assert all(self.bucket.try_acquire() for _ in range(4))
+        assert not self.bucket.try_acquire()
+
+    def test_refills_at_rate(self):
+        for _ in range(4):
+            self.bucket.try_acquire()
+
+        self.clock.now += 1
+        assert self.bucket.try_acquire()
+        assert self.bucket.try_acquire()
+        assert not self.bucket.try_acquire()
+
+    def test_refill_is_capped_at_capacity(self):
+        self.clock.now += 60
+        assert self.bucket.tokens <= 4
+        assert all(self.bucket.try_acquire() for _ in range(4))
+        assert not self.bucket.try_acquire()
+
+    def test_acquire_waits_for_a_token(self):
+        for _ in range(4):
+            self.bucket.try_acquire()
+
+        assert self.bucket.acquire(timeout=1)
+        assert self.clock.now == 0.5
+
+    def test_acquire_gives_up_past_timeout(self):
+        for _ in range(4):
+            self.bucket.try_acquire()
+
+        assert not self.bucket.acquire(timeout=0.1)
+        assert self.clock.now == 0
@@ -2,6 +2,8 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
+from weather.geocoding import clear_coordinates_cache
+from weather.models import CityLocation
 from weather.services import get_weather
 
 
@@ -12,8 +14,9 @@ class TestGetWeather:
         from django.core.cache import cache
 
         cache.clear()
+        clear_coordinates_cache()
 
-    @patch("weather.services.requests.get")
+    @patch("weather.client.requests.Session.get")
     def test_successful_weather_response(self, mock_get):
         """Test successful weather API response"""
         # Mock geo response
@@ -34,7 +37,7 @@ class TestGetWeather:
         result = get_weather("Paris")
         assert result == {"temp": 25.0, "description": "clear sky"}
 
-    @patch("weather.services.requests.get")
+    @patch("weather.client.requests.Session.get")
     def test_city_not_found_error(self, mock_get):
         """Empty geo response = no coordinates = fallback response"""
         mock_geo = MagicMock()
@@ -51,7 +54,7 @@ class TestGetWeather:
         result = get_weather("")
         assert result == {"temp": None, "description": "Weather not available"}
 
-    @patch("weather.services.requests.get")
+    @patch("weather.client.requests.Session.get")
     def test_missing_temp_field(self, mock_get):
         """Missing temp should trigger fallback"""
         mock_geo = MagicMock()
@@ -70,7 +73,7 @@ class TestGetWeather:
         result = get_weather("Berlin")
         assert result == {"temp": None, "description": "Weather not available"}
 
-    @patch("weather.services.requests.get")
+    @patch("weather.client.requests.Session.get")
     def test_missing_weather_description(self, mock_get):
         """Missing description = fallback response"""
         mock_geo = MagicMock()
@@ -88,3 +91,27 @@ class TestGetWeather:
 
         result = get_weather("Berlin")
         assert result == {"temp": None, "description": "Weather not available"}
+
+    @patch("weather.client.requests.Session.get")
+    def test_known_city_makes_single_upstream_call(self, mock_get):
+        """Stored coordinates skip the geocoding call"""
+        CityLocation.objects.create(
+            name="paris",
+            latitude=48.8566,
+            longitude=2.3522,
+            source=CityLocation.Source.GAZETTEER,
+        )
+
+        mock_weather = MagicMock()
+        mock_weather.raise_for_status.return_value = None
+        mock_weather.json.return_value = {
+            "main": {"temp": 25.0},
+            "weather": [{"description": "clear sky"}],
+        }
+        mock_get.return_value = mock_weather
+
+        result = get_weather("Paris")
+
+        assert result == {"temp": 25.0, "description": "clear sky"}
+        mock_get.assert_called_once()
+        assert mock_get.call_args.kwargs["params"]["lat"] == 48.8566
@@ -0,0 +1,87 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache
+
+from weather.client import WeatherClient
+from weather.geocoding import clear_coordinates_cache, get_coordinates
+from weather.models import CityLocation
+from weather.services import (
+    WEATHER_CACHE_VERSION,
+    get_weather,
+    weather_cache_key,
+)
+from weather.testing import FakeOpenWeatherMapServer
+
+WEATHER_PATH = "/data/2.5/weather"
+
+
+@pytest.mark.django_db
+class TestSingleFlight:
+
+    def setup_method(self):
+        cache.clear()
+        clear_coordinates_cache()
+        CityLocation.objects.create(
+            name="berlin",
+            latitude=52.52,
+            longitude=13.405,
+            source=CityLocation.Source.GAZETTEER,
+        )
+        # Warm the in-process LRU so worker threads never need the
+        # (test-transaction-bound) database.
+        get_coordinates("Berlin")
+
+    @pytest.fixture
+    def upstream(self):
+        with FakeOpenWeatherMapServer(latency=0.2) as server:
+            client = WeatherClient(
+                api_key="test",
+                geocode_url=server.geocode_url,
+                weather_url=server.weather_url,
+                pool_size=50,
+            )
+            with patch("weather.providers.get_client", return_value=client):
+                yield server
+
+    def test_concurrent_misses_fetch_once(self, upstream):
+        """200 simultaneous misses for one city: a single upstream call"""
+        callers = 200
+        barrier = Barrier(callers)
+
+        def lookup():
+            barrier.wait()
+            return get_weather("Berlin")
+
+        with ThreadPoolExecutor(max_workers=callers) as pool:
+            results = list(pool.map(lambda _: lookup(), range(callers)))
+
+        assert upstream.requests[WEATHER_PATH] == 1
+        assert all(result["description"] == "clear sky" for result in results)
+
+    def test_stale_value_served_while_refreshing(self, upstream):
+        stale = {"temp": 1.0, "description": "old"}
+        cache.set(
+            weather_cache_key("Berlin"),
+            {"data": stale, "fresh_until": time.time() - 1},
+            version=WEATHER_CACHE_VERSION,
+        )
+        # Another worker holds the fetch lock.
+        cache.add("weather_lock_berlin", "other", timeout=30)
+
+        assert get_weather("Berlin") == stale
+        assert upstream.requests[WEATHER_PATH] == 0
+
+    def test_expired_entry_is_refreshed(self, upstream):
+        cache.set(
+            weather_cache_key("Berlin"),
+            {"data": {"temp": 1.0, "description": "old"}, "fresh_until": 0},
+            version=WEATHER_CACHE_VERSION,
+        )
+
+        assert get_weather("Berlin")["description"] == "clear sky"
+        assert upstream.requests[WEATHER_PATH] == 1
+        assert cache.get("weather_lock_berlin") is None